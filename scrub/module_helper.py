@@ -5,6 +5,8 @@ import shutil
 import argparse
 from scrub.utils.filtering import do_filtering
 from scrub.utils import scrub_utilities
+from scrub.utils import incremental
+from scrub.utils import tool_registry
 
 
 def parse_arguments():
@@ -16,26 +18,33 @@ def parse_arguments():
     # Add parser arguments
     parser.add_argument('--config', default='./scrub.cfg')
     parser.add_argument('--module', required=True)
+    parser.add_argument('--incremental', default=None)
 
     # Parse the arguments
     args = vars(parser.parse_args(sys.argv[2:]))
 
     # Run analysis
-    main(args['module'], args['config'])
+    main(args['module'], args['config'], args['incremental'])
 
 
-def main(scrub_module, conf_file='/.scrub.cfg'):
+def main(scrub_module, conf_file='/.scrub.cfg', incremental_base=None):
     """
     This function runs a single analysis module, while preserving existing analysis results.
 
     Inputs:
         --module: Tool import location of the form scrub.tools.<tool>.do_<tool> [string]
         --config: Absolute path to the SCRUB configuration file to be used [string]
+        --incremental: Git revision or previous .scrub directory. Only the warnings for files that have changed since
+                       then are updated [string] [optional]
     """
 
     # Read in the configuration data
     scrub_conf_data = scrub_utilities.parse_common_configs(conf_file)
 
+    # Find the changed files and preserve the previous results, if necessary
+    if incremental_base:
+        incremental.initialize_incremental(scrub_conf_data, incremental_base)
+
     # Initialize the SCRUB storage directory
     scrub_utilities.initialize_storage_dir(scrub_conf_data)
 
@@ -48,7 +57,7 @@ def main(scrub_module, conf_file='/.scrub.cfg'):
         tool_status = getattr(module_object, "run_analysis")(scrub_conf_data, True)
 
         # Run filtering, if necessary
-        if (scrub_module.startswith('scrub.tool')) and (tool_status == 0):
+        if (tool_registry.find_tool(scrub_module) is not None) and (tool_status == 0):
             # Filter and distribute the results
             do_filtering.run_analysis(scrub_conf_data)
 
@@ -1,45 +1,61 @@
 import sys
+import argparse
+import importlib
 
-from scrub import scrubme
-from scrub import module_helper
-from scrub.utils import diff_results
-from scrub.utils import scrub_utilities
 
+# Subcommand name, help text, module, and function that parses the remaining arguments. The module is only imported
+# when its subcommand is used.
+SUBCOMMANDS = [('run-all', 'Run all applicable tools present within the configuration file',
+                'scrub.scrubme', 'parse_arguments'),
+               ('run-tool', 'Run a single analysis module, while preserving existing analysis results',
+                'scrub.module_helper', 'parse_arguments'),
+               ('diff', 'Compare a set of static analysis results to a defined baseline set of results',
+                'scrub.utils.diff_results', 'parse_arguments'),
+               ('show', 'Print the results for a directory using the distribution index',
+                'scrub.utils.show_results', 'parse_arguments'),
+               ('get-conf', 'Generate a blank configuration file at the desired output location',
+                'scrub.utils.scrub_utilities', 'create_conf_file')]
 
-help_message = ('run-all\n' +
-                scrubme.main.__doc__ + '\n\n'
-                'run-tool\n' +
-                module_helper.main.__doc__ + '\n\n'
-                'diff\n' +
-                diff_results.diff.__doc__ + '\n\n'
-                'get-conf\n' +
-                scrub_utilities.create_conf_file.__doc__ + '\n')
+
+def create_parser():
+    """This function creates the top-level argument parser, with a subparser for every subcommand.
+
+    Outputs:
+        - parser: Argument parser that selects the subcommand [argparse.ArgumentParser]
+    """
+
+    # Create the parser
+    parser = argparse.ArgumentParser(prog='scrub', formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     description='SCRUB is an orchestration and aggregation tool for static code '
+                                                 'analysis tools.',
+                                     epilog='Run "scrub <command> --help" for the options of each command.')
+    subparsers = parser.add_subparsers(dest='command', metavar='<command>')
+
+    # Add the subcommands, leaving their arguments to be parsed by each module
+    for command, command_help, _, _ in SUBCOMMANDS:
+        subparsers.add_parser(command, help=command_help, add_help=False)
+
+    return parser
 
 
 def main():
     """Console script for SCRUB."""
 
+    # Initialize variables
+    parser = create_parser()
+
+    # Print the help message if no subcommand was provided
     if len(sys.argv) <= 1:
-        print(help_message)
-    else:
-        if 'run-all' in sys.argv:
-            # Run analysis
-            scrubme.parse_arguments()
-
-        elif 'run-tool' in sys.argv:
-            # Run analysis
-            module_helper.parse_arguments()
-
-        elif 'diff' in sys.argv:
-            # Run analysis
-            diff_results.parse_arguments()
-
-        elif 'get-conf' in sys.argv:
-            # Run analysis
-            scrub_utilities.create_conf_file()
-
-        else:
-            print(help_message)
+        parser.print_help()
+        return 0
+
+    # Find the subcommand
+    args = parser.parse_args(sys.argv[1:2])
+
+    # Import the subcommand module and let it parse the remaining arguments
+    for command, _, module_name, function_name in SUBCOMMANDS:
+        if command == args.command:
+            getattr(importlib.import_module(module_name), function_name)()
 
     return 0
 
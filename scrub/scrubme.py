@@ -4,9 +4,19 @@ import os
 import re
 import shutil
 import sys
+import logging
 import argparse
+import traceback
+from concurrent import futures
 from scrub.utils import do_clean
+from scrub.utils import build_capture
+from scrub.utils import result_cache
+from scrub.utils import incremental
+from scrub.utils import checkpoints
 from scrub.utils import scrub_utilities
+from scrub.utils import workspaces
+from scrub.utils import tool_registry
+from scrub.utils import command_executor
 
 
 def parse_arguments():
@@ -17,21 +27,211 @@ def parse_arguments():
 
     # Add parser arguments
     parser.add_argument('--config', default='./scrub.cfg')
+    run_mode = parser.add_mutually_exclusive_group()
+    run_mode.add_argument('--incremental', default=None)
+    run_mode.add_argument('--resume', action='store_true')
 
     # Parse the arguments
     args = vars(parser.parse_args(sys.argv[2:]))
 
     # Run analysis
-    main(args['config'])
+    main(args['config'], args['incremental'], args['resume'])
 
 
-def main(conf_file=None):
+def get_module_name(module_path, scrub_path):
+    """This function converts the path to a SCRUB module into the module name.
+
+    Inputs:
+        - module_path: Absolute path to the module file [string]
+        - scrub_path: Absolute path to the SCRUB package directory [string]
+
+    Outputs:
+        - module_name: Importable name of the module [string]
+    """
+
+    return 'scrub.' + re.split('\\.py', os.path.relpath(module_path, scrub_path))[0].replace('/', '.')
+
+
+def run_module(module_name, scrub_conf_data, workspace_mode='none', resume=False):
+    """This function imports a SCRUB module and runs its analysis.
+
+    Inputs:
+        - module_name: Importable name of the module [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - workspace_mode: Method used to give the tool its own copy of the source tree [string] [optional]
+        - resume: Skip the module if it completed during a previous run? [bool] [optional]
+
+    Outputs:
+        - tool_status: Exit code returned by the module [int]
+    """
+
+    # Import the module
+    module_object = importlib.import_module(module_name)
+
+    # Initialize variables
+    tool_data = tool_registry.find_tool(module_name)
+    if tool_data is None:
+        tool_name = re.sub('^do_', '', module_name.split('.')[-1])
+    else:
+        tool_name = tool_data.get('name')
+
+    # Only analysis tools can use the result cache
+    if tool_data is None:
+        return checkpoints.run_stage(module_name, scrub_conf_data,
+                                     lambda: workspaces.run_in_workspace(module_object, tool_name, scrub_conf_data,
+                                                                         workspace_mode), resume)
+
+    # Call the analysis, inside a separate workspace if necessary, unless the results have been cached
+    return checkpoints.run_stage(module_name, scrub_conf_data,
+                                 lambda: result_cache.run_cached_analysis(
+                                     module_object, tool_name, scrub_conf_data,
+                                     lambda: workspaces.run_in_workspace(module_object, tool_name, scrub_conf_data,
+                                                                         workspace_mode)), resume)
+
+
+def run_module_process(module_name, scrub_conf_data, workspace_mode='none', resume=False):
+    """This function runs a SCRUB module in a worker process and returns the configuration values it updated, since
+    the updates are otherwise lost when the process exits.
+
+    Inputs:
+        - module_name: Importable name of the module [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - workspace_mode: Method used to give the tool its own copy of the source tree [string] [optional]
+        - resume: Skip the module if it completed during a previous run? [bool] [optional]
+
+    Outputs:
+        - tool_status: Exit code returned by the module [int]
+        - conf_updates: Configuration values that were added or changed by the module [dict]
+    """
+
+    # Run the module
+    baseline_conf_data = scrub_conf_data.copy()
+    tool_status = run_module(module_name, scrub_conf_data, workspace_mode, resume)
+
+    return tool_status, {key: value for key, value in scrub_conf_data.items()
+                         if key not in baseline_conf_data or baseline_conf_data.get(key) != value}
+
+
+def run_parallel_modules(module_names, scrub_conf_data, max_parallel_tools, execution_status, resume=False):
+    """This function runs several SCRUB modules concurrently, each in a separate process.
+
+    Inputs:
+        - module_names: List of importable module names [list of strings]
+        - scrub_conf_data: Dictionary of values read from configuration file, updated by each module [dict]
+        - max_parallel_tools: Maximum number of modules to run at the same time [int]
+        - execution_status: List of [module name, exit code] pairs to be updated [list of lists]
+        - resume: Skip the modules that completed during a previous run? [bool] [optional]
+    """
+
+    # Initialize variables
+    module_status = {}
+
+    with futures.ProcessPoolExecutor(max_workers=max_parallel_tools) as executor:
+        tool_jobs = {executor.submit(run_module_process, module_name, scrub_conf_data,
+                                     scrub_conf_data.get('tool_workspace_mode'), resume): module_name
+                     for module_name in module_names}
+
+        try:
+            for tool_job in futures.as_completed(tool_jobs):
+                try:
+                    tool_status, conf_updates = tool_job.result()
+
+                    # Keep the configuration values updated by the module, as if it had run in this process
+                    scrub_conf_data.update(conf_updates)
+
+                except:     # lgtm [py/catch-base-exception]
+                    # Print the exception traceback
+                    logging.error('A SCRUB error has occurred while running %s', tool_jobs[tool_job])
+                    logging.error(traceback.format_exc())
+
+                    # Treat the failure as a fatal error
+                    tool_status = 100
+
+                # Store the status
+                module_status[tool_jobs[tool_job]] = tool_status
+
+                # Do not start any more modules if a python error has occurred
+                if tool_status == 100:
+                    for pending_job in tool_jobs:
+                        pending_job.cancel()
+
+        finally:
+            # Add the status to the execution status log, in the original order
+            for module_name in module_names:
+                if module_name in module_status:
+                    execution_status.append([module_name, module_status[module_name]])
+
+    # Check to see if a python error has occurred
+    if 100 in module_status.values():
+        sys.exit(100)
+
+
+def run_sequential_module(module_name, scrub_conf_data, execution_status, workspace_mode='none', resume=False):
+    """This function runs a single module, records its exit code, and stops SCRUB if a python error has occurred.
+
+    Inputs:
+        - module_name: Importable name of the module [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - execution_status: List of [module name, exit code] pairs to be updated [list of lists]
+        - workspace_mode: Method used to give the tool its own copy of the source tree [string] [optional]
+        - resume: Skip the module if it completed during a previous run? [bool] [optional]
+    """
+
+    # Call the analysis
+    tool_status = run_module(module_name, scrub_conf_data, workspace_mode, resume)
+
+    # Add the status to the execution status log
+    execution_status.append([module_name, tool_status])
+
+    # Check to see if a python error has occurred
+    if tool_status == 100:
+        sys.exit(tool_status)
+
+
+def probe_tool_versions(scrub_conf_data):
+    """This function runs the version commands of every enabled analysis tool concurrently, so that each tool and the
+    result cache can use the version number without running the command again.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of values read from configuration file, updated with the <tool>_version value of
+                           every tool that provides a version command [dict]
+    """
+
+    # Initialize variables
+    probed_tools = []
+
+    # Find the enabled tools that provide a version command
+    for enabled_tools, disabled_tools in tool_registry.get_tool_groups(scrub_conf_data):
+        for tool_data in enabled_tools:
+            try:
+                module_object = importlib.import_module(tool_data.get('module'))
+            except ImportError:
+                continue
+            if hasattr(module_object, 'get_version_command') and hasattr(module_object, 'parse_version_output'):
+                probed_tools.append((tool_data.get('name'), module_object))
+
+    # Run the version commands
+    if probed_tools:
+        call_strings = [module_object.get_version_command(scrub_conf_data.get(tool_name + '_path', ''))
+                        for tool_name, module_object in probed_tools]
+        command_outputs = command_executor.run_commands(call_strings, os.environ.copy(), capture_output=True,
+                                                        check=False)
+
+        # Store the version numbers
+        for (tool_name, module_object), std_out in zip(probed_tools, command_outputs):
+            scrub_conf_data.update({tool_name + '_version': module_object.parse_version_output(std_out)})
+
+
+def main(conf_file=None, incremental_base=None, resume=False):
     """
     This function runs all applicable tools present within the configuration file.
 
     Inputs:
         - config: Path to SCRUB configuration file [string] [optional]
             Default value: ./scrub.cfg
+        - incremental: Git revision or previous .scrub directory. Only the warnings for files that have changed since
+                       then are updated [string] [optional]
+        - resume: Continue a previous run, skipping every stage that completed with the same inputs [optional]
     """
 
     # Set the conf file to be used
@@ -48,8 +248,13 @@ def main(conf_file=None):
     execution_status = []
     scrub_path = os.path.dirname(os.path.realpath(__file__))
 
-    # Clean the previous SCRUB data from the current directory
-    do_clean.clean_directory(scrub_conf_data.get('source_dir'))
+    # Find the changed files and preserve the previous results, if necessary
+    if incremental_base:
+        incremental.initialize_incremental(scrub_conf_data, incremental_base)
+
+    # Clean the previous SCRUB data from the current directory, unless the previous run is being continued
+    if not resume:
+        do_clean.clean_directory(scrub_conf_data.get('source_dir'), True)
 
     # Initialize the SCRUB storage directory
     scrub_utilities.initialize_storage_dir(scrub_conf_data)
@@ -57,37 +262,53 @@ def main(conf_file=None):
     # Make a copy of the scrub.cfg file and add it to the log
     shutil.copyfile(scrub_conf_file, os.path.normpath(scrub_conf_data.get('scrub_analysis_dir') + '/scrub.cfg'))
 
-    try:
-        # Search for analysis modules
-        tool_modules = glob.glob(scrub_path + '/tools/*/do*.py')
-
-        # If the custom module exists, place it last
-        for module in tool_modules:
-            if module.endswith('do_custom.py'):
-                tool_modules.remove(module)
-                tool_modules.append(module)
-                break
-
-        # Add the filtering module
-        tool_modules = tool_modules + glob.glob(scrub_path + '/utils/*/do_*.py')
-
-        # Loop through every tool and perform analysis
-        for tool_module in tool_modules:
-            # Form the call string
-            module_name = 'scrub.' + re.split('\\.py', os.path.relpath(tool_module, scrub_path))[0].replace('/', '.')
-
-            # Import the module
-            module_object = importlib.import_module(module_name)
+    # Prepare the result cache
+    result_cache.initialize_result_cache(scrub_conf_data)
 
-            # Call the analysis
-            tool_status = getattr(module_object, "run_analysis")(scrub_conf_data)
+    # Find the version of every enabled tool at the same time
+    probe_tool_versions(scrub_conf_data)
 
-            # Add the status to the execution status log
-            execution_status.append([module_name, tool_status])
-
-            # Check to see if a python error has occurred
-            if tool_status == 100:
-                sys.exit(tool_status)
+    try:
+        # Run the build once for every tool that can use it
+        capture_status = checkpoints.run_stage('scrub.utils.build_capture', scrub_conf_data,
+                                               lambda: build_capture.run_analysis(scrub_conf_data), resume)
+        if capture_status != 2:
+            execution_status.append(['scrub.utils.build_capture', capture_status])
+
+        # Tools that share the build directory can not run concurrently
+        max_parallel_tools = int(scrub_conf_data.get('max_parallel_tools'))
+        if max_parallel_tools > 1 and scrub_conf_data.get('tool_workspace_mode') == 'none':
+            print('\nWARNING: MAX_PARALLEL_TOOLS requires a TOOL_WORKSPACE_MODE other than none, so that tools do not '
+                  'build in the same directory. The tools will be run one at a time.\n')
+            max_parallel_tools = 1
+
+        # Run the analysis tools in the order they were registered, without importing the disabled tools
+        registered_modules = [tool_data.get('module') for tool_data in tool_registry.get_tools()]
+        for enabled_tools, disabled_tools in tool_registry.get_tool_groups(scrub_conf_data):
+            # Initialize variables
+            module_names = [tool_data.get('module') for tool_data in enabled_tools]
+            group_status = [[tool_data.get('module'), 2] for tool_data in disabled_tools]
+
+            try:
+                # Run the analysis tools concurrently, if requested
+                if max_parallel_tools > 1 and len(module_names) > 1:
+                    run_parallel_modules(module_names, scrub_conf_data, max_parallel_tools, group_status, resume)
+                    module_names = []
+
+                # Loop through every remaining tool and perform analysis, giving each tool its own workspace if
+                # necessary
+                for module_name in module_names:
+                    run_sequential_module(module_name, scrub_conf_data, group_status,
+                                          scrub_conf_data.get('tool_workspace_mode'), resume)
+
+            finally:
+                # Add the status of every tool in the group, in the order the tools were registered
+                execution_status.extend(sorted(group_status, key=lambda status: registered_modules.index(status[0])))
+
+        # Filter the results
+        for filtering_module in glob.glob(scrub_path + '/utils/*/do_*.py'):
+            run_sequential_module(get_module_name(filtering_module, scrub_path), scrub_conf_data, execution_status,
+                                  resume=resume)
 
     finally:
         # Move the results back with the source code if necessary
@@ -126,14 +347,8 @@ def main(conf_file=None):
 
     # Loop through every tool and perform
     for target_module in target_modules:
-        # Form the call string
-        module_name = 'scrub.' + re.split('\\.py', os.path.relpath(target_module, scrub_path))[0].replace('/', '.')
-
-        # Import the module
-        module_object = importlib.import_module(module_name)
-
         # Call the analysis
-        getattr(module_object, "run_analysis")(scrub_conf_data)
+        run_module(get_module_name(target_module, scrub_path), scrub_conf_data, resume=resume)
 
     # Set the exit code
     sys.exit(tool_failure_count)
@@ -4,8 +4,8 @@ import logging
 import pwd
 import traceback
 import shutil
-import subprocess
 from scrub.utils import scrub_utilities
+from scrub.utils import command_executor
 from scrub.utils.filtering import create_file_list
 
 
@@ -41,9 +41,7 @@ def check_login(bin_dir):
         call_string = bin_dir + '/ccollab info'
 
     # Execute the command
-    proc = subprocess.Popen(call_string, shell=True, env=os.environ.copy(), stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE, encoding='utf-8')
-    std_out, std_err = proc.communicate()
+    std_out = command_executor.run_command(call_string, os.environ.copy(), capture_output=True, check=False)
 
     # Check to see if a user is logged in
     if std_out.find('Connected as:') >= 0:
@@ -54,12 +52,15 @@ def check_login(bin_dir):
     return authenticated
 
 
-def execute_ccollab(bin_dir, subcommand):
-    """This function executes a given ccollab command.
+def get_ccollab_command(bin_dir, subcommand):
+    """This function constructs the call string for a given ccollab command.
 
     Inputs:
         - bin_dir: Absolute path to the Collaborator ccollab client [string]
         - subcommand: Command string and custom flags to be executed [string]
+
+    Outputs:
+        - call_string: Command to execute in the shell [string]
     """
 
     # Construct the call string
@@ -68,8 +69,19 @@ def execute_ccollab(bin_dir, subcommand):
     else:
         call_string = bin_dir + '/ccollab --no-browser --scm none ' + subcommand
 
+    return call_string
+
+
+def execute_ccollab(bin_dir, subcommand):
+    """This function executes a given ccollab command.
+
+    Inputs:
+        - bin_dir: Absolute path to the Collaborator ccollab client [string]
+        - subcommand: Command string and custom flags to be executed [string]
+    """
+
     # Execute the command
-    scrub_utilities.execute_command(call_string, os.environ.copy())
+    scrub_utilities.execute_command(get_ccollab_command(bin_dir, subcommand), os.environ.copy())
 
 
 def get_review_id(log_file):
@@ -302,9 +314,7 @@ def initialize_upload(tool_conf_data):
 
     # Set the review xml file path
     files_xml = tool_conf_data.get('scrub_analysis_dir') + '/collaborator_review_' + str(review_id) + '_files.xml'
-    comments_xml = tool_conf_data.get('scrub_analysis_dir') + '/collaborator_review_' + str(review_id) + '_comments.xml'
     tool_conf_data.update({'collaborator_review_xml_files': files_xml})
-    tool_conf_data.update({'collaborator_review_xml_comments': comments_xml})
 
     # Set the author of the review
     subcommand = ('admin review set-participants ' + review_id + ' --participant author=' +
@@ -321,7 +331,6 @@ def perform_upload(tool_conf_data):
 
     # Initialize variables
     tool_defect_types = []
-    defect_list = []
 
     # Get a list of the source code files to be uploaded
     with open(tool_conf_data.get('collaborator_filtering_output_file'), 'r') as fh:
@@ -339,34 +348,33 @@ def perform_upload(tool_conf_data):
                     tool_name = filename[0:-6]
                     tool_defect_types.append(tool_name)
 
-    # Get the defects
-    for tool_name in tool_defect_types:
-        scrub_file = os.path.normpath(tool_conf_data.get('scrub_analysis_dir') + '/' + tool_name + '.scrub')
-
-        # Add the defects to the review
-        defect_list = defect_list + get_defects(scrub_file)
-
     # Create XML batch file for uploading files
     create_batch_xml_file_upload(tool_conf_data.get('collaborator_review_xml_files'), file_list,
                                  tool_conf_data.get('collaborator_review_id'),
                                  tool_conf_data.get('collaborator_server'), tool_conf_data.get('collaborator_username'),
                                  tool_conf_data.get('source_dir'))
 
-    # Create the XML batch file for uploading defects
-    create_batch_xml_defect_upload(tool_conf_data.get('collaborator_review_xml_comments'), file_list, defect_list,
-                                   tool_conf_data.get('collaborator_review_id'),
-                                   tool_conf_data.get('collaborator_finding_level'),
-                                   tool_conf_data.get('collaborator_server'),
-                                   tool_conf_data.get('collaborator_username'))
+    # Create an XML batch file for uploading the defects of each tool
+    comments_xml_files = []
+    for tool_name in tool_defect_types:
+        scrub_file = os.path.normpath(tool_conf_data.get('scrub_analysis_dir') + '/' + tool_name + '.scrub')
+        comments_xml_file = (tool_conf_data.get('scrub_analysis_dir') + '/collaborator_review_' +
+                             str(tool_conf_data.get('collaborator_review_id')) + '_' + tool_name + '_comments.xml')
+        create_batch_xml_defect_upload(comments_xml_file, file_list, get_defects(scrub_file),
+                                       tool_conf_data.get('collaborator_review_id'),
+                                       tool_conf_data.get('collaborator_finding_level'),
+                                       tool_conf_data.get('collaborator_server'),
+                                       tool_conf_data.get('collaborator_username'))
+        comments_xml_files.append(comments_xml_file)
 
-    # Find the xml files of interest
-    xml_files = [tool_conf_data.get('collaborator_review_xml_files'),
-                 tool_conf_data.get('collaborator_review_xml_comments')]
+    # Upload the files, which must exist before they can be commented on
+    execute_ccollab(tool_conf_data.get('collaborator_ccollab_location'),
+                    'admin batch ' + tool_conf_data.get('collaborator_review_xml_files'))
 
-    # Perform all the batch commands
-    for xml_file in xml_files:
-        subcommand = ('admin batch ' + xml_file)
-        execute_ccollab(tool_conf_data.get('collaborator_ccollab_location'), subcommand)
+    # Upload the defects of every tool at the same time
+    command_executor.run_commands([get_ccollab_command(tool_conf_data.get('collaborator_ccollab_location'),
+                                                       'admin batch ' + comments_xml_file)
+                                   for comments_xml_file in comments_xml_files], os.environ.copy())
 
 
 def create_filtering_files(tool_conf_data):
@@ -387,7 +395,11 @@ def create_filtering_files(tool_conf_data):
         # Create the output file
         create_file_list.create_file_list(tool_conf_data.get('source_dir'),
                                           tool_conf_data.get('filtering_output_file'),
-                                          tool_conf_data.get('analysis_filters'))
+                                          tool_conf_data.get('analysis_filters'), '',
+                                          int(tool_conf_data.get('filter_threads')),
+                                          tool_conf_data.get('filter_file_backend'),
+                                          tool_conf_data.get('filter_git_untracked'),
+                                          tool_conf_data.get('walk_cache_file'))
 
     # Create the file list based on filtering options
     create_file_list.create_file_list(tool_conf_data.get('source_dir'),
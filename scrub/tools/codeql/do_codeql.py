@@ -3,9 +3,9 @@ import re
 import logging
 import traceback
 import glob
-import subprocess
 from scrub.utils import translate_results
 from scrub.utils import scrub_utilities
+from scrub.utils import command_executor
 
 VALID_TAGS = ['codeql']
 
@@ -238,12 +238,29 @@ def database_analyze(codeql_path, codeql_databaseanalyze_flags):
     scrub_utilities.execute_command(call_string, os.environ.copy())
 
 
-def get_version_number(codeql_path):
-    """This function determines the CodeQL CLI version number.
+def get_version_command(codeql_path):
+    """This function constructs the command that reports the CodeQL CLI version number.
 
     Inputs:
         - codeql_path: Absolute path to the CodeQL installation of interest [string]
 
+    Outputs:
+        - call_string: Command that prints the CodeQL version information [string]
+    """
+
+    # Use the executable on the path, if necessary
+    if codeql_path == '':
+        return 'codeql --version'
+    else:
+        return codeql_path + '/codeql --version'
+
+
+def parse_version_output(std_out):
+    """This function finds the CodeQL CLI version number in the output of the version command.
+
+    Inputs:
+        - std_out: Standard output of the command from get_version_command [string]
+
     Outputs:
         - version_number: The version number of the CodeQL instance being tested [string]
     """
@@ -252,18 +269,6 @@ def get_version_number(codeql_path):
     version_number = None
 
     try:
-        # Set the path, if necessary
-        if codeql_path == '':
-            call_string = 'which codeql'
-            proc = subprocess.Popen(call_string, shell=True, env=os.environ.copy(),
-                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            codeql_path = os.path.dirname(proc.communicate()[0].strip())
-
-        # Run the CodeQL version command
-        proc = subprocess.Popen(codeql_path + '/codeql --version', shell=True, env=os.environ.copy(),
-                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
-        std_out, std_err = proc.communicate()
-
         # Get the line with the version number
         version_line = re.split('\n', std_out)[0]
 
@@ -279,6 +284,23 @@ def get_version_number(codeql_path):
     return version_number
 
 
+def get_version_number(codeql_path):
+    """This function determines the CodeQL CLI version number.
+
+    Inputs:
+        - codeql_path: Absolute path to the CodeQL installation of interest [string]
+
+    Outputs:
+        - version_number: The version number of the CodeQL instance being tested [string]
+    """
+
+    # Run the version command
+    std_out = command_executor.run_command(get_version_command(codeql_path), os.environ.copy(),
+                                           capture_output=True, check=False)
+
+    return parse_version_output(std_out)
+
+
 def run_analysis(baseline_conf_data, override=False):
     """This function starts the execution of CodeQL, which initializes the directory and configuration options then
        runs the analysis and post-analysis process.
@@ -322,7 +344,8 @@ def run_analysis(baseline_conf_data, override=False):
             logging.info('\tPerform CodeQL P10 analysis: ' + str(tool_conf_data.get('codeql_p10_analysis')))
 
             # Get the CodeQL version number
-            version_number = get_version_number(tool_conf_data.get('codeql_path'))
+            version_number = (tool_conf_data.get('codeql_version') or
+                              get_version_number(tool_conf_data.get('codeql_path')))
             logging.info('\tCodeQL Version: %s', version_number)
 
             # Perform the analysis
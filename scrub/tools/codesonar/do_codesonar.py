@@ -1,12 +1,12 @@
 import os
 import shutil
 import glob
-import subprocess
 import logging
 import traceback
 import re
 from scrub.utils import translate_results
 from scrub.utils import scrub_utilities
+from scrub.utils import command_executor
 
 VALID_TAGS = ['codesonar', 'cdsnr']
 
@@ -289,11 +289,8 @@ def get_version_number(codesonar_path):
         # Set the path, if necessary
         if codesonar_path == '':
             call_string = 'which codesonar'
-            my_env = os.environ.copy()
-            # subprocess.call(call_string, shell=True, env=my_env)
-            proc = subprocess.Popen(call_string, shell=True, env=my_env, stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE, encoding='utf-8')
-            codesonar_path = os.path.dirname(proc.communicate()[0].strip())
+            codesonar_path = os.path.dirname(command_executor.run_command(call_string, os.environ.copy(),
+                                                                          capture_output=True, check=False).strip())
 
         # import the version data
         with open(os.path.normpath(codesonar_path) + '/../../SIGNATURE.txt', 'r') as input_fh:
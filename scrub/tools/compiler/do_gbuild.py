@@ -54,9 +54,10 @@ def perform_analysis(tool_conf_data):
         logging.info('\tChanging directory: %s', tool_conf_data.get('gbuild_build_dir'))
         os.chdir(tool_conf_data.get('gbuild_build_dir'))
 
-    # Clean the previous build
-    call_string = tool_conf_data.get('gbuild_clean_cmd')
-    scrub_utilities.execute_command(call_string, os.environ.copy())
+    # Clean the previous build, unless only the changed files should be rebuilt
+    if tool_conf_data.get('incremental_changed_files') is None:
+        call_string = tool_conf_data.get('gbuild_clean_cmd')
+        scrub_utilities.execute_command(call_string, os.environ.copy())
 
     # Run the build command
     call_string = tool_conf_data.get('gbuild_build_cmd')
@@ -1,4 +1,5 @@
 import os
+import shutil
 import logging
 import traceback
 from scrub.tools.compiler import get_gcc_warnings
@@ -62,13 +63,23 @@ def perform_analysis(tool_conf_data):
         logging.info('\tChanging directory: %s', tool_conf_data.get('gcc_build_dir'))
         os.chdir(tool_conf_data.get('gcc_build_dir'))
 
-    # Clean the previous build
-    call_string = tool_conf_data.get('gcc_clean_cmd')
-    scrub_utilities.execute_command(call_string, os.environ.copy())
+    # Use the output of the shared build capture, if it exists
+    if tool_conf_data.get('gcc_capture_file'):
+        logging.info('\tUsing captured build output: %s', tool_conf_data.get('gcc_capture_file'))
+        shutil.copyfile(tool_conf_data.get('gcc_capture_file'), tool_conf_data.get('gcc_output_file'))
 
-    # Run the build command
-    call_string = tool_conf_data.get('gcc_build_cmd')
-    scrub_utilities.execute_command(call_string, os.environ.copy(), tool_conf_data.get('gcc_output_file'))
+    else:
+        # Clean the previous build, unless only the changed files should be rebuilt
+        if tool_conf_data.get('incremental_changed_files') is None:
+            call_string = tool_conf_data.get('gcc_clean_cmd')
+            scrub_utilities.execute_command(call_string, os.environ.copy())
+
+        # Run the build command, finding the warnings as the output is received
+        raw_warnings = []
+        call_string = tool_conf_data.get('gcc_build_cmd')
+        scrub_utilities.execute_command(call_string, os.environ.copy(), tool_conf_data.get('gcc_output_file'),
+                                        line_callback=lambda line: get_gcc_warnings.parse_line(line, raw_warnings))
+        tool_conf_data.update({'gcc_raw_warnings': raw_warnings})
 
     # Update the permissions of the output file
     os.chmod(tool_conf_data.get('gcc_output_file'), 438)
@@ -81,9 +92,13 @@ def post_process_analysis(tool_conf_data):
         - tool_conf_data: Dictionary of scrub.cfg input variables [dict]
     """
 
-    # Get the warnings from the log file
-    get_gcc_warnings.parse_warnings(tool_conf_data.get('gcc_output_file'),
-                                    tool_conf_data.get('compiler_raw_warning_file'))
+    # Write out the warnings that were found during the build, or get the warnings from the log file
+    if tool_conf_data.get('gcc_raw_warnings') is not None:
+        get_gcc_warnings.write_warnings(tool_conf_data.get('gcc_raw_warnings'),
+                                        tool_conf_data.get('compiler_raw_warning_file'))
+    else:
+        get_gcc_warnings.parse_warnings(tool_conf_data.get('gcc_output_file'),
+                                        tool_conf_data.get('compiler_raw_warning_file'))
 
 
 def run_analysis(baseline_conf_data, override=False):
@@ -59,13 +59,17 @@ def perform_analysis(tool_conf_data):
         logging.info('\tChanging directory: %s', tool_conf_data.get('javac_build_dir'))
         os.chdir(tool_conf_data.get('javac_build_dir'))
 
-    # Clean the previous build
-    call_string = tool_conf_data.get('javac_clean_cmd')
-    scrub_utilities.execute_command(call_string, os.environ.copy())
+    # Clean the previous build, unless only the changed files should be rebuilt
+    if tool_conf_data.get('incremental_changed_files') is None:
+        call_string = tool_conf_data.get('javac_clean_cmd')
+        scrub_utilities.execute_command(call_string, os.environ.copy())
 
-    # Run the build command
+    # Run the build command, finding the warnings as the output is received
+    raw_warnings = []
     call_string = tool_conf_data.get('javac_build_cmd')
-    scrub_utilities.execute_command(call_string, os.environ.copy(), tool_conf_data.get('javac_output_file'))
+    scrub_utilities.execute_command(call_string, os.environ.copy(), tool_conf_data.get('javac_output_file'),
+                                    line_callback=lambda line: get_javac_warnings.parse_line(line, raw_warnings))
+    tool_conf_data.update({'javac_raw_warnings': raw_warnings})
 
     # Update the permissions of the log file
     os.chmod(tool_conf_data.get('javac_output_file'), 438)
@@ -78,9 +82,13 @@ def post_process_analysis(tool_conf_data):
         - tool_conf_data: Dictionary of scrub.cfg input variables [dict]
     """
 
-    # Get the warnings from the log file
-    get_javac_warnings.parse_warnings(tool_conf_data.get('javac_output_file'),
-                                      tool_conf_data.get('compiler_raw_warning_file'))
+    # Write out the warnings that were found during the build, or get the warnings from the log file
+    if tool_conf_data.get('javac_raw_warnings') is not None:
+        get_javac_warnings.write_warnings(tool_conf_data.get('javac_raw_warnings'),
+                                          tool_conf_data.get('compiler_raw_warning_file'))
+    else:
+        get_javac_warnings.parse_warnings(tool_conf_data.get('javac_output_file'),
+                                          tool_conf_data.get('compiler_raw_warning_file'))
 
 
 def run_analysis(baseline_conf_data, override=False):
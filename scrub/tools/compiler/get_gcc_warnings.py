@@ -5,6 +5,52 @@ from scrub.utils import translate_results
 
 WARNING_LEVEL = 'Low'
 ID_PREFIX = 'gcc'
+WARNING_REPORT_INTERVAL = 100
+
+
+def parse_line(line, raw_warnings):
+    """This function parses a single line of GCC compiler output, so warnings can be found while the build runs.
+
+    Inputs:
+        - line: Line of output from the GCC build [string]
+        - raw_warnings: List of the warnings that have been found, to be updated [list of dict]
+    """
+
+    # Find lines that contain warnings
+    if 'warning:' in line.strip():
+        # Split the line and store the data, skipping warnings that do not refer to a source line
+        try:
+            line_split = re.split(':|warning', line)
+            warning_file = os.path.abspath(line_split[0].strip())
+            warning_line = int(line_split[1].strip())
+            warning_message = ['GCC Compiler Warning: ' + line_split[-1].strip()]
+        except (IndexError, ValueError):
+            logging.warning('\tSkipping unrecognized GCC compiler warning: %s', line.strip())
+            return
+        warning_id = ID_PREFIX + str(len(raw_warnings) + 1).zfill(3)
+
+        # Add to the warning dictionary
+        raw_warnings.append(translate_results.create_warning(warning_id, warning_file, warning_line,
+                                                             warning_message, ID_PREFIX, WARNING_LEVEL))
+
+        # Report the progress of long builds
+        if len(raw_warnings) % WARNING_REPORT_INTERVAL == 0:
+            logging.info('\tFound %d GCC compiler warnings...', len(raw_warnings))
+
+
+def write_warnings(raw_warnings, parsed_output_file):
+    """This function writes the GCC compiler warnings to a SCRUB output file.
+
+    Inputs:
+        - raw_warnings: List of the warnings found by parse_line [list of dict]
+        - parsed_output_file: Absolute path to the file where the parsed warnings will be stored [string]
+    """
+
+    # Print a status message
+    logging.info('\tFound %d GCC compiler warnings', len(raw_warnings))
+
+    # Create the SCRUB output file
+    translate_results.create_scrub_output_file(raw_warnings, parsed_output_file)
 
 
 def parse_warnings(raw_input_file, parsed_output_file):
@@ -16,7 +62,7 @@ def parse_warnings(raw_input_file, parsed_output_file):
     """
 
     # Initialize the variables
-    warning_count = 1
+    raw_warnings = []
 
     # Print a status message
     logging.info('')
@@ -24,28 +70,10 @@ def parse_warnings(raw_input_file, parsed_output_file):
     logging.info('\t>> Executing command: get_gcc_warnings.parse_warnings(%s, %s)', raw_input_file, parsed_output_file)
     logging.info('\t>> From directory: %s', os.getcwd())
 
-    # Read in the input data
-    with open(raw_input_file, 'r') as input_fh:
-        input_data = input_fh.readlines()
-
     # Iterate through every line of the input file
-    raw_warnings = []
-    for line in input_data:
-        # Find lines that contain warnings
-        if 'warning:' in line.strip():
-            # Split the line and store the data
-            line_split = re.split(':|warning', line)
-            warning_file = os.path.abspath(line_split[0].strip())
-            warning_line = int(line_split[1].strip())
-            warning_message = ['GCC Compiler Warning: ' + line_split[-1].strip()]
-            warning_id = ID_PREFIX + str(warning_count).zfill(3)
-
-            # Add to the warning dictionary
-            raw_warnings.append(translate_results.create_warning(warning_id, warning_file, warning_line,
-                                                                 warning_message, ID_PREFIX, WARNING_LEVEL))
-
-            # Increment the warning count
-            warning_count = warning_count + 1
+    with open(raw_input_file, 'r') as input_fh:
+        for line in input_fh:
+            parse_line(line, raw_warnings)
 
     # Create the SCRUB output file
-    translate_results.create_scrub_output_file(raw_warnings, parsed_output_file)
+    write_warnings(raw_warnings, parsed_output_file)
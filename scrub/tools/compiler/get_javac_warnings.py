@@ -5,6 +5,58 @@ from scrub.utils import translate_results
 
 WARNING_LEVEL = 'Low'
 ID_PREFIX = 'javac'
+WARNING_REPORT_INTERVAL = 100
+
+
+def parse_line(line, raw_warnings):
+    """This function parses a single line of javac compiler output, so warnings can be found while the build runs.
+
+    Inputs:
+        - line: Line of output from the javac build [string]
+        - raw_warnings: List of the warnings that have been found, to be updated [list of dict]
+    """
+
+    # Check to see if there is a warning or error
+    if (' warning: ' in line) or (' error: ' in line):
+        # Split the line and store the data, skipping warnings that do not refer to a source line
+        try:
+            # Split the line and store the file name and line
+            line_split = list(filter(None, re.split('[ :]', line.strip())))
+            warning_file = os.path.abspath(line_split[0])
+            warning_line = int(line_split[1])
+
+            # Split the line and store the message and type of warning
+            line_split = list(filter(None, re.split(':', line.strip())))
+            warning_message = ['Javac Compiler Warning: ' + line_split[-1].strip()]
+            warning_type = line_split[-2].strip()
+        except (IndexError, ValueError):
+            logging.warning('\tSkipping unrecognized javac compiler warning: %s', line.strip())
+            return
+        warning_id = ID_PREFIX + str(len(raw_warnings) + 1).zfill(3)
+
+        # Add to the warning dictionary
+        raw_warnings.append(translate_results.create_warning(warning_id, warning_file, warning_line,
+                                                             warning_message, ID_PREFIX, WARNING_LEVEL,
+                                                             warning_type))
+
+        # Report the progress of long builds
+        if len(raw_warnings) % WARNING_REPORT_INTERVAL == 0:
+            logging.info('\tFound %d javac compiler warnings...', len(raw_warnings))
+
+
+def write_warnings(raw_warnings, parsed_output_file):
+    """This function writes the javac compiler warnings to a SCRUB output file.
+
+    Inputs:
+        - raw_warnings: List of the warnings found by parse_line [list of dict]
+        - parsed_output_file: Absolute path to the file where the parsed warnings will be stored [string]
+    """
+
+    # Print a status message
+    logging.info('\tFound %d javac compiler warnings', len(raw_warnings))
+
+    # Create the output file
+    translate_results.create_scrub_output_file(raw_warnings, parsed_output_file)
 
 
 def parse_warnings(raw_input_file, parsed_output_file):
@@ -16,7 +68,7 @@ def parse_warnings(raw_input_file, parsed_output_file):
     """
 
     # Initialize variables
-    warning_count = 1
+    raw_warnings = []
 
     # Print a status message
     logging.info('')
@@ -25,33 +77,10 @@ def parse_warnings(raw_input_file, parsed_output_file):
                  parsed_output_file)
     logging.info('\t>> From directory: %s', os.getcwd())
 
-    # Import the data from the input file
-    with open(raw_input_file, 'r') as input_fh:
-        input_data = input_fh.readlines()
-
     # Iterate through every line of the input file
-    raw_warnings = []
-    for line in input_data:
-        # Check to see if there is a warning or error
-        if (' warning: ' in line) or (' error: ' in line):
-            # Split the line and store the file name and line
-            line_split = list(filter(None, re.split('[ :]', line.strip())))
-            warning_file = os.path.abspath(line_split[0])
-            warning_line = line_split[1]
-
-            # Split the line and store the message and type of warning
-            line_split = list(filter(None, re.split(':', line.strip())))
-            warning_message = ['Javac Compiler Warning: ' + line_split[-1].strip()]
-            warning_type = line_split[-2].strip()
-            warning_id = ID_PREFIX + str(warning_count).zfill(3)
-
-            # Add to the warning dictionary
-            raw_warnings.append(translate_results.create_warning(warning_id, warning_file, warning_line,
-                                                                 warning_message, ID_PREFIX, WARNING_LEVEL,
-                                                                 warning_type))
-
-            # Increment the counter
-            warning_count = warning_count + 1
+    with open(raw_input_file, 'r') as input_fh:
+        for line in input_fh:
+            parse_line(line, raw_warnings)
 
     # Create the output file
-    translate_results.create_scrub_output_file(raw_warnings, parsed_output_file)
+    write_warnings(raw_warnings, parsed_output_file)
@@ -1,11 +1,11 @@
 import os
 import shutil
-import subprocess
 import re
 import logging
 import traceback
 from scrub.tools.coverity import get_coverity_warnings
 from  scrub.utils import scrub_utilities
+from scrub.utils import command_executor
 
 VALID_TAGS = ['coverity', 'cov']
 
@@ -228,16 +228,7 @@ def cov_format_errors(bin_dir, coverity_covformaterrors_flags):
         call_string = "cov-format-errors " + coverity_covformaterrors_flags
     else:
         call_string = bin_dir + "/cov-format-errors " + coverity_covformaterrors_flags
-    my_env = os.environ.copy()
-    logging.info('')
-    logging.info('\t>> Executing command: %s', call_string)
-    logging.info('\t>> From directory: %s', os.getcwd())
-    proc = subprocess.Popen(call_string, shell=True, env=my_env,
-                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8')
-    std_out, std_err = proc.communicate()
-
-    # Write to the log file
-    logging.debug('\tConsole output:\n\n' + std_out + std_err)
+    command_executor.run_command(call_string, os.environ.copy(), check=False)
 
 
 def get_argument_value(input_string, argument):
@@ -61,9 +61,14 @@ def perform_analysis(tool_conf_data):
         logging.info('\tChanging directory: %s', tool_conf_data.get('custom_build_dir'))
         os.chdir(tool_conf_data.get('custom_build_dir'))
 
+    # Provide the list of changed files during incremental analysis
+    custom_env = os.environ.copy()
+    if tool_conf_data.get('incremental_changed_files_file'):
+        custom_env.update({'SCRUB_CHANGED_FILES': tool_conf_data.get('incremental_changed_files_file')})
+
     # Execute the custom check command
     call_string = tool_conf_data.get('custom_cmd')
-    scrub_utilities.execute_command(call_string, os.environ.copy(), tool_conf_data.get('custom_output_file'))
+    scrub_utilities.execute_command(call_string, custom_env, tool_conf_data.get('custom_output_file'))
 
 
 def post_process_analysis(tool_conf_data):
@@ -3,9 +3,9 @@ import re
 import shutil
 import logging
 import traceback
-import subprocess
 from scrub.tools.klocwork import get_klocwork_warnings
 from scrub.utils import scrub_utilities
+from scrub.utils import command_executor
 
 VALID_TAGS = ['klocwork', 'klcwrk']
 
@@ -154,33 +154,34 @@ def post_process_analysis(tool_conf_data):
                                          tool_conf_data.get('klocwork_version'))
 
 
-def get_version_number(klocwork_path):
-    """This function determines the Klocwork version number.
+def get_version_command(klocwork_path):
+    """This function constructs the command that reports the Klocwork version number.
 
     Inputs:
         - klocwork_path: Absolute path to the bin directory of the Klocwork installation [string]
 
-    Ouputs:
-        - version_number: The version number of the Klocwork instance being tested [string]
+    Outputs:
+        - call_string: Command that prints the Klocwork version information [string]
     """
 
-    try:
-        # Set the path, if necessary
-        if klocwork_path == '':
-            call_string = 'which kwinject'
-            my_env = os.environ.copy()
-            subprocess.call(call_string, shell=True, env=my_env)
-            proc = subprocess.Popen(call_string, shell=True, env=my_env, stdout=subprocess.PIPE,
-                                    stderr=subprocess.PIPE, encoding='utf-8')
-            klocwork_path = os.path.dirname(proc.communicate()[0].strip())
+    # Use the executable on the path, if necessary
+    if klocwork_path == '':
+        return 'kwinject -v'
+    else:
+        return klocwork_path + '/kwinject -v'
 
-        # Get the version number
-        call_string = klocwork_path + '/kwinject -v'
-        my_env = os.environ.copy()
-        proc = subprocess.Popen(call_string, shell=True, env=my_env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                encoding='utf-8')
-        std_out, std_err = proc.communicate()
 
+def parse_version_output(std_out):
+    """This function finds the Klocwork version number in the output of the version command.
+
+    Inputs:
+        - std_out: Standard output of the command from get_version_command [string]
+
+    Outputs:
+        - version_number: The version number of the Klocwork instance being tested [string]
+    """
+
+    try:
         # Get the version number
         version_number = re.split(' ', re.split('\n', std_out)[1])[-1]
 
@@ -195,6 +196,23 @@ def get_version_number(klocwork_path):
     return version_number
 
 
+def get_version_number(klocwork_path):
+    """This function determines the Klocwork version number.
+
+    Inputs:
+        - klocwork_path: Absolute path to the bin directory of the Klocwork installation [string]
+
+    Ouputs:
+        - version_number: The version number of the Klocwork instance being tested [string]
+    """
+
+    # Run the version command
+    std_out = command_executor.run_command(get_version_command(klocwork_path), os.environ.copy(),
+                                           capture_output=True, check=False)
+
+    return parse_version_output(std_out)
+
+
 def kwinject(bin_dir, kwinject_flags):
     """This function performs the Klocwork build capture process.
 
@@ -344,7 +362,8 @@ def run_analysis(baseline_conf_data, override=False):
             logging.info('Perform Klocwork analysis...')
 
             # Get the version number
-            version_number = get_version_number(tool_conf_data.get('klocwork_path'))
+            version_number = (tool_conf_data.get('klocwork_version') or
+                              get_version_number(tool_conf_data.get('klocwork_path')))
             logging.info('\tKlocwork Version: %s', version_number)
             tool_conf_data.update({'klocwork_version': version_number})
 
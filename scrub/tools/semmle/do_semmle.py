@@ -1,6 +1,5 @@
 import sys
 import os
-import subprocess
 import re
 import logging
 import traceback
@@ -8,6 +7,7 @@ import glob
 import shutil
 from scrub.utils import translate_results
 from scrub.utils import scrub_utilities
+from scrub.utils import command_executor
 
 VALID_TAGS = ['semmle', 'sem', 'sml']
 
@@ -429,15 +429,12 @@ def get_version_number(tool_conf_data):
         # Set the path, if necessary
         if semmle_path == '':
             call_string = 'which odasa'
-            proc = subprocess.Popen(call_string, shell=True, env=semmle_env,
-                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            semmle_path = os.path.dirname(os.path.normpath(os.path.dirname(proc.communicate()[0].strip())))
+            semmle_path = os.path.dirname(os.path.normpath(os.path.dirname(
+                command_executor.run_command(call_string, semmle_env, capture_output=True, check=False).strip())))
 
         # Run the Semmle version command
         call_string = semmle_path + '/tools/odasa selfTest'
-        proc = subprocess.Popen(call_string, shell=True, env=semmle_env, stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE, encoding='utf-8')
-        std_out, std_err = proc.communicate()
+        std_out = command_executor.run_command(call_string, semmle_env, capture_output=True, check=False)
 
         # Get the line with the version number
         version_line = re.split('\n', std_out)[0]
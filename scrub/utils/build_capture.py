@@ -0,0 +1,391 @@
+import os
+import sys
+import json
+import shlex
+import shutil
+import logging
+import traceback
+from scrub.utils import scrub_utilities
+
+SOURCE_EXTENSIONS = ('.c', '.cc', '.cp', '.cpp', '.cxx', '.c++', '.C', '.CC', '.CPP', '.CXX', '.i', '.ii', '.m', '.mm')
+FILE_FLAGS = ('-o', '-MF', '-MT', '-MQ', '-include', '-imacros')
+RECORDER_FILE = 'record_invocation.py'
+RECORDER_TEMPLATE = '''import os
+import sys
+import json
+
+# Record the compiler invocation with a single write, so that concurrent invocations do not interleave
+invocation = json.dumps({{'directory': os.getcwd(), 'arguments': sys.argv[1:]}}) + '\\n'
+output_fd = os.open({invocations_file!r}, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+try:
+    os.write(output_fd, invocation.encode('utf-8'))
+finally:
+    os.close(output_fd)
+
+# Run the real compiler
+os.execv(sys.argv[1], sys.argv[1:])
+'''
+SHIM_TEMPLATE = '''#!/bin/sh
+exec {python} {recorder} {compiler} "$@"
+'''
+
+
+def initialize_analysis(tool_conf_data):
+    """The purpose of this function is to prepare the build capture.
+
+    Inputs:
+        - tool_conf_data: Dictionary of scrub.cfg input variables [dict]
+    """
+
+    # Initialize the derived variables
+    build_capture_log_file = os.path.normpath(tool_conf_data.get('scrub_log_dir') + '/build_capture.log')
+    build_capture_analysis_dir = os.path.normpath(tool_conf_data.get('scrub_working_dir') + '/build_capture')
+    build_capture_shim_dir = os.path.normpath(build_capture_analysis_dir + '/bin')
+    build_capture_output_file = os.path.normpath(build_capture_analysis_dir + '/build.log')
+    build_capture_invocations_file = os.path.normpath(build_capture_analysis_dir + '/compiler_invocations.log')
+    build_capture_database_file = os.path.normpath(build_capture_analysis_dir + '/compile_commands.json')
+    build_capture_replay_file = os.path.normpath(build_capture_analysis_dir + '/replay.sh')
+
+    # Add derived values to the dictionary
+    tool_conf_data.update({'build_capture_log_file': build_capture_log_file})
+    tool_conf_data.update({'build_capture_analysis_dir': build_capture_analysis_dir})
+    tool_conf_data.update({'build_capture_shim_dir': build_capture_shim_dir})
+    tool_conf_data.update({'build_capture_output_file': build_capture_output_file})
+    tool_conf_data.update({'build_capture_invocations_file': build_capture_invocations_file})
+    tool_conf_data.update({'build_capture_database_file': build_capture_database_file})
+    tool_conf_data.update({'build_capture_replay_file': build_capture_replay_file})
+
+    # Make the compilation directory absolute
+    if tool_conf_data.get('build_capture_build_dir') == '':
+        tool_conf_data.update({'build_capture_build_dir': tool_conf_data.get('source_dir')})
+    elif not tool_conf_data.get('build_capture_build_dir').startswith(tool_conf_data.get('source_dir')):
+        tool_conf_data.update({'build_capture_build_dir':
+                               os.path.abspath(tool_conf_data.get('source_dir') + '/' +
+                                               tool_conf_data.get('build_capture_build_dir'))})
+
+    # Check to make sure the language is C
+    if tool_conf_data.get('source_lang').lower() != 'c':
+        tool_conf_data.update({'build_capture': False})
+
+    # Make sure all the needed variables are present
+    if not (tool_conf_data.get('build_capture_build_cmd') and tool_conf_data.get('build_capture_clean_cmd')):
+        # Update the analysis flag if necessary
+        if tool_conf_data.get('build_capture'):
+            tool_conf_data.update({'build_capture': False})
+
+            # Print a status message
+            print('\nWARNING: Unable to perform build capture. Required configuration inputs are missing.\n')
+
+
+def create_compiler_shims(shim_dir, compilers, invocations_file):
+    """This function creates wrappers that record each compiler invocation before running the real compiler.
+
+    Inputs:
+        - shim_dir: Absolute path to the directory where the wrappers will be created [string]
+        - compilers: List of compiler executable names to be wrapped [list of strings]
+        - invocations_file: Absolute path to the file where the compiler invocations will be recorded [string]
+    """
+
+    # Create the shim directory
+    if not os.path.exists(shim_dir):
+        os.makedirs(shim_dir)
+
+    # Create the script that records the invocations
+    recorder_file = os.path.join(shim_dir, RECORDER_FILE)
+    with open(recorder_file, 'w') as output_fh:
+        output_fh.write(RECORDER_TEMPLATE.format(invocations_file=invocations_file))
+
+    # Create a wrapper for every compiler that can be found, calling the interpreter explicitly
+    for compiler in compilers:
+        compiler_path = shutil.which(compiler)
+        if compiler_path is None:
+            continue
+
+        with open(os.path.join(shim_dir, compiler), 'w') as output_fh:
+            output_fh.write(SHIM_TEMPLATE.format(python=shlex.quote(sys.executable),
+                                                 recorder=shlex.quote(recorder_file),
+                                                 compiler=shlex.quote(os.path.abspath(compiler_path))))
+        os.chmod(os.path.join(shim_dir, compiler), 493)
+
+
+def perform_analysis(tool_conf_data):
+    """This function runs the build with every compiler invocation being recorded.
+
+    Inputs:
+        - tool_conf_data: Dictionary of scrub.cfg input variables [dict]
+    """
+
+    # Change directory if necessary
+    if tool_conf_data.get('build_capture_build_dir') != os.getcwd():
+        # Navigate to the compilation directory
+        logging.info('\tChanging directory: %s', tool_conf_data.get('build_capture_build_dir'))
+        os.chdir(tool_conf_data.get('build_capture_build_dir'))
+
+    # Clean the previous build
+    call_string = tool_conf_data.get('build_capture_clean_cmd')
+    scrub_utilities.execute_command(call_string, os.environ.copy())
+
+    # Remove any invocations recorded by a previous capture
+    if os.path.exists(tool_conf_data.get('build_capture_invocations_file')):
+        os.remove(tool_conf_data.get('build_capture_invocations_file'))
+
+    # Create the compiler wrappers
+    create_compiler_shims(tool_conf_data.get('build_capture_shim_dir'),
+                          list(filter(None, [compiler.strip() for compiler in
+                                             tool_conf_data.get('build_capture_compilers').split(',')])),
+                          tool_conf_data.get('build_capture_invocations_file'))
+
+    # Run the build command with the wrappers at the front of the path
+    build_env = os.environ.copy()
+    build_env.update({'PATH': tool_conf_data.get('build_capture_shim_dir') + os.pathsep + build_env.get('PATH', '')})
+    call_string = tool_conf_data.get('build_capture_build_cmd')
+    scrub_utilities.execute_command(call_string, build_env, tool_conf_data.get('build_capture_output_file'))
+
+    # Update the permissions of the output file
+    os.chmod(tool_conf_data.get('build_capture_output_file'), 438)
+
+
+def get_source_files(arguments, directory):
+    """This function finds the source files being compiled by a compiler invocation.
+
+    Inputs:
+        - arguments: List of compiler arguments, starting with the compiler [list of strings]
+        - directory: Absolute path to the directory where the compiler was run [string]
+
+    Outputs:
+        - source_files: List of absolute paths to each source file being compiled [list of strings]
+    """
+
+    # Initialize variables
+    source_files = []
+
+    # Preprocessing and dependency generation do not compile anything
+    if '-E' in arguments or '-M' in arguments or '-MM' in arguments:
+        return source_files
+
+    # Find the source files, skipping the values of flags that name other files
+    for i in range(1, len(arguments)):
+        if arguments[i - 1] in FILE_FLAGS:
+            continue
+        if arguments[i].endswith(SOURCE_EXTENSIONS) and not arguments[i].startswith('-'):
+            source_files.append(os.path.normpath(os.path.join(directory, arguments[i])))
+
+    return source_files
+
+
+def create_compilation_database(invocations_file, database_file):
+    """This function converts the recorded compiler invocations into a compilation database.
+
+    Inputs:
+        - invocations_file: Absolute path to the file containing the recorded compiler invocations [string]
+        - database_file: Absolute path to the compile_commands.json file to be created [string]
+
+    Outputs:
+        - compilations: List of unique compiler invocations that compile at least one source file [list of dict]
+        - database_file: JSON compilation database
+    """
+
+    # Initialize variables
+    compilations = []
+    compile_commands = []
+    seen_invocations = set()
+
+    # Import the compiler invocations
+    if os.path.isfile(invocations_file):
+        with open(invocations_file, 'r') as input_fh:
+            for line in input_fh:
+                # Skip invocations that were not completely recorded
+                try:
+                    invocation = json.loads(line)
+                    invocation_key = (invocation['directory'], tuple(invocation['arguments']))
+                except (ValueError, KeyError, TypeError):
+                    logging.warning('\tSkipping incomplete compiler invocation: %s', line.strip())
+                    continue
+
+                # Skip repeated invocations and those that do not compile anything
+                source_files = get_source_files(invocation['arguments'], invocation['directory'])
+                if invocation_key in seen_invocations or not source_files:
+                    continue
+                seen_invocations.add(invocation_key)
+                compilations.append(invocation)
+
+                # Add an entry for every source file
+                for source_file in source_files:
+                    compile_commands.append({'directory': invocation['directory'],
+                                             'arguments': invocation['arguments'],
+                                             'file': source_file})
+
+    # Write out the compilation database
+    with open(database_file, 'w') as output_fh:
+        json.dump(compile_commands, output_fh, indent=2)
+
+    # Update the permissions of the output file
+    os.chmod(database_file, 438)
+
+    return compilations
+
+
+def create_replay_script(compilations, build_dir, replay_file):
+    """This function creates a script that repeats every compiler invocation without running the build system.
+
+    Inputs:
+        - compilations: List of compiler invocations from create_compilation_database [list of dict]
+        - build_dir: Absolute path to the directory where the build was run [string]
+        - replay_file: Absolute path to the replay script to be created [string]
+
+    Outputs:
+        - replay_file: Shell script that must be run from build_dir, or from a copy of it
+    """
+
+    # Write out the script
+    with open(replay_file, 'w') as output_fh:
+        output_fh.write('#!/bin/sh\n')
+        output_fh.write('set -e\n')
+        output_fh.write('SCRUB_REPLAY_ROOT="$(pwd)"\n')
+        for compilation in compilations:
+            # Run each compiler from the same location, relative to the build directory
+            directory = compilation['directory']
+            if directory == build_dir or directory.startswith(build_dir + '/'):
+                directory = '"$SCRUB_REPLAY_ROOT"/' + shlex.quote(os.path.relpath(directory, build_dir))
+            else:
+                directory = shlex.quote(directory)
+            output_fh.write('cd %s && %s\n' % (directory, ' '.join(shlex.quote(argument)
+                                                                  for argument in compilation['arguments'])))
+
+    # Update the permissions of the output file
+    os.chmod(replay_file, 493)
+
+
+def post_process_analysis(tool_conf_data):
+    """This function creates the compilation database and replay script from the recorded invocations.
+
+    Inputs:
+        - tool_conf_data: Dictionary of scrub.cfg input variables [dict]
+    """
+
+    # Create the compilation database
+    compilations = create_compilation_database(tool_conf_data.get('build_capture_invocations_file'),
+                                               tool_conf_data.get('build_capture_database_file'))
+
+    # Make sure the build was captured
+    if not compilations:
+        logging.warning('\tNo compiler invocations were captured.')
+        raise UserWarning
+
+    # Create the replay script
+    create_replay_script(compilations, tool_conf_data.get('build_capture_build_dir'),
+                         tool_conf_data.get('build_capture_replay_file'))
+
+    # Print a status message
+    logging.info('\tCaptured %d compiler invocations', len(compilations))
+
+
+def apply_build_capture(scrub_conf_data, tool_conf_data):
+    """This function updates the configuration of each tool that should use the captured build.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of values read from configuration file, to be updated [dict]
+        - tool_conf_data: Dictionary of build capture configuration values [dict]
+    """
+
+    # Add the captured build outputs
+    for key in ['build_capture_output_file', 'build_capture_database_file', 'build_capture_replay_file']:
+        scrub_conf_data.update({key: tool_conf_data.get(key)})
+
+    # Initialize variables
+    capture_tools = list(filter(None, [tool.strip().lower() for tool in
+                                       tool_conf_data.get('build_capture_tools').split(',')]))
+    replay_cmd = 'sh ' + shlex.quote(tool_conf_data.get('build_capture_replay_file'))
+
+    # Replace the build of every tool with the replay script
+    for tool in capture_tools:
+        scrub_conf_data.update({tool + '_build_dir': tool_conf_data.get('build_capture_build_dir')})
+        scrub_conf_data.update({tool + '_clean_cmd': 'true'})
+        scrub_conf_data.update({tool + '_build_cmd': replay_cmd})
+
+    # GCC can use the build output directly
+    if 'gcc' in capture_tools:
+        scrub_conf_data.update({'gcc_capture_file': tool_conf_data.get('build_capture_output_file')})
+
+
+def run_analysis(scrub_conf_data, override=False):
+    """This function runs the build once so the results can be shared by several tools.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of scrub.cfg configuration parameters, updated if the capture succeeds [dict]
+        - override: Force the build capture? [optional] [bool]
+
+    Outputs:
+        - build_capture/build.log: Console output from the captured build
+        - build_capture/compile_commands.json: Compilation database for the captured build
+        - build_capture/replay.sh: Script that repeats every captured compiler invocation
+        - log_files/build_capture.log: SCRUB log file for the build capture
+    """
+
+    # Import the config data
+    tool_conf_data = scrub_conf_data.copy()
+    initialize_analysis(tool_conf_data)
+
+    # Initialize variables
+    build_capture_exit_code = 2
+    initial_dir = os.getcwd()
+    attempt_analysis = tool_conf_data.get('build_capture') or override
+
+    if attempt_analysis:
+        try:
+            # Create the analysis directory if it doesn't exist
+            if not os.path.exists(tool_conf_data.get('build_capture_analysis_dir')):
+                os.mkdir(tool_conf_data.get('build_capture_analysis_dir'))
+
+            # Create the logger
+            scrub_utilities.create_logger(tool_conf_data.get('build_capture_log_file'))
+
+            # Print a status message
+            logging.info('')
+            logging.info('Perform build capture...')
+
+            # Capture the build
+            perform_analysis(tool_conf_data)
+
+            # Post-process the build
+            post_process_analysis(tool_conf_data)
+
+            # Share the build with the other tools
+            apply_build_capture(scrub_conf_data, tool_conf_data)
+
+            # Set the exit code
+            build_capture_exit_code = 0
+
+        except (scrub_utilities.CommandExecutionError, UserWarning):
+            # Print a warning message
+            logging.warning('Build capture could not be performed. Each tool will perform its own build. Please see '
+                            'log file {} for more information.'.format(tool_conf_data.get('build_capture_log_file')))
+
+            # Print the exception traceback
+            logging.warning(traceback.format_exc())
+
+            # Set the exit code
+            build_capture_exit_code = 1
+
+        except:     # lgtm [py/catch-base-exception]
+            # Print a warning message
+            logging.error('A SCRUB error has occurred. Please see log file {} for more '
+                          'information.'.format(tool_conf_data.get('build_capture_log_file')))
+
+            # Print the exception traceback
+            logging.error(traceback.format_exc())
+
+            # Set the exit code
+            build_capture_exit_code = 100
+
+        finally:
+            # Change back to the initial dir if necessary
+            if os.getcwd() != initial_dir:
+                logging.info('\tChanging directory: %s', initial_dir)
+                os.chdir(initial_dir)
+
+            # Close the loggers
+            logging.getLogger().handlers = []
+
+    # Return the exit code
+    return build_capture_exit_code
@@ -0,0 +1,254 @@
+import os
+import re
+import glob
+import json
+import hashlib
+import scrub
+from scrub.utils import result_cache
+from scrub.utils import tool_registry
+
+CHECKPOINT_VERSION = 1
+FILTERING_KEYS = ('filter_', 'enable_', 'distribution_mode', 'custom_filter_cmd', 'analysis_filters', 'query_filters')
+COMMON_KEYS = ('source_dir', 'source_lang', 'incremental_changed_files', 'result_cache_source_hash')
+
+
+def get_stage_files(stage_name, scrub_conf_data):
+    """This function finds the configuration values, input files, and output files of a run-all stage.
+
+    Inputs:
+        - stage_name: Module name of the stage, such as scrub.tools.compiler.do_gcc [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+
+    Outputs:
+        - conf_keys: Configuration values used by the stage [list of strings]
+        - input_files: Absolute paths to the files read by the stage [list of strings]
+        - output_files: Absolute paths to the files created by the stage [list of strings]
+    """
+
+    # Initialize variables
+    analysis_dir = scrub_conf_data.get('scrub_analysis_dir')
+    filtered_files = glob.glob(analysis_dir + '/*.scrub')
+    tool_data = tool_registry.find_tool(stage_name)
+    input_files = []
+    output_files = []
+
+    if tool_data is not None:
+        # Analysis tools create their raw results
+        tool_name = tool_data.get('name')
+        conf_keys = [key for key in scrub_conf_data if key.startswith(tool_name + '_')]
+        output_files = glob.glob(scrub_conf_data.get('raw_results_dir') + '/' + tool_name + '_*')
+
+    elif stage_name == 'scrub.utils.build_capture':
+        # The build capture creates the build output and replay script
+        conf_keys = [key for key in scrub_conf_data if key.startswith('build_capture')]
+        output_files = glob.glob(scrub_conf_data.get('scrub_working_dir') + '/build_capture/*.*')
+
+    elif stage_name.startswith('scrub.utils.'):
+        # Filtering reads the raw results and creates the filtered results
+        conf_keys = [key for key in scrub_conf_data if key.startswith(FILTERING_KEYS)]
+        input_files = glob.glob(scrub_conf_data.get('raw_results_dir') + '/*.scrub')
+        for filtering_file in [scrub_conf_data.get('analysis_filters'), scrub_conf_data.get('query_filters')]:
+            if filtering_file and os.path.isfile(filtering_file):
+                input_files.append(filtering_file)
+        output_files = filtered_files + glob.glob(scrub_conf_data.get('sarif_results_dir') + '/*.sarif')
+
+    else:
+        # Targets read the filtered results
+        target_name = re.sub('^do_', '', stage_name.split('.')[-1])
+        conf_keys = [key for key in scrub_conf_data if key.startswith(target_name + '_')]
+        input_files = filtered_files
+
+    return sorted(conf_keys + list(COMMON_KEYS)), sorted(input_files), sorted(output_files)
+
+
+def get_source_state(stage_name, scrub_conf_data):
+    """This function gets the current modification time and size of every file in the suppression index, so that
+    edited suppression comments are detected when the source tree has not been hashed. The index is only complete
+    once filtering has run, so the state is recorded after the stage completes.
+
+    Inputs:
+        - stage_name: Module name of the stage [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+
+    Outputs:
+        - source_state: Dictionary mapping each indexed file to its modification time and size, or None if the file
+                        is missing [dict]
+    """
+
+    # Initialize variables
+    source_state = {}
+
+    # Only filtering reads the source files, which are covered by result_cache_source_hash when it is available
+    if (not stage_name.startswith('scrub.utils.') or stage_name == 'scrub.utils.build_capture' or
+            scrub_conf_data.get('result_cache_source_hash')):
+        return source_state
+
+    # Import the list of indexed files
+    try:
+        with open(scrub_conf_data.get('suppression_index_file'), 'r') as input_fh:
+            indexed_files = json.load(input_fh).get('files', {})
+    except (OSError, TypeError, ValueError):
+        return source_state
+
+    # Get the current state of each file
+    for source_file in indexed_files:
+        try:
+            file_stat = os.stat(source_file)
+            source_state[source_file] = [file_stat.st_mtime_ns, file_stat.st_size]
+        except OSError:
+            source_state[source_file] = None
+
+    return source_state
+
+
+def get_input_hash(stage_name, scrub_conf_data):
+    """This function calculates a hash of every input to a run-all stage.
+
+    Inputs:
+        - stage_name: Module name of the stage [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+
+    Outputs:
+        - input_hash: SHA-256 hash of the configuration values and input files used by the stage [string]
+    """
+
+    # Find the inputs
+    conf_keys, input_files, _ = get_stage_files(stage_name, scrub_conf_data)
+
+    # Assemble the input data
+    input_data = {'version': CHECKPOINT_VERSION,
+                  'scrub_version': scrub.__version__,
+                  'stage': stage_name,
+                  'conf': {key: scrub_conf_data.get(key) for key in conf_keys},
+                  'files': {input_file: result_cache.hash_file(input_file) for input_file in input_files}}
+    return hashlib.sha256(json.dumps(input_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def get_checkpoint_file(stage_name, scrub_conf_data):
+    """This function finds the checkpoint file for a run-all stage.
+
+    Inputs:
+        - stage_name: Module name of the stage [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+
+    Outputs:
+        - checkpoint_file: Absolute path to the checkpoint file [string]
+    """
+
+    return os.path.normpath(scrub_conf_data.get('checkpoint_dir') + '/' + stage_name + '.json')
+
+
+def write_checkpoint(stage_name, scrub_conf_data, input_hash, conf_updates=None):
+    """This function records that a run-all stage has completed successfully.
+
+    Inputs:
+        - stage_name: Module name of the stage [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - input_hash: Hash of the stage inputs, calculated before the stage was run [string]
+        - conf_updates: Configuration values updated by the stage, restored when it is skipped [dict] [optional]
+    """
+
+    # Initialize variables
+    checkpoint_file = get_checkpoint_file(stage_name, scrub_conf_data)
+    _, _, output_files = get_stage_files(stage_name, scrub_conf_data)
+
+    # Create the checkpoint directory if it doesn't exist
+    if not os.path.exists(os.path.dirname(checkpoint_file)):
+        os.makedirs(os.path.dirname(checkpoint_file), exist_ok=True)
+
+    # Write out the checkpoint, replacing the previous checkpoint in a single step
+    with open(checkpoint_file + '.tmp', 'w') as output_fh:
+        json.dump({'version': CHECKPOINT_VERSION,
+                   'stage': stage_name,
+                   'input_hash': input_hash,
+                   'outputs': {output_file: result_cache.hash_file(output_file) for output_file in output_files},
+                   'sources': get_source_state(stage_name, scrub_conf_data),
+                   'conf_updates': conf_updates or {}}, output_fh, indent=2, default=str)
+    os.replace(checkpoint_file + '.tmp', checkpoint_file)
+
+
+def remove_checkpoint(stage_name, scrub_conf_data):
+    """This function removes the checkpoint for a run-all stage that is about to be run again.
+
+    Inputs:
+        - stage_name: Module name of the stage [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+    """
+
+    # Remove the file
+    checkpoint_file = get_checkpoint_file(stage_name, scrub_conf_data)
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+
+def read_checkpoint(stage_name, scrub_conf_data, input_hash):
+    """This function checks to see if a run-all stage can be skipped because it completed during a previous run.
+
+    Inputs:
+        - stage_name: Module name of the stage [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - input_hash: Hash of the current stage inputs from get_input_hash [string]
+
+    Outputs:
+        - checkpoint_data: Checkpoint data, or None if the stage must be run again [dict]
+    """
+
+    # Import the checkpoint
+    try:
+        with open(get_checkpoint_file(stage_name, scrub_conf_data), 'r') as input_fh:
+            checkpoint_data = json.load(input_fh)
+    except (OSError, ValueError):
+        return None
+
+    # Make sure the inputs have not changed
+    if checkpoint_data.get('version') != CHECKPOINT_VERSION or checkpoint_data.get('input_hash') != input_hash:
+        return None
+
+    # Make sure the source files that the stage read have not been modified
+    if checkpoint_data.get('sources', {}) != get_source_state(stage_name, scrub_conf_data):
+        return None
+
+    # Make sure every output is still present and unmodified
+    for output_file, output_hash in checkpoint_data.get('outputs', {}).items():
+        if not os.path.isfile(output_file) or result_cache.hash_file(output_file) != output_hash:
+            return None
+
+    return checkpoint_data
+
+
+def run_stage(stage_name, scrub_conf_data, run_function, resume=False):
+    """This function runs a run-all stage and records a checkpoint, skipping stages that have already completed.
+
+    Inputs:
+        - stage_name: Module name of the stage [string]
+        - scrub_conf_data: Dictionary of values read from configuration file, which the stage may update [dict]
+        - run_function: Function that runs the stage and returns the exit code [function]
+        - resume: Skip the stage if it completed during a previous run with the same inputs? [bool] [optional]
+
+    Outputs:
+        - stage_status: Exit code returned by the stage, or 0 if the stage was skipped [int]
+    """
+
+    # Calculate the hash of the inputs before the stage can change them
+    input_hash = get_input_hash(stage_name, scrub_conf_data)
+
+    # Skip the stage if possible, restoring any configuration values it updated
+    if resume:
+        checkpoint_data = read_checkpoint(stage_name, scrub_conf_data, input_hash)
+        if checkpoint_data is not None:
+            scrub_conf_data.update(checkpoint_data.get('conf_updates'))
+            print('\n%s completed during a previous run and will not be run again.\n' % stage_name)
+            return 0
+
+    # Run the stage
+    remove_checkpoint(stage_name, scrub_conf_data)
+    baseline_conf_data = scrub_conf_data.copy()
+    stage_status = run_function()
+
+    # Record the checkpoint
+    if stage_status == 0:
+        write_checkpoint(stage_name, scrub_conf_data, input_hash,
+                         {key: value for key, value in scrub_conf_data.items()
+                          if key not in baseline_conf_data or baseline_conf_data.get(key) != value})
+
+    return stage_status
@@ -0,0 +1,213 @@
+import os
+import sys
+import asyncio
+import logging
+import subprocess
+import collections
+from scrub.utils import scrub_utilities
+
+MAX_CONCURRENT_COMMANDS = 8
+OUTPUT_LINE_LIMIT = 2 ** 24
+
+
+async def read_output(proc, output_fh, output_tail, captured_output, line_callback=None):
+    """This function logs the output of a command as it is received and waits for the command to finish.
+
+    Inputs:
+        - proc: Process started by run_command_async [asyncio.subprocess.Process]
+        - output_fh: File handle used to store the output, or None if the output is not stored [file]
+        - output_tail: Last few lines of the output, to be updated [collections.deque]
+        - captured_output: List of every output line, to be updated, or None if the output is not needed [list]
+        - line_callback: Function called with each line of output as it is received [function] [optional]
+
+    Outputs:
+        - return_code: Exit code of the command [int]
+    """
+
+    # Write each line to the logging file and the output file
+    while True:
+        stdout_line = await proc.stdout.readline()
+        if not stdout_line:
+            break
+        stdout_line = stdout_line.decode('utf-8', errors='replace')
+        logging.debug('\t\t%s', stdout_line.replace('\n', ''))
+        if output_fh is not None:
+            output_fh.write(stdout_line)
+        output_tail.append(stdout_line)
+        if captured_output is not None:
+            captured_output.append(stdout_line)
+        if line_callback is not None:
+            line_callback(stdout_line)
+
+    return await proc.wait()
+
+
+async def run_command_async(call_string, my_env, semaphore, output_file=None, timeout=None, capture_output=False,
+                            check=True, line_callback=None):
+    """This function executes a command string once a slot is available, logging the results like execute_command.
+
+    Inputs:
+        - call_string: Command to execute in the shell [string]
+        - my_env: Environment to use during execution [dict]
+        - semaphore: Semaphore that limits the number of commands running at the same time [asyncio.Semaphore]
+        - output_file: Absolute path to output file for storing results [string] [optional]
+        - timeout: Number of seconds to wait before the command is stopped [float] [optional]
+        - capture_output: Return the standard output, without the standard error? [bool] [optional]
+        - check: Raise CommandExecutionError if the command fails? [bool] [optional]
+        - line_callback: Function called with each line of output as it is received [function] [optional]
+
+    Outputs:
+        - command_output: Standard output of the command, if capture_output is True [string]
+    """
+
+    # Initialize variables
+    output_tail = collections.deque(maxlen=scrub_utilities.OUTPUT_TAIL_LINES)
+    captured_output = [] if capture_output else None
+
+    async with semaphore:
+        # Write out a logging message
+        logging.info('')
+        logging.info('\t>> Executing command: %s', call_string)
+        logging.info('\t>> From directory: %s', os.getcwd())
+        logging.debug('\tConsole output:')
+
+        # Execute the call string in its own process group, so every process it starts can be stopped
+        proc = await asyncio.create_subprocess_shell(call_string, env=my_env, stdout=subprocess.PIPE,
+                                                     stderr=subprocess.DEVNULL if capture_output else subprocess.STDOUT,
+                                                     start_new_session=True, limit=OUTPUT_LINE_LIMIT)
+
+        output_fh = None
+        try:
+            # Open the output file, if one was requested
+            if output_file is not None:
+                output_fh = open(output_file, 'w')
+
+            return_code = await asyncio.wait_for(read_output(proc, output_fh, output_tail, captured_output,
+                                                             line_callback), timeout)
+
+        except asyncio.TimeoutError:
+            # Stop the command
+            scrub_utilities.stop_process(proc)
+            await proc.wait()
+            raise scrub_utilities.CommandExecutionError('Command did not complete within %s seconds: %s\n%s' %
+                                                        (timeout, call_string, ''.join(output_tail)))
+
+        except BaseException:
+            # Stop the command before the cancellation or error is passed on
+            scrub_utilities.stop_process(proc)
+            await proc.wait()
+            raise
+
+        finally:
+            # Close the output file
+            if output_fh is not None:
+                output_fh.close()
+
+    # Throw an exception if necessary
+    if check and return_code > 0:
+        raise scrub_utilities.CommandExecutionError('Command exited with code %d: %s\n%s' %
+                                                    (return_code, call_string, ''.join(output_tail)))
+
+    if capture_output:
+        return ''.join(captured_output)
+
+
+async def gather_commands(call_strings, my_env, max_concurrent, timeout, capture_output, check, output_files,
+                          line_callback):
+    """This function runs a list of commands concurrently, cancelling the remaining commands if any of them fail.
+
+    Inputs:
+        - call_strings: Commands to execute in the shell [list of strings]
+        - my_env: Environment to use during execution [dict]
+        - max_concurrent: Maximum number of commands to run at the same time [int]
+        - timeout: Number of seconds to wait before each command is stopped [float]
+        - capture_output: Return the standard output of each command? [bool]
+        - check: Raise CommandExecutionError if any command fails? [bool]
+        - output_files: Absolute path to the output file for each command, or None [list of strings]
+        - line_callback: Function called with each line of output from every command, or None [function]
+
+    Outputs:
+        - command_outputs: Standard output of each command, if capture_output is True [list of strings]
+    """
+
+    # Initialize variables
+    semaphore = asyncio.Semaphore(max_concurrent)
+    command_tasks = [asyncio.ensure_future(run_command_async(call_string, my_env, semaphore, output_file, timeout,
+                                                             capture_output, check, line_callback))
+                     for call_string, output_file in zip(call_strings, output_files)]
+
+    try:
+        return await asyncio.gather(*command_tasks)
+
+    finally:
+        # Stop the commands that are still running and wait for them to exit
+        for command_task in command_tasks:
+            command_task.cancel()
+        await asyncio.gather(*command_tasks, return_exceptions=True)
+
+
+def run_commands(call_strings, my_env, max_concurrent=None, timeout=None, capture_output=False, check=True,
+                 output_files=None, line_callback=None):
+    """This function executes independent command strings concurrently and captures the results.
+
+    Inputs:
+        - call_strings: Commands to execute in the shell [list of strings]
+        - my_env: Environment to use during execution [dict]
+        - max_concurrent: Maximum number of commands to run at the same time [int] [optional]
+        - timeout: Number of seconds to wait before each command is stopped [float] [optional]
+        - capture_output: Return the standard output of each command, without the standard error? [bool] [optional]
+        - check: Raise CommandExecutionError if any command fails? [bool] [optional]
+        - output_files: Absolute path to the output file for each command [list of strings] [optional]
+        - line_callback: Function called with each line of output from every command as it is received
+                         [function] [optional]
+
+    Outputs:
+        - command_outputs: Standard output of each command, if capture_output is True [list of strings]
+    """
+
+    # Initialize variables
+    if max_concurrent is None:
+        max_concurrent = MAX_CONCURRENT_COMMANDS
+    if output_files is None:
+        output_files = [None] * len(call_strings)
+
+    # Run the commands, stopping every command if SCRUB is interrupted
+    commands = gather_commands(call_strings, my_env, max(int(max_concurrent), 1), timeout, capture_output, check,
+                               output_files, line_callback)
+    if sys.version_info >= (3, 7):
+        return asyncio.run(commands)
+
+    # Python 3.6 does not provide asyncio.run, so create the event loop here
+    loop = asyncio.new_event_loop()
+    asyncio.get_child_watcher().attach_loop(loop)
+    commands_task = loop.create_task(commands)
+    try:
+        return loop.run_until_complete(commands_task)
+
+    except BaseException:
+        commands_task.cancel()
+        loop.run_until_complete(asyncio.gather(commands_task, return_exceptions=True))
+        raise
+
+    finally:
+        loop.close()
+
+
+def run_command(call_string, my_env, output_file=None, timeout=None, capture_output=False, check=True,
+                line_callback=None):
+    """This function executes a single command string using the command executor and captures the results.
+
+    Inputs:
+        - call_string: Command to execute in the shell [string]
+        - my_env: Environment to use during execution [dict]
+        - output_file: Absolute path to output file for storing results [string] [optional]
+        - timeout: Number of seconds to wait before the command is stopped [float] [optional]
+        - capture_output: Return the standard output, without the standard error? [bool] [optional]
+        - check: Raise CommandExecutionError if the command fails? [bool] [optional]
+        - line_callback: Function called with each line of output as it is received [function] [optional]
+
+    Outputs:
+        - command_output: Standard output of the command, if capture_output is True [string]
+    """
+
+    return run_commands([call_string], my_env, 1, timeout, capture_output, check, [output_file], line_callback)[0]
@@ -1,14 +1,92 @@
 import os
+import json
 import shutil
+import logging
+from concurrent import futures
 
+MANIFEST_VERSION = 1
 
-def clean_subdirs(root_dir):
-    """This function cleans all sub-directories under the specified root directory.
+
+def get_manifest_file(root_dir):
+    """This function gets the location of the distribution manifest for a source directory.
+
+    Inputs:
+        - root_dir: Absolute path to the root directory of interest [string]
+
+    Outputs:
+        - manifest_file: Absolute path to the distribution manifest file [string]
+    """
+
+    return os.path.normpath(root_dir + '/.scrub/cache/SCRUBDistributionManifest')
+
+
+def read_distribution_manifest(manifest_file):
+    """This function imports the list of distributed .scrub directories from the distribution manifest.
+
+    Inputs:
+        - manifest_file: Absolute path to the distribution manifest file [string]
+
+    Outputs:
+        - scrub_dirs: List of .scrub directories relative to the root directory, or None if the manifest is missing,
+                      stale, or unreadable [list of strings]
+    """
+
+    # Initialize variables
+    scrub_dirs = None
+
+    # Import the data
+    if os.path.isfile(manifest_file):
+        try:
+            with open(manifest_file, 'r') as input_fh:
+                manifest_data = json.load(input_fh)
+
+            # Only use manifests from a distribution that ran to completion
+            if manifest_data.get('version') == MANIFEST_VERSION and manifest_data.get('complete'):
+                scrub_dirs = manifest_data.get('dirs', [])
+
+        except ValueError:
+            logging.warning('\tDistribution manifest %s could not be read.', manifest_file)
+
+    return scrub_dirs
+
+
+def write_distribution_manifest(manifest_file, scrub_dirs, complete=True):
+    """This function records the distributed .scrub directories so they can be removed without searching the tree.
+
+    Inputs:
+        - manifest_file: Absolute path to the distribution manifest file [string]
+        - scrub_dirs: List of .scrub directories relative to the root directory [list of strings]
+        - complete: Has distribution finished? Incomplete manifests are treated as stale [bool] [optional]
+
+    Outputs:
+        - manifest_file: The manifest is written to manifest_file
+    """
+
+    # Create the cache directory if it doesn't already exist
+    if not os.path.exists(os.path.dirname(manifest_file)):
+        os.makedirs(os.path.dirname(manifest_file))
+
+    # Write out the manifest
+    with open(manifest_file, 'w') as output_fh:
+        json.dump({'version': MANIFEST_VERSION, 'complete': complete, 'dirs': sorted(set(scrub_dirs))}, output_fh)
+
+    # Change the permissions of the output file
+    os.chmod(manifest_file, 438)
+
+
+def walk_subdirs(root_dir):
+    """This function searches the entire tree for .scrub sub-directories under the specified root directory.
 
     Inputs:
         - root_dir: Absolute path to the root directory of interest [string]
+
+    Outputs:
+        - scrub_dirs: List of absolute paths to the .scrub sub-directories [list of strings]
     """
 
+    # Initialize variables
+    scrub_dirs = []
+
     # Find all the files and directories of interest
     root_sub_dir = True
     for root, dir_names, file_names in os.walk(root_dir):
@@ -21,23 +99,80 @@ def clean_subdirs(root_dir):
             # Update the flag
             root_sub_dir = False
 
-        # Remove any .scrub directories
-        for dir_name in dir_names:
+        # Find any .scrub directories, without searching inside them
+        for dir_name in list(dir_names):
             if '.scrub' in dir_name:
-                dir_path = os.path.join(root, dir_name)
-                shutil.rmtree(dir_path)
+                scrub_dirs.append(os.path.join(root, dir_name))
+                dir_names.remove(dir_name)
+
+    return scrub_dirs
+
+
+def clean_subdirs(root_dir, max_workers=None):
+    """This function cleans all sub-directories under the specified root directory.
 
+    Inputs:
+        - root_dir: Absolute path to the root directory of interest [string]
+        - max_workers: Number of threads to use while removing directories [int] [optional]
+    """
+
+    # Initialize variables
+    root_dir = os.path.abspath(root_dir)
+    manifest_file = get_manifest_file(root_dir)
+    manifest_dirs = read_distribution_manifest(manifest_file)
+
+    # Find the directories to remove
+    if manifest_dirs is None:
+        scrub_dirs = walk_subdirs(root_dir)
+    else:
+        scrub_dirs = []
+        for manifest_dir in manifest_dirs:
+            scrub_dir = os.path.normpath(os.path.join(root_dir, manifest_dir))
+
+            # Only remove .scrub directories inside the root directory
+            if (os.path.basename(scrub_dir) == '.scrub' and scrub_dir.startswith(root_dir + '/') and
+                    os.path.dirname(scrub_dir) != root_dir and os.path.isdir(scrub_dir)):
+                scrub_dirs.append(scrub_dir)
 
-def clean_directory(directory):
+    # Remove the directories
+    if len(scrub_dirs) > 1:
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for remove_job in [executor.submit(shutil.rmtree, scrub_dir) for scrub_dir in scrub_dirs]:
+                remove_job.result()
+    else:
+        for scrub_dir in scrub_dirs:
+            shutil.rmtree(scrub_dir)
+
+    # Record that no distributed directories remain
+    if os.path.isdir(os.path.dirname(manifest_file)):
+        write_distribution_manifest(manifest_file, [])
+
+
+def clean_directory(directory, preserve_cache=False):
     """This function removes previous SCRUB data products.
 
     Inputs:
         - directory: Full path to the top-level source code directory [string]
+        - preserve_cache: Keep the contents of the SCRUB cache directory? [bool] [optional]
     """
 
-    # Remove the root directory
-    if os.path.exists(directory + '/.scrub'):
-        shutil.rmtree(directory + '/.scrub')
+    # Initialize variables
+    scrub_dir = directory + '/.scrub'
+    cache_dir = scrub_dir + '/cache'
 
-    # Remove all of the sub-directories
+    # Remove all of the sub-directories, while the distribution manifest is still available
     clean_subdirs(directory)
+
+    # Remove the root directory
+    if preserve_cache and os.path.isdir(cache_dir):
+        # Remove everything except the cache
+        for item in os.listdir(scrub_dir):
+            item_path = os.path.join(scrub_dir, item)
+            if item_path == cache_dir:
+                continue
+            elif os.path.isdir(item_path) and not os.path.islink(item_path):
+                shutil.rmtree(item_path)
+            else:
+                os.remove(item_path)
+    elif os.path.exists(scrub_dir):
+        shutil.rmtree(scrub_dir)
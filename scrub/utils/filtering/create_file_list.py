@@ -1,6 +1,16 @@
 import os
 import re
+import json
+import time
+import hashlib
 import logging
+import subprocess
+from concurrent import futures
+
+UNPRUNABLE_CONSTRUCTS = ('$', '\\Z', '\\b', '\\B', '(?=', '(?!')
+GIT_SUBMODULE_MODE = '160000'
+WALK_CACHE_VERSION = 1
+RACY_MTIME_WINDOW = 2
 
 
 def parse_filtering_file(file_path):
@@ -32,7 +42,390 @@ def parse_filtering_file(file_path):
     return filtering_options
 
 
-def create_file_list(source_root_dir, filtering_output_file, filtering_options_file, initial_filtering_list=''):
+def compile_filtering_patterns(patterns):
+    """This function compiles a list of regex filtering patterns, combining them into a single expression if possible.
+
+    Inputs:
+        - patterns: List of regex patterns [list of strings]
+
+    Outputs:
+        - compiled_patterns: List of compiled regex patterns [list of regex]
+    """
+
+    # Remove leading and trailing wildcards, which do not change whether a search succeeds
+    patterns = [re.sub(r'^\.\*(?![?*+{])', '', re.sub(r'(?<!\\)\.\*$', '', pattern)) or pattern
+                for pattern in patterns]
+
+    # Compile the individual patterns
+    compiled_patterns = [re.compile(pattern) for pattern in patterns]
+    default_flags = re.compile('').flags
+
+    # Combine the patterns if they do not contain flags or group references that could interfere with each other
+    if len(patterns) > 1 and all(compiled_pattern.flags == default_flags for compiled_pattern in compiled_patterns):
+        if not any(re.search(r'\\[1-9]|\(\?P=', pattern) for pattern in patterns):
+            try:
+                compiled_patterns = [re.compile('|'.join('(?:' + pattern + ')' for pattern in patterns))]
+            except re.error:
+                pass
+
+    return compiled_patterns
+
+
+def compile_filtering_options(filtering_options):
+    """This function compiles the exclude and include filtering options.
+
+    Inputs:
+        - filtering_options: List of (type, pattern) filtering options [list of tuples]
+
+    Outputs:
+        - exclude_patterns: List of compiled exclude patterns [list of regex]
+        - include_patterns: List of compiled include patterns [list of regex]
+    """
+
+    # Compile the patterns
+    exclude_patterns = compile_filtering_patterns([option[1] for option in filtering_options if option[0] == '-'])
+    include_patterns = compile_filtering_patterns([option[1] for option in filtering_options if option[0] == '+'])
+
+    return exclude_patterns, include_patterns
+
+
+def classify_files(file_list, filtering_options, compiled_options=None):
+    """This function classifies every file based on the exclude and include filtering options.
+
+    Inputs:
+        - file_list: List of file paths to be classified [list of strings]
+        - filtering_options: List of (type, pattern) filtering options [list of tuples]
+        - compiled_options: Previously compiled options from compile_filtering_options [tuple] [optional]
+
+    Outputs:
+        - kept_files: List of files that do not match any exclude option [list of strings]
+        - included_files: List of files that match an include option [list of strings]
+    """
+
+    # Initialize variables
+    kept_files = []
+    included_files = []
+
+    # Compile the patterns if necessary
+    if compiled_options is None:
+        compiled_options = compile_filtering_options(filtering_options)
+    exclude_patterns, include_patterns = compiled_options
+
+    # Classify every file
+    for file_path in file_list:
+        if not any(exclude_pattern.search(file_path) for exclude_pattern in exclude_patterns):
+            kept_files.append(file_path)
+        if any(include_pattern.search(file_path) for include_pattern in include_patterns):
+            included_files.append(file_path)
+
+    return kept_files, included_files
+
+
+def get_prune_patterns(patterns):
+    """This function selects the exclude patterns that can be used to skip entire directories.
+
+    Inputs:
+        - patterns: List of exclude regex patterns [list of strings]
+
+    Outputs:
+        - prune_patterns: List of compiled regex patterns that can be applied to directories [list of regex]
+    """
+
+    # A pattern that matches a directory path must also match every path below it, so it can not look past its match
+    prune_patterns = compile_filtering_patterns([pattern for pattern in patterns
+                                                 if not any(construct in pattern
+                                                            for construct in UNPRUNABLE_CONSTRUCTS)])
+
+    return prune_patterns
+
+
+def list_directory(directory):
+    """This function lists the contents of a single directory.
+
+    Inputs:
+        - directory: Absolute path to the directory of interest [string]
+
+    Outputs:
+        - file_names: List of the names of the files in the directory [list of strings]
+        - dir_names: List of the names of the subdirectories that should be descended into [list of strings]
+    """
+
+    # Initialize variables
+    file_names = []
+    dir_names = []
+
+    # List the directory, ignoring directories that can not be read
+    try:
+        with os.scandir(directory) as dir_entries:
+            for dir_entry in dir_entries:
+                try:
+                    is_dir = dir_entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                # Symbolic links to directories are not followed
+                if not is_dir:
+                    file_names.append(dir_entry.name)
+                elif not dir_entry.is_symlink():
+                    dir_names.append(dir_entry.name)
+    except OSError:
+        pass
+
+    return file_names, dir_names
+
+
+def get_directory_listing(directory, cache_entry=None):
+    """This function lists a directory, reusing the cached listing if the directory has not been modified.
+
+    Inputs:
+        - directory: Absolute path to the directory of interest [string]
+        - cache_entry: Previous listing of the directory from the walk cache [dict] [optional]
+
+    Outputs:
+        - listing: Dictionary containing the modification time, file names, and subdirectory names [dict]
+        - unchanged: Indicator if the cached listing was reused [bool]
+    """
+
+    # Get the modification time of the directory
+    try:
+        dir_mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        dir_mtime = None
+
+    # Reuse the cached listing if possible
+    if cache_entry is not None and dir_mtime is not None and cache_entry.get('mtime') == dir_mtime:
+        return cache_entry, True
+
+    # List the directory
+    file_names, dir_names = list_directory(directory)
+
+    # Directories modified too recently may change again without a new modification time, so they are not reused
+    if dir_mtime is not None and time.time() - dir_mtime / 1e9 < RACY_MTIME_WINDOW:
+        dir_mtime = None
+
+    return {'mtime': dir_mtime, 'files': file_names, 'dirs': dir_names}, False
+
+
+def walk_source_dirs(source_root_dir, prune_patterns=None, max_workers=None, walk_cache=None):
+    """This function lists every directory in the source tree, skipping directories that match a prune pattern.
+
+    Inputs:
+        - source_root_dir: Absolute path to the source code root directory [string]
+        - prune_patterns: List of compiled regex patterns for directories that should be skipped [list of regex]
+        - max_workers: Number of threads to use while listing directories [int] [optional]
+        - walk_cache: Dictionary of previous directory listings, which is updated with the new listings [dict]
+                      [optional]
+
+    Outputs:
+        - source_dirs: List of (directory, listing, unchanged) tuples, in the same order as os.walk [list of tuples]
+    """
+
+    # Initialize variables
+    directory_listings = {}
+    previous_listings = walk_cache or {}
+    pending_dirs = [source_root_dir]
+
+    # List each level of the tree concurrently
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending_dirs:
+            next_dirs = []
+            listing_results = executor.map(get_directory_listing, pending_dirs,
+                                           [previous_listings.get(pending_dir) for pending_dir in pending_dirs])
+            for directory, (listing, unchanged) in zip(pending_dirs, listing_results):
+                sub_dirs = []
+                for dir_name in listing['dirs']:
+                    sub_dir = os.path.join(directory, dir_name)
+
+                    # Skip the directory if everything inside of it would be excluded
+                    if not any(prune_pattern.search(sub_dir + '/') for prune_pattern in prune_patterns or []):
+                        sub_dirs.append(sub_dir)
+
+                directory_listings[directory] = (listing, unchanged, sub_dirs)
+                next_dirs.extend(sub_dirs)
+            pending_dirs = next_dirs
+
+    # Assemble the directories in depth first order
+    source_dirs = []
+    dir_stack = [source_root_dir]
+    while dir_stack:
+        directory = dir_stack.pop()
+        listing, unchanged, sub_dirs = directory_listings[directory]
+        source_dirs.append((directory, listing, unchanged))
+        dir_stack.extend(reversed(sub_dirs))
+
+    # Update the cache
+    if walk_cache is not None:
+        walk_cache.clear()
+        walk_cache.update((directory, listing) for directory, listing, _ in source_dirs)
+
+    return source_dirs
+
+
+def walk_source_tree(source_root_dir, prune_patterns=None, max_workers=None):
+    """This function lists every file in the source tree, skipping directories that match a prune pattern.
+
+    Inputs:
+        - source_root_dir: Absolute path to the source code root directory [string]
+        - prune_patterns: List of compiled regex patterns for directories that should be skipped [list of regex]
+        - max_workers: Number of threads to use while listing directories [int] [optional]
+
+    Outputs:
+        - file_list: List of absolute paths to every file, in the same order as os.walk [list of strings]
+    """
+
+    # Find the files in every directory
+    file_list = [os.path.join(directory, file_name)
+                 for directory, listing, _ in walk_source_dirs(source_root_dir, prune_patterns, max_workers)
+                 for file_name in listing['files']]
+
+    return file_list
+
+
+def classify_source_dirs(source_dirs, filtering_options, rules_hash):
+    """This function classifies the files in every directory, reusing classifications of unchanged directories.
+
+    Inputs:
+        - source_dirs: List of (directory, listing, unchanged) tuples from walk_source_dirs [list of tuples]
+        - filtering_options: List of (type, pattern) filtering options [list of tuples]
+        - rules_hash: Hash of the filtering options [string]
+
+    Outputs:
+        - kept_files: List of files that do not match any exclude option [list of strings]
+        - included_files: List of files that match an include option [list of strings]
+        - updated: Indicator if any directory had to be classified again [bool]
+    """
+
+    # Initialize variables
+    kept_files = []
+    included_files = []
+    updated = False
+    compiled_options = compile_filtering_options(filtering_options)
+
+    # Classify the files in every directory
+    for directory, listing, unchanged in source_dirs:
+        if not (unchanged and listing.get('rules') == rules_hash):
+            dir_file_list = [os.path.join(directory, file_name) for file_name in listing['files']]
+            dir_kept_files, dir_included_files = classify_files(dir_file_list, filtering_options, compiled_options)
+            listing.update({'rules': rules_hash,
+                            'kept': [os.path.basename(file_path) for file_path in dir_kept_files],
+                            'included': [os.path.basename(file_path) for file_path in dir_included_files]})
+            updated = True
+
+        # Add the files to the lists
+        kept_files.extend(os.path.join(directory, file_name) for file_name in listing['kept'])
+        included_files.extend(os.path.join(directory, file_name) for file_name in listing['included'])
+
+    return kept_files, included_files, updated
+
+
+def load_walk_cache(walk_cache_file, source_root_dir):
+    """This function imports the directory listings stored by a previous run.
+
+    Inputs:
+        - walk_cache_file: Absolute path to the walk cache file [string]
+        - source_root_dir: Absolute path to the source code root directory [string]
+
+    Outputs:
+        - walk_cache: Dictionary of previous directory listings, or an empty dictionary if none are available [dict]
+    """
+
+    # Initialize variables
+    walk_cache = {}
+
+    # Import the data
+    if os.path.isfile(walk_cache_file):
+        try:
+            with open(walk_cache_file, 'r') as input_fh:
+                cache_data = json.load(input_fh)
+
+            # Only use the listings if they describe the same source tree
+            if (cache_data.get('version') == WALK_CACHE_VERSION and
+                    cache_data.get('source_root') == source_root_dir):
+                walk_cache = cache_data.get('dirs', {})
+
+        except ValueError:
+            logging.warning('\tWalk cache %s could not be read. Searching the entire source tree.', walk_cache_file)
+
+    return walk_cache
+
+
+def write_walk_cache(walk_cache_file, source_root_dir, walk_cache):
+    """This function stores the directory listings for use by subsequent runs.
+
+    Inputs:
+        - walk_cache_file: Absolute path to the walk cache file [string]
+        - source_root_dir: Absolute path to the source code root directory [string]
+        - walk_cache: Dictionary of directory listings [dict]
+    """
+
+    # Write out the data
+    with open(walk_cache_file, 'w') as output_fh:
+        json.dump({'version': WALK_CACHE_VERSION, 'source_root': source_root_dir, 'dirs': walk_cache}, output_fh)
+
+
+def run_git_ls_files(source_root_dir, git_flags):
+    """This function runs git ls-files in a directory and returns the null separated output.
+
+    Inputs:
+        - source_root_dir: Absolute path to the directory of interest [string]
+        - git_flags: List of flags to pass to git ls-files [list of strings]
+
+    Outputs:
+        - git_output: List of output records, or None if the command fails [list of strings]
+    """
+
+    # Execute the command
+    try:
+        proc = subprocess.run(['git', 'ls-files', '-z'] + git_flags, cwd=source_root_dir, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE)
+    except OSError:
+        return None
+
+    # Check the result
+    if proc.returncode != 0:
+        return None
+
+    return list(filter(None, os.fsdecode(proc.stdout).split('\0')))
+
+
+def list_git_files(source_root_dir, include_untracked=False):
+    """This function lists the files in a git work tree using the git index.
+
+    Inputs:
+        - source_root_dir: Absolute path to the source code root directory [string]
+        - include_untracked: Should untracked files that are not ignored be included? [bool] [optional]
+
+    Outputs:
+        - file_list: List of absolute paths to every file, or None if git can not be used [list of strings]
+    """
+
+    # Get the tracked files and their modes
+    tracked_files = run_git_ls_files(source_root_dir, ['--stage'])
+    deleted_files = run_git_ls_files(source_root_dir, ['--deleted'])
+    if tracked_files is None or deleted_files is None:
+        return None
+
+    # Remove submodules, files deleted from the work tree, and duplicate entries from merge conflicts
+    file_list = []
+    skipped_files = set(deleted_files)
+    for tracked_file in tracked_files:
+        file_info, file_path = tracked_file.split('\t', 1)
+        if file_path not in skipped_files and file_info.split(' ')[0] != GIT_SUBMODULE_MODE:
+            file_list.append(file_path)
+            skipped_files.add(file_path)
+
+    # Add the untracked files
+    if include_untracked:
+        untracked_files = run_git_ls_files(source_root_dir, ['--others', '--exclude-standard'])
+        if untracked_files is None:
+            return None
+        file_list = file_list + untracked_files
+
+    return [os.path.join(source_root_dir, file_path) for file_path in file_list]
+
+
+def create_file_list(source_root_dir, filtering_output_file, filtering_options_file, initial_filtering_list='',
+                     max_workers=None, file_backend='walk', include_untracked=False, walk_cache_file=None):
     """This function creates a list of the files that will be included in SCRUB analysis.
 
     Inputs:
@@ -42,6 +435,10 @@ def create_file_list(source_root_dir, filtering_output_file, filtering_options_f
         - filtering_options_file: Absolute path to the filtering file to be used to create list of analysis files
                                   [string]
         - initial_filtering_list: Absolute path to the file containing an initial set of files [string]
+        - max_workers: Number of threads to use while listing directories [int] [optional]
+        - file_backend: Method used to find the source files: walk, git, or auto [string] [optional]
+        - include_untracked: Should untracked files be included when using git? [bool] [optional]
+        - walk_cache_file: Absolute path to the file used to store directory listings between runs [string] [optional]
     """
 
     # Print a status message
@@ -52,22 +449,12 @@ def create_file_list(source_root_dir, filtering_output_file, filtering_options_f
     logging.info('\t>> From directory: %s', os.getcwd())
 
     # Initialize the variables
-    filtering_options = []
-    raw_file_list = []
+    raw_file_list = None
     default_filtering_options_file = os.path.abspath(os.path.dirname(os.path.abspath(__file__)) + '/FilteringDefaults')
 
-    # Create the list of all available files, if necessary
-    if os.path.isfile(initial_filtering_list):
-        # Read in the list
-        with open(initial_filtering_list, 'r') as input_fh:
-            raw_file_list = [line.strip() for line in input_fh.readlines()]
-    else:
-        for root, dir_names, file_names, in os.walk(source_root_dir):
-            for file_name in file_names:
-                raw_file_list.append(os.path.join(root, file_name))
-
     # Read in the default filtering options
-    filtering_options = filtering_options + parse_filtering_file(default_filtering_options_file)
+    default_filtering_options = parse_filtering_file(default_filtering_options_file)
+    filtering_options = default_filtering_options
 
     # Read in the values from the filtering file and add them to the list
     if os.path.isfile(filtering_options_file):
@@ -83,25 +470,64 @@ def create_file_list(source_root_dir, filtering_output_file, filtering_options_f
         logging.info('')
         logging.info('\tNo filtering file was found or no filtering file was provided. Using default values.')
 
-    # Modify the list based on the exclude options
-    filtered_file_list = raw_file_list.copy()
-    for file_path in raw_file_list:
-        for filtering_option in filtering_options:
-            if re.search(filtering_option[1], file_path) and filtering_option[0] == '-':
-                filtered_file_list.remove(file_path)
-                break
-
-    # Modify the list based on the include options
-    for file_path in raw_file_list:
-        for filtering_option in filtering_options:
-            if re.search(filtering_option[1], file_path) and filtering_option[0] == '+':
-                filtered_file_list.append(file_path)
-                break
-
-    # Print the results to the output file
+    # Create the list of all available files, if necessary
+    if os.path.isfile(initial_filtering_list):
+        # Read in the list
+        with open(initial_filtering_list, 'r') as input_fh:
+            raw_file_list = [line.strip() for line in input_fh.readlines()]
+    else:
+        # Get the files from the git index, if requested
+        if file_backend in ['git', 'auto']:
+            raw_file_list = list_git_files(source_root_dir, include_untracked)
+
+            # Print a status message
+            if raw_file_list is None and file_backend == 'git':
+                logging.warning('\tUnable to list files using git. Searching the source directory instead.')
+
+        # Search the source directory if necessary
+        if raw_file_list is None:
+            # Include patterns may only re-include files in directories excluded by the defaults
+            if any(filtering_option[0] == '+' for filtering_option in filtering_options):
+                prune_options = default_filtering_options
+            else:
+                prune_options = filtering_options
+
+            # Import the previous directory listings
+            if walk_cache_file and os.path.isdir(os.path.dirname(walk_cache_file)):
+                walk_cache = load_walk_cache(walk_cache_file, source_root_dir)
+            else:
+                walk_cache = None
+
+            # Find all of the directories, skipping excluded directories
+            prune_patterns = get_prune_patterns([filtering_option[1] for filtering_option in prune_options
+                                                 if filtering_option[0] == '-'])
+            source_dirs = walk_source_dirs(source_root_dir, prune_patterns, max_workers, walk_cache)
+
+    # Apply the exclude options, followed by the include options
+    if raw_file_list is None:
+        # Reuse the results from unchanged directories
+        rules_hash = hashlib.sha256(json.dumps(filtering_options).encode('utf-8')).hexdigest()
+        kept_files, included_files, updated = classify_source_dirs(source_dirs, filtering_options, rules_hash)
+
+        # Store the directory listings if they have changed
+        if walk_cache is not None and updated:
+            write_walk_cache(walk_cache_file, source_root_dir, walk_cache)
+
+        # Print a status message
+        logging.info('\tReused %d of %d directory listings', sum(1 for source_dir in source_dirs if source_dir[2]),
+                     len(source_dirs))
+    else:
+        kept_files, included_files = classify_files(raw_file_list, filtering_options)
+    filtered_file_list = kept_files + included_files
+
+    # Print the results to the output file, avoiding os.path.relpath for paths that are already normalized
+    source_root_prefix = os.path.join(os.path.abspath(source_root_dir), '')
     with open(filtering_output_file, 'w') as output_fh:
         for filtered_file in filtered_file_list:
-            if filtered_file.startswith('/'):
+            if (filtered_file.startswith(source_root_prefix) and '/.' not in filtered_file and
+                    '//' not in filtered_file):
+                relative_path = filtered_file[len(source_root_prefix):]
+            elif filtered_file.startswith('/'):
                 relative_path = os.path.relpath(filtered_file, source_root_dir)
             else:
                 relative_path = filtered_file
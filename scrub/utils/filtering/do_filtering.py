@@ -1,15 +1,21 @@
 import re
 import os
+import sys
 import glob
 import logging
 import traceback
-import importlib
+from concurrent import futures
 from scrub.utils.filtering import create_file_list
 from scrub.utils.filtering import filter_results
 from scrub.utils.filtering import move_warnings
+from scrub.utils.filtering import suppression_index
 from scrub.utils import scrub_utilities
 from scrub.utils import translate_results
 from scrub.utils import do_clean
+from scrub.utils import incremental
+from scrub.utils import tool_registry
+
+WORKER_FILTERING_DATA = None
 
 
 def initialize_analysis(scrub_conf_data):
@@ -25,46 +31,168 @@ def initialize_analysis(scrub_conf_data):
     return scrub_conf_data
 
 
-def get_valid_tags(scrub_root):
-    """This function gets the valid tags from every tool module.
-
-    Inputs:
-        - scrub_root: Absolute path to the SCRUB root directory [string]
+def get_valid_tags():
+    """This function gets the valid tags of every registered tool, without importing the tool modules.
 
     Outputs:
-        - valid_warning_tags: A dictionary of valid warning tags for each tool [dict]
+        - valid_warning_tags: A list of valid warning tags for each tool [list of lists]
     """
 
-    # Initialize variables
-    valid_warning_types = []
+    return [tool_data.get('valid_tags') for tool_data in tool_registry.get_tools()]
+
 
-    # Find all of the tool modules
-    for tool_module in glob.glob(scrub_root + '/tools/**/do*.py'):
-        module_name = 'scrub.' + re.split('\\.py', os.path.relpath(tool_module, scrub_root))[0].replace('/', '.')
+def get_source_files(scrub_conf_data):
+    """This function gets the absolute paths of the files listed in the analysis filtering list.
 
-        # Import the module
-        module_object = importlib.import_module(module_name)
+    Inputs:
+        - scrub_conf_data: Dictionary of SCRUB configuration variables [dict]
+
+    Outputs:
+        - source_files: List of absolute paths to the files included in analysis [list of strings]
+    """
 
-        # Add the tags
-        valid_warning_types.append(getattr(module_object, "VALID_TAGS"))
+    # Import the filtering list
+    with open(scrub_conf_data.get('filtering_output_file'), 'r') as input_fh:
+        source_files = [os.path.normpath(os.path.join(scrub_conf_data.get('source_dir'), line.strip()))
+                        for line in input_fh if line.strip()]
 
-    return valid_warning_types
+    return source_files
 
 
-def distribute_scrub_results(scrub_conf_data):
-    """This function distributes the filtered SCRUB output files
+def distribute_scrub_results(scrub_conf_data, filtered_results=None):
+    """This function distributes the filtered SCRUB output files, or indexes them when DISTRIBUTION_MODE is index
 
     Inputs:
         - scrub_conf_data: Dictionary of SCRUB configuration variables [dict]
+        - filtered_results: Dictionary of filtered warnings for each output file from filter_scrub_results [dict]
+                            [optional]
     """
 
+    # Initialize variables
+    source_dir = os.path.abspath(scrub_conf_data.get('source_dir'))
+    manifest_file = do_clean.get_manifest_file(source_dir)
+    scrub_dirs = set()
+
     # Get a list of the filtered SCRUB output files
     filtered_output_files = glob.glob(scrub_conf_data.get('scrub_analysis_dir') + '/*.scrub')
 
+    # Index the results instead of moving them, if necessary
+    if scrub_conf_data.get('distribution_mode') == 'index':
+        move_warnings.create_distribution_index(filtered_output_files, scrub_conf_data.get('source_dir'),
+                                                scrub_conf_data.get('distribution_index_file'))
+        return
+
+    # Mark the manifest as stale until every directory has been recorded
+    do_clean.write_distribution_manifest(manifest_file, [], False)
+
     # Move the warnings to the appropriate directories
     for filtered_output_file in filtered_output_files:
-        move_warnings.move_warnings(filtered_output_file,
-                                    scrub_conf_data.get('source_dir'))
+        if filtered_results and filtered_output_file in filtered_results:
+            scrub_dirs.update(move_warnings.move_warning_list(filtered_results[filtered_output_file],
+                                                              os.path.basename(filtered_output_file),
+                                                              scrub_conf_data.get('source_dir'),
+                                                              int(scrub_conf_data.get('filter_threads'))))
+        else:
+            scrub_dirs.update(move_warnings.move_warnings(filtered_output_file,
+                                                          scrub_conf_data.get('source_dir'),
+                                                          int(scrub_conf_data.get('filter_threads'))))
+
+    # Record the distributed directories
+    do_clean.write_distribution_manifest(manifest_file, [os.path.relpath(scrub_dir, source_dir)
+                                                         for scrub_dir in scrub_dirs])
+
+
+def filter_results_group(raw_files, output_file, scrub_conf_data, valid_warning_types, source_index, query_filters,
+                         filtering_index):
+    """This function filters a group of raw SCRUB output files into a single filtered output file.
+
+    Inputs:
+        - raw_files: List of absolute paths to the raw SCRUB output files [list of strings]
+        - output_file: Absolute path to the filtered SCRUB output file to be created [string]
+        - scrub_conf_data: Dictionary of SCRUB configuration variables [dict]
+        - valid_warning_types: List of lists that contain valid warning type tags [list of lists]
+        - source_index: Suppression comments found in each source file [dict]
+        - query_filters: Query filters from filter_results.parse_query_filters [tuple]
+        - filtering_index: Path index from filter_results.create_path_index [dict]
+
+    Outputs:
+        - output_file: All filtered results are written to the output_file
+        - filtered_warnings: List of warnings that passed filtering, or None if filtering failed [list of dict]
+    """
+
+    # Initialize variables
+    filtered_warnings = None
+
+    try:
+        # Parse all of the input files
+        warning_list = []
+        for raw_file in raw_files:
+            warning_list = warning_list + translate_results.parse_scrub(raw_file, scrub_conf_data.get('source_dir'))
+
+        # Only filter the warnings for changed files during incremental analysis
+        if scrub_conf_data.get('incremental_changed_files') is not None:
+            warning_list = incremental.get_changed_warnings(warning_list, scrub_conf_data)
+
+        # Filter the results
+        filtered_warnings = filter_results.filter_results(warning_list, output_file,
+                                                          scrub_conf_data.get('filtering_output_file'),
+                                                          scrub_conf_data.get('query_filters'),
+                                                          scrub_conf_data.get('source_dir'),
+                                                          scrub_conf_data.get('enable_micro_filter'),
+                                                          scrub_conf_data.get('enable_ext_warnings'),
+                                                          valid_warning_types, source_index, query_filters,
+                                                          filtering_index)
+
+        # Add the previous results for the unchanged files
+        if scrub_conf_data.get('incremental_changed_files') is not None:
+            filtered_warnings = incremental.merge_previous_warnings(filtered_warnings, output_file, scrub_conf_data,
+                                                                    query_filters, filtering_index)
+
+    except:     # lgtm [py/catch-base-exception]
+        # Print a status message
+        logging.warning("Could not generate output file %s", output_file)
+
+        # Print the exception traceback
+        logging.debug(traceback.format_exc())
+
+    return filtered_warnings
+
+
+def initialize_filtering_worker(filtering_log_file, filtering_data):
+    """This function prepares a filtering worker process, so the shared filtering data is only transferred once.
+
+    Inputs:
+        - filtering_log_file: Absolute path to the filtering log file [string]
+        - filtering_data: Arguments of filter_results_group that are shared by every group [tuple]
+    """
+
+    global WORKER_FILTERING_DATA
+
+    # Store the shared filtering data
+    WORKER_FILTERING_DATA = filtering_data
+
+    # Log to the filtering log file, replacing any handlers inherited from the parent process
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    logging.basicConfig(level=logging.DEBUG,
+                        format='%(asctime)s %(levelname)-8s %(message)s',
+                        filename=filtering_log_file,
+                        filemode='a')
+
+
+def filter_worker_group(raw_files, output_file):
+    """This function filters a group of raw SCRUB output files in a worker process.
+
+    Inputs:
+        - raw_files: List of absolute paths to the raw SCRUB output files [list of strings]
+        - output_file: Absolute path to the filtered SCRUB output file to be created [string]
+
+    Outputs:
+        - filtered_warnings: List of warnings that passed filtering, or None if filtering failed [list of dict]
+    """
+
+    return filter_results_group(raw_files, output_file, *WORKER_FILTERING_DATA)
 
 
 def filter_scrub_results(scrub_conf_data):
@@ -72,15 +200,37 @@ def filter_scrub_results(scrub_conf_data):
 
     Inputs:
         - scrub_conf_data: Dictionary of SCRUB configuration variables [dict]
+
+    Outputs:
+        - filtered_results: Dictionary of filtered warnings for each output file [dict]
     """
 
+    # Initialize variables
+    filtered_results = {}
+
     # Get a list of valid tags
-    valid_warning_types = get_valid_tags(scrub_conf_data.get('scrub_path'))
+    valid_warning_types = get_valid_tags()
+
+    # Start the filtering run with an empty source line cache
+    filter_results.load_source_lines.cache_clear()
 
     # Create a filtering list
     create_file_list.create_file_list(scrub_conf_data.get('source_dir'),
                                       scrub_conf_data.get('filtering_output_file'),
-                                      scrub_conf_data.get('analysis_filters'))
+                                      scrub_conf_data.get('analysis_filters'), '',
+                                      int(scrub_conf_data.get('filter_threads')),
+                                      scrub_conf_data.get('filter_file_backend'),
+                                      scrub_conf_data.get('filter_git_untracked'),
+                                      scrub_conf_data.get('walk_cache_file'))
+
+    # Index the suppression comments in every file of the filtering list
+    if scrub_conf_data.get('enable_micro_filter'):
+        source_index = suppression_index.build_suppression_index(get_source_files(scrub_conf_data),
+                                                                 valid_warning_types,
+                                                                 scrub_conf_data.get('suppression_index_file'),
+                                                                 int(scrub_conf_data.get('filter_threads')))
+    else:
+        source_index = None
 
     # Get the list of SCRUB files
     results_files = glob.glob(scrub_conf_data.get('raw_results_dir') + '/*.scrub')
@@ -88,110 +238,76 @@ def filter_scrub_results(scrub_conf_data):
     # Sort the files into groups
     raw_compiler_files = []
     raw_p10_files = []
-    raw_generic_files = []
+    filtering_jobs = []
     for results_file in results_files:
         if re.search(r'compiler_raw\.scrub', results_file):
             raw_compiler_files.append(results_file)
         elif re.search(r'p10_raw\.scrub', results_file):
             raw_p10_files.append(results_file)
         else:
-            raw_generic_files.append(results_file)
+            # Get the output file name
+            tool_name = list(filter(None, re.split('_raw.scrub', os.path.basename(results_file))))[0]
+            filtering_jobs.append(([results_file], scrub_conf_data.get('scrub_analysis_dir') + '/' + tool_name +
+                                   '.scrub'))
 
-    # Filter compiler results
-    if raw_compiler_files:
-        try:
-            # Set the compiler output file path
-            filtered_compiler_results_file = scrub_conf_data.get('scrub_analysis_dir') + '/compiler.scrub'
-
-            # Parse all of the input files
-            compiler_results = []
-            for results_file in raw_compiler_files:
-                # Append the results file
-                compiler_results = (compiler_results +
-                                    translate_results.parse_scrub(results_file,
-                                                                  scrub_conf_data.get('source_dir')))
-
-            # filtered_compiler_results_file = scrub_conf_data.get('scrub_analysis_dir') + '/compiler.scrub'
-            filter_results.filter_results(compiler_results, filtered_compiler_results_file,
-                                          scrub_conf_data.get('filtering_output_file'),
-                                          scrub_conf_data.get('query_filters'),
-                                          scrub_conf_data.get('source_dir'),
-                                          scrub_conf_data.get('enable_micro_filter'),
-                                          scrub_conf_data.get('enable_ext_warnings'),
-                                          valid_warning_types)
-
-        except:      # lgtm [py/catch-base-exception]
-            # Print a status message
-            logging.warning("Could not generate output file %s", filtered_compiler_results_file)
-
-            # Print the exception traceback
-            logging.debug(traceback.format_exc())
-
-    # Filter P10 results
+    # Add the compiler and P10 results, which are combined into a single output file each
     if raw_p10_files:
-        try:
-            # Set the output file path
-            filtered_p10_results = scrub_conf_data.get('scrub_analysis_dir') + '/p10.scrub'
-
-            # Parse all of the input files
-            p10_results = []
-            for results_file in raw_p10_files:
-                # Append the results file
-                p10_results = (p10_results + translate_results.parse_scrub(results_file,
-                                                                           scrub_conf_data.get('source_dir')))
-
-            filter_results.filter_results(p10_results, filtered_p10_results,
-                                          scrub_conf_data.get('filtering_output_file'),
-                                          scrub_conf_data.get('query_filters'),
-                                          scrub_conf_data.get('source_dir'),
-                                          scrub_conf_data.get('enable_micro_filter'),
-                                          scrub_conf_data.get('enable_ext_warnings'),
-                                          valid_warning_types)
-
-        except:     # lgtm [py/catch-base-exception]
-            # Print a status message
-            logging.warning("Could not generate output file %s", filtered_p10_results)
-
-            # Print the exception traceback
-            logging.debug(traceback.format_exc())
-
-    # Filter everything else
-    if raw_generic_files:
-        for raw_generic_file in raw_generic_files:
-            try:
-                # Import the warning data
-                raw_generic_warnings = translate_results.parse_scrub(raw_generic_file,
-                                                                     scrub_conf_data.get('source_dir'))
-
-                # Get the output file name
-                tool_name = list(filter(None, re.split('_raw.scrub', os.path.basename(raw_generic_file))))[0]
-                filtered_generic_results = scrub_conf_data.get('scrub_analysis_dir') + '/' + tool_name + '.scrub'
-
-                filter_results.filter_results(raw_generic_warnings, filtered_generic_results,
-                                              scrub_conf_data.get('filtering_output_file'),
-                                              scrub_conf_data.get('query_filters'),
-                                              scrub_conf_data.get('source_dir'),
-                                              scrub_conf_data.get('enable_micro_filter'),
-                                              scrub_conf_data.get('enable_ext_warnings'),
-                                              valid_warning_types)
-
-            except:     # lgtm [py/catch-base-exception]
-                # Print a status message
-                logging.warning("Could not generate output file %s", filtered_generic_results)
-
-                # Print the exception traceback
-                logging.debug(traceback.format_exc())
+        filtering_jobs.insert(0, (raw_p10_files, scrub_conf_data.get('scrub_analysis_dir') + '/p10.scrub'))
+    if raw_compiler_files:
+        filtering_jobs.insert(0, (raw_compiler_files, scrub_conf_data.get('scrub_analysis_dir') + '/compiler.scrub'))
+
+    # Import the filtering rules that are shared by every group
+    query_filters = filter_results.parse_query_filters(scrub_conf_data.get('query_filters'))
+    filtering_index = filter_results.create_path_index(scrub_conf_data.get('filtering_output_file'),
+                                                       scrub_conf_data.get('source_dir'))
+    filtering_data = (scrub_conf_data, valid_warning_types, source_index, query_filters, filtering_index)
+
+    # Filter each group of results, worker initializers require Python 3.7
+    filter_jobs = int(scrub_conf_data.get('filter_jobs'))
+    if filter_jobs > 1 and len(filtering_jobs) > 1 and sys.version_info >= (3, 7):
+        with futures.ProcessPoolExecutor(max_workers=filter_jobs, initializer=initialize_filtering_worker,
+                                         initargs=(scrub_conf_data.get('filtering_log_file'),
+                                                   filtering_data)) as executor:
+            filtering_futures = [executor.submit(filter_worker_group, raw_files, output_file)
+                                 for raw_files, output_file in filtering_jobs]
+            for filtering_future, (_, output_file) in zip(filtering_futures, filtering_jobs):
+                try:
+                    filtered_results[output_file] = filtering_future.result()
+
+                except:     # lgtm [py/catch-base-exception]
+                    # Print a status message
+                    logging.warning("Could not generate output file %s", output_file)
+
+                    # Print the exception traceback
+                    logging.debug(traceback.format_exc())
+    else:
+        for raw_files, output_file in filtering_jobs:
+            filtered_results[output_file] = filter_results_group(raw_files, output_file, *filtering_data)
+
+    # Release the source line cache
+    filter_results.load_source_lines.cache_clear()
 
     # Execute the custom filtering command if it exists
     if scrub_conf_data.get('custom_filter_cmd'):
         scrub_utilities.execute_command(scrub_conf_data.get('custom_filter_cmd'), os.environ.copy())
 
+        # The custom command may modify the output files, so they must be read back in
+        filtered_results = {}
 
-def generate_sarif(scrub_conf_data):
+    # Remove any groups that could not be filtered
+    filtered_results = {output_file: warnings for output_file, warnings in filtered_results.items()
+                        if warnings is not None}
+
+    return filtered_results
+
+
+def generate_sarif(scrub_conf_data, filtered_results=None):
     """This function converts SCRUB formatted output files into SARIF.
 
     Inputs:
         - scrub_conf_data: Dictionary of SCRUB configuration variables [dict]
+        - filtered_results: Dictionary of filtered warnings for each output file from filter_scrub_results [dict]
+                            [optional]
     """
 
     # Find all of the SCRUB output files
@@ -202,9 +318,20 @@ def generate_sarif(scrub_conf_data):
         sarif_output_file = (scrub_conf_data.get('sarif_results_dir') + '/' +
                              os.path.splitext(os.path.basename(scrub_file))[0] + '.sarif')
 
+        # Use the filtered warnings directly if they are available
+        parsed_results = None
+        if filtered_results and scrub_file in filtered_results:
+            parsed_results = []
+            for warning in filtered_results[scrub_file]:
+                if not warning['suppress']:
+                    warning = warning.copy()
+                    if not warning['file'].startswith('/'):
+                        warning['file'] = os.path.normpath(scrub_conf_data.get('source_dir') + '/' + warning['file'])
+                    parsed_results.append(warning)
+
         # Create a SARIF output file
         translate_results.perform_translation(scrub_file, sarif_output_file, scrub_conf_data.get('source_dir'),
-                                              'sarifv2.1.0')
+                                              'sarifv2.1.0', parsed_results)
 
 
 def run_analysis(scrub_conf_data, override=False):
@@ -237,16 +364,16 @@ def run_analysis(scrub_conf_data, override=False):
             logging.info('Perform filtering and distribution...')
 
             # Remove distributed results
-            do_clean.clean_subdirs(scrub_conf_data.get('source_dir'))
+            do_clean.clean_subdirs(scrub_conf_data.get('source_dir'), int(scrub_conf_data.get('filter_threads')))
 
             # Filter the results
-            filter_scrub_results(scrub_conf_data)
+            filtered_results = filter_scrub_results(scrub_conf_data)
 
             # Convert the results into SARIF format
-            generate_sarif(scrub_conf_data)
+            generate_sarif(scrub_conf_data, filtered_results)
 
             # Distribute the results
-            distribute_scrub_results(scrub_conf_data)
+            distribute_scrub_results(scrub_conf_data, filtered_results)
 
             # Set the exit code
             filtering_exit_code = 0
@@ -1,21 +1,78 @@
 import os
 import re
 import logging
+import functools
 from scrub.utils import translate_results
 
+SOURCE_CACHE_SIZE = 1024
 
-def invalid_tag_check(source_file, warning_line, raw_valid_warning_types):
+
+@functools.lru_cache(maxsize=SOURCE_CACHE_SIZE)
+def load_source_lines(source_file, modified_time, file_size):
+    """This function reads the lines of a source code file, caching the result for subsequent warnings. The
+    modification time and size are part of the cache key, so a file that is edited is read again.
+
+    Inputs:
+        - source_file: Absolute path to the source code file of interest [string]
+        - modified_time: Modification time of the file, in nanoseconds [int]
+        - file_size: Size of the file, in bytes [int]
+
+    Outputs:
+        - source_data: Lines of the source code file [tuple of strings]
+    """
+
+    # Open the file of interest and read the lines
+    with open(source_file, 'r') as fh:
+        source_data = tuple(fh.readlines())
+
+    return source_data
+
+
+def read_source_lines(source_file):
+    """This function reads the lines of a source code file, using the cached lines if the file has not changed.
+
+    Inputs:
+        - source_file: Absolute path to the source code file of interest [string]
+
+    Outputs:
+        - source_data: Lines of the source code file [tuple of strings]
+    """
+
+    # Get the current state of the file
+    file_stats = os.stat(source_file)
+
+    return load_source_lines(source_file, file_stats.st_mtime_ns, file_stats.st_size)
+
+
+def log_source_cache_stats():
+    """This function prints the hit/miss statistics of the source line cache to the log."""
+
+    # Get the cache statistics
+    cache_info = load_source_lines.cache_info()
+
+    # Print a status message
+    logging.info('\tSource line cache: %d hits, %d misses, %d/%d files cached', cache_info.hits, cache_info.misses,
+                 cache_info.currsize, cache_info.maxsize)
+
+
+def invalid_tag_check(source_file, warning_line, raw_valid_warning_types, suppression_index=None):
     """This function checks to see if there are any invalid tags on the line of interest.
 
     Inputs:
         - source_file: Absolute path to the source code file of interest [string]
         - warning_line: Line of interest of source code file [int]
         - raw_valid_warning_types: List of lists containing valid types for each tool [list of list of strings]
+        - suppression_index: Suppression comments found in each source file [dict] [optional]
 
     Outputs:
         - invalid_type: Indicator if an invalid tag type was found [bool]
     """
 
+    # Use the suppression index if the file has been indexed
+    if suppression_index is not None and source_file in suppression_index:
+        line_tags = suppression_index[source_file].get(warning_line)
+        return (line_tags is not None) and (not line_tags)
+
     # Initialize variables
     ignore_base = "scrub_ignore_warning"
     valid_warning_types = []
@@ -28,12 +85,8 @@ def invalid_tag_check(source_file, warning_line, raw_valid_warning_types):
     # Remove duplicates
     valid_warning_types = list(set(valid_warning_types))
 
-    # Open the file of interest and read the lines
-    with open(source_file, 'r') as fh:
-        source_data = fh.readlines()
-
     # Get the line of interest from the file
-    line = source_data[warning_line - 1]
+    line = read_source_lines(source_file)[warning_line - 1]
 
     # Check to see if an invalid suppression tag exists
     if (ignore_base in line.lower()) or ('@suppress' in line.lower()):
@@ -46,7 +99,7 @@ def invalid_tag_check(source_file, warning_line, raw_valid_warning_types):
     return invalid_type
 
 
-def micro_filter_check(source_file, warning_line, warning_type, raw_valid_warning_types):
+def micro_filter_check(source_file, warning_line, warning_type, raw_valid_warning_types, suppression_index=None):
     """This function checks to see if a warning has been marked as a false positive by the user.
 
     Inputs:
@@ -54,6 +107,7 @@ def micro_filter_check(source_file, warning_line, warning_type, raw_valid_warnin
         - warning_line: Line of interest of source code file [int]
         - warning_type: Full and accurate name of the check that should be ignored [string]
         - raw_valid_warning_types: List of lists containing valid types for each tool [list of list of strings]
+        - suppression_index: Suppression comments found in each source file [dict] [optional]
 
     Outputs:
         - ignore_line: Indicator if warning should be ignored [bool]
@@ -71,13 +125,21 @@ def micro_filter_check(source_file, warning_line, warning_type, raw_valid_warnin
         if warning_type in valid_type_set:
             tool_warning_types = tool_warning_types + valid_type_set
 
-    try:
-        # Open the file of interest and read the lines
-        with open(source_file, 'r') as fh:
-            source_data = fh.readlines()
+    # Use the suppression index if the file has been indexed
+    if suppression_index is not None and source_file in suppression_index:
+        line_tags = suppression_index[source_file].get(warning_line)
+        if line_tags and not line_tags.isdisjoint(tool_warning_types):
+            ignore_line = True
 
+            # Print a status message
+            logging.debug('\tWarning removed - Warning has been marked as a false positive')
+            logging.debug('\t\t%s:%d', source_file, warning_line)
+
+        return ignore_line
+
+    try:
         # Get the line of interest from the file
-        line = source_data[warning_line - 1]
+        line = read_source_lines(source_file)[warning_line - 1]
 
         # Check to see if the line should be filtered out
         if (ignore_base in line.lower()) or ('@suppress' in line.lower()):
@@ -96,40 +158,79 @@ def micro_filter_check(source_file, warning_line, warning_type, raw_valid_warnin
     return ignore_line
 
 
-def ignore_query_check(warning_tool, warning_query, ignore_queries_file):
-    """This function checks if a result should be skipped based on the type of query.
+def parse_query_filters(ignore_queries_file):
+    """This function imports the query filters from the SCRUBExcludeQueries file.
 
     Inputs:
-        - line: Line of interest from SCRUB results [string]
         - ignore_queries_file: Full path to the SCRUBExcludeQueries file [string]
 
     Outputs:
-        - skip: Indicator if result should be filtered out [bool]
+        - query_filters: Tuple containing the set of (tool, query) filters and the compiled wildcard filters [tuple]
     """
 
     # Initialize the variables
-    skip = False
+    exact_filters = set()
+    wildcard_patterns = []
 
     # Import the ignore data
     if os.path.isfile(ignore_queries_file):
-        ignore_fh = open(ignore_queries_file, 'r')
-        ignore_queries = ignore_fh.readlines()
-        ignore_fh.close()
+        with open(ignore_queries_file, 'r') as input_fh:
+            ignore_queries = input_fh.readlines()
 
         # Iterate through every line of the ignore data
         for ignore_line in ignore_queries:
             # Split the line and store the values
             ignore_line_split = list(filter(None, re.split(':', ignore_line.strip())))
+
+            # Skip lines that do not contain a query
+            if len(ignore_line_split) < 2:
+                continue
+
             ignore_tool = ignore_line_split[0].strip().lower()
             ignore_query = ignore_line_split[1].strip()
 
-            # Determine if the ine should be skipped
-            if (ignore_tool == warning_tool) and (ignore_query == warning_query):
-                skip = True
+            # Store the filter
+            if '*' in ignore_tool or '*' in ignore_query:
+                wildcard_patterns.append('.*'.join(map(re.escape, ignore_tool.split('*'))) + ':' +
+                                         '.*'.join(map(re.escape, ignore_query.split('*'))))
+            else:
+                exact_filters.add((ignore_tool, ignore_query))
 
-                # Print a status message
-                logging.debug('\tWarning removed - Warning generated by a filtered query')
-                logging.debug('\t\t%s: %s', warning_tool, warning_query)
+    # Combine the wildcard filters into a single expression
+    if wildcard_patterns:
+        wildcard_filters = re.compile('(?:' + '|'.join(wildcard_patterns) + r')\Z', re.DOTALL)
+    else:
+        wildcard_filters = None
+
+    return exact_filters, wildcard_filters
+
+
+def ignore_query_check(warning_tool, warning_query, ignore_queries_file, query_filters=None):
+    """This function checks if a result should be skipped based on the type of query.
+
+    Inputs:
+        - warning_tool: Tool that generated the warning [string]
+        - warning_query: Query that generated the warning [string]
+        - ignore_queries_file: Full path to the SCRUBExcludeQueries file [string]
+        - query_filters: Previously parsed query filters from parse_query_filters [tuple] [optional]
+
+    Outputs:
+        - skip: Indicator if result should be filtered out [bool]
+    """
+
+    # Import the ignore data if necessary
+    if query_filters is None:
+        query_filters = parse_query_filters(ignore_queries_file)
+    exact_filters, wildcard_filters = query_filters
+
+    # Determine if the line should be skipped
+    skip = (((warning_tool, warning_query) in exact_filters) or
+            (wildcard_filters is not None and wildcard_filters.match(warning_tool + ':' + warning_query) is not None))
+
+    # Print a status message
+    if skip:
+        logging.debug('\tWarning removed - Warning generated by a filtered query')
+        logging.debug('\t\t%s: %s', warning_tool, warning_query)
 
     return skip
 
@@ -158,30 +259,91 @@ def external_warning_check(warning_file, source_root):
     return skip
 
 
-def baseline_filtering_check(warning_file, filtering_file):
-    """This function checks to see if a warning occurs in a directory or file that should be ignored.
+def create_path_index(filtering_file, source_root=None):
+    """This function creates an index of the paths listed in the SCRUBAnalysisFilteringList file.
 
     Inputs:
-        - warning_file: File of interest from warning data [string]
         - filtering_file: Absolute path to the SCRUBAnalysisFilteringList file [string]
+        - source_root: Absolute path to the top level directory of the source code [string] [optional]
 
     Outputs:
-        - skip: Indicator if result should be filtered out [bool]
+        - filtering_index: Dictionary containing the set of listed paths that exist inside the source root, the list of
+                           every other entry, and the source root prefix, or None if the filtering file does not exist
+                           [dict]
     """
 
     # Initialize the variables
-    skip = True
+    filtering_index = None
 
     if os.path.isfile(filtering_file):
-        # Import the ignore data
+        # Import the filtering data
         with open(filtering_file, 'r') as input_fh:
-            filtering_data = input_fh.readlines()
+            filtering_paths = set(filter_file.strip() for filter_file in input_fh)
 
-        # Iterate through every line of the ignore data
-        for filter_file in filtering_data:
-            if filter_file.strip() in warning_file:
-                skip = False
+        # Paths relative to the source root can be looked up directly, every other entry is matched as a substring
+        source_paths = set()
+        if source_root is not None:
+            source_root = os.path.normpath(os.path.abspath(source_root))
+            source_paths = set(filter_file for filter_file in filtering_paths
+                               if filter_file and not os.path.isabs(filter_file) and
+                               os.path.normpath(filter_file) == filter_file and
+                               os.path.lexists(os.path.join(source_root, filter_file)))
+        filtering_index = {'source_paths': source_paths,
+                           'other_paths': sorted(filtering_paths - source_paths),
+                           'source_prefix': None if source_root is None else source_root + '/'}
+
+    return filtering_index
+
+
+def path_index_check(warning_file, filtering_index):
+    """This function checks to see if a file is contained in a path index.
+
+    Inputs:
+        - warning_file: File of interest from warning data [string]
+        - filtering_index: Path index created by create_path_index [dict]
+
+    Outputs:
+        - match: Indicator if the file or one of its parent directories is a listed source path, or if any other
+                 entry is a substring of the file [bool]
+    """
+
+    # Check the path relative to the source root, followed by each of its parent directories
+    if filtering_index['source_paths']:
+        if warning_file.startswith(filtering_index['source_prefix']):
+            path = warning_file[len(filtering_index['source_prefix']):]
+        else:
+            path = warning_file
+        while path:
+            if path in filtering_index['source_paths']:
+                return True
+            parent_path = os.path.dirname(path)
+            if parent_path == path:
                 break
+            path = parent_path
+
+    # Check the entries that are not paths inside the source root
+    return any(filter_file in warning_file for filter_file in filtering_index['other_paths'])
+
+
+def baseline_filtering_check(warning_file, filtering_file, filtering_index=None, source_root=None):
+    """This function checks to see if a warning occurs in a directory or file that should be ignored.
+
+    Inputs:
+        - warning_file: File of interest from warning data [string]
+        - filtering_file: Absolute path to the SCRUBAnalysisFilteringList file [string]
+        - filtering_index: Previously created path index from create_path_index [dict] [optional]
+        - source_root: Absolute path to the top level directory of the source code [string] [optional]
+
+    Outputs:
+        - skip: Indicator if result should be filtered out [bool]
+    """
+
+    # Import the filtering data if necessary
+    if filtering_index is None:
+        filtering_index = create_path_index(filtering_file, source_root)
+
+    # Check to see if the file is included in analysis
+    skip = filtering_index is None or not path_index_check(warning_file, filtering_index)
 
     # Print a status message
     if skip:
@@ -231,46 +393,47 @@ def duplicate_check(warning, warning_log):
     return skip
 
 
-def filter_results(warning_list, output_file, filtering_file, ignore_query_file, source_root, enable_micro_filtering,
-                   enable_external_warnings, valid_warning_types):
-    """This function performs the filtering, including all other filtering functions.
+def filter_warnings(warning_list, filtering_file, ignore_query_file, source_root, enable_micro_filtering,
+                    enable_external_warnings, valid_warning_types, suppression_index=None, query_filters=None,
+                    filtering_index=None):
+    """This function performs every filtering check on each warning, yielding the warnings that should be kept.
 
     Inputs:
-        - input_files: List of absolute paths to the input file(s) of interest [list of string]
-        - output_file: Absolute path to file where filtered results will be stored [string]
+        - warning_list: List of warnings to be filtered [list of dict]
         - filtering_file: Absolute path to the SCRUBAnalayisFilteringList file [string]
         - ignore_query_file: Absolute path to the SCRUBExcludeQueries file [string]
         - source_root: Absolute path to the top level directory of the source code [string]
         - enable_micro_filtering: Flag to enable/disable micro filtering [logical]
         - enable_external_warnings: Flag to enable/disable external warnings [logical]
         - valid_warning_types: List of lists that contain valid warning type tags [list of lists]
+        - suppression_index: Suppression comments found in each source file [dict] [optional]
+        - query_filters: Previously parsed query filters from parse_query_filters [tuple] [optional]
+        - filtering_index: Previously created path index from create_path_index [dict] [optional]
 
     Outputs:
-        - output_file: All filtered results are written to the output_file
+        - kept_warning: Copy of each warning that passes filtering, with a file path relative to the source root [dict]
     """
 
     # Initialize the variables
-    filtered_warnings = warning_list.copy()
-    invalid_tag_log = []
+    invalid_tag_log = set()
 
-    # Print a log message
-    logging.info('')
-    logging.info('\tFiltering results...')
-    logging.info('\t>> Executing command: filter_results.filter_results(<warning_list>, %s, %s, %s, %s, %r, %r)',
-                 output_file, filtering_file, ignore_query_file, source_root, enable_micro_filtering,
-                 enable_external_warnings)
-    logging.info('\t>> From directory: %s', os.getcwd())
+    # Import the filtering rules if necessary
+    if query_filters is None:
+        query_filters = parse_query_filters(ignore_query_file)
 
     # Update the source root to make it absolute
     source_root = os.path.abspath(source_root)
+    source_prefix = os.path.normpath(source_root) + '/'
+    if filtering_index is None:
+        filtering_index = create_path_index(filtering_file, source_root)
 
     # Iterate through every warning in the list
     for warning in warning_list:
         # Check to see if it should be ignored
-        baseline_filtering_result = baseline_filtering_check(warning['file'], filtering_file)
+        baseline_filtering_result = baseline_filtering_check(warning['file'], filtering_file, filtering_index)
 
         # Check to see if the query should be ignore
-        ignore_query_result = ignore_query_check(warning['tool'], warning['query'], ignore_query_file)
+        ignore_query_result = ignore_query_check(warning['tool'], warning['query'], ignore_query_file, query_filters)
 
         # Check to see if the warning is external to the source directory
         if enable_external_warnings:
@@ -279,12 +442,12 @@ def filter_results(warning_list, output_file, filtering_file, ignore_query_file,
             external_check_result = external_warning_check(warning['file'], source_root)
 
         # Check to see if a valid tag exists
-        invalid_tag = invalid_tag_check(warning['file'], warning['line'], valid_warning_types)
+        invalid_tag = invalid_tag_check(warning['file'], warning['line'], valid_warning_types, suppression_index)
 
         # Print a warning message if applicable
         if invalid_tag and ((warning['file'], warning['line']) not in invalid_tag_log):
-            # Add the line to the list
-            invalid_tag_log.append((warning['file'], warning['line']))
+            # Add the line to the log
+            invalid_tag_log.add((warning['file'], warning['line']))
 
             # Print a waning message
             logging.warning('\t\tInvalid tool suppression selection on line %s of file %s',
@@ -293,22 +456,62 @@ def filter_results(warning_list, output_file, filtering_file, ignore_query_file,
         # Perform micro filtering checking
         if enable_micro_filtering and not external_check_result and not invalid_tag:
             micro_check_result = micro_filter_check(warning['file'], warning['line'], warning['tool'],
-                                                    valid_warning_types)
+                                                    valid_warning_types, suppression_index)
         else:
             micro_check_result = False
 
         # Or them together
         skip = baseline_filtering_result or ignore_query_result or external_check_result or micro_check_result
 
-        # Remove the warning from the list, if necessary
-        if skip:
-            filtered_warnings.remove(warning)
-        else:
+        # Keep the warning, if necessary
+        if not skip:
             # Make the warning file path relative
-            filtered_warnings[filtered_warnings.index(warning)]['file'] = warning['file'].replace(os.path.normpath(source_root) + '/', '')
+            kept_warning = warning.copy()
+            kept_warning['file'] = warning['file'].replace(source_prefix, '')
 
-    # Remove duplicates
-    # filtered_warnings = list(set(filtered_warnings))
+            yield kept_warning
+
+
+def filter_results(warning_list, output_file, filtering_file, ignore_query_file, source_root, enable_micro_filtering,
+                   enable_external_warnings, valid_warning_types, suppression_index=None, query_filters=None,
+                   filtering_index=None):
+    """This function performs the filtering, including all other filtering functions.
+
+    Inputs:
+        - warning_list: List of warnings to be filtered [list of dict]
+        - output_file: Absolute path to file where filtered results will be stored [string]
+        - filtering_file: Absolute path to the SCRUBAnalayisFilteringList file [string]
+        - ignore_query_file: Absolute path to the SCRUBExcludeQueries file [string]
+        - source_root: Absolute path to the top level directory of the source code [string]
+        - enable_micro_filtering: Flag to enable/disable micro filtering [logical]
+        - enable_external_warnings: Flag to enable/disable external warnings [logical]
+        - valid_warning_types: List of lists that contain valid warning type tags [list of lists]
+        - suppression_index: Suppression comments found in each source file [dict] [optional]
+        - query_filters: Previously parsed query filters from parse_query_filters [tuple] [optional]
+        - filtering_index: Previously created path index from create_path_index [dict] [optional]
+
+    Outputs:
+        - output_file: All filtered results are written to the output_file
+        - filtered_warnings: List of warnings that passed filtering [list of dict]
+    """
+
+    # Print a log message
+    logging.info('')
+    logging.info('\tFiltering results...')
+    logging.info('\t>> Executing command: filter_results.filter_results(<warning_list>, %s, %s, %s, %s, %r, %r)',
+                 output_file, filtering_file, ignore_query_file, source_root, enable_micro_filtering,
+                 enable_external_warnings)
+    logging.info('\t>> From directory: %s', os.getcwd())
+
+    # Filter the warnings
+    filtered_warnings = list(filter_warnings(warning_list, filtering_file, ignore_query_file, source_root,
+                                             enable_micro_filtering, enable_external_warnings, valid_warning_types,
+                                             suppression_index, query_filters, filtering_index))
+
+    # Print the source line cache statistics
+    log_source_cache_stats()
 
     # Write out the results
     translate_results.create_scrub_output_file(filtered_warnings, output_file)
+
+    return filtered_warnings
@@ -1,21 +1,131 @@
 import os
 import re
+import json
 import logging
+from concurrent import futures
+from scrub.utils import translate_results
 
+DISTRIBUTION_INDEX_VERSION = 1
 
-def move_warnings(warning_file, source_dir):
+
+def write_local_warnings(local_scrub_warning_file, warnings):
+    """This function writes a group of warnings to a distributed SCRUB output file.
+
+    Inputs:
+        - local_scrub_warning_file: Absolute path to the distributed SCRUB output file [string]
+        - warnings: List of SCRUB-formatted warning text to be written [list of strings]
+
+    Outputs:
+        - local_scrub_warning_file: The warnings are appended to the output file
+    """
+
+    # Create a .scrub directory if it doesn't already exists
+    local_scrub_directory = os.path.dirname(local_scrub_warning_file)
+    if not os.path.exists(local_scrub_directory):
+        os.mkdir(local_scrub_directory)
+        os.chmod(local_scrub_directory, 511)
+
+    # Write the warnings to the output file
+    with open(local_scrub_warning_file, 'a') as output_fh:
+        output_fh.write(''.join('%s\n' % warning for warning in warnings))
+
+    # Change the permissions of the output file
+    os.chmod(local_scrub_warning_file, 438)
+
+
+def distribute_warnings(warnings, warning_type, source_dir, max_workers=1):
+    """This function writes each warning to the distributed SCRUB output file next to its source file.
+
+    Inputs:
+        - warnings: List of (file, text) pairs for each SCRUB-formatted warning [list of tuples]
+        - warning_type: Name of the distributed SCRUB output file [string]
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - max_workers: Number of threads to use while writing the distributed files [int] [optional]
+
+    Outputs:
+        - A series of .scrub directories and output files will be created as necessary
+        - scrub_dirs: List of absolute paths to the .scrub directories that were written to [list of strings]
+    """
+
+    # Initialize the variables
+    distributed_warnings = {}
+    file_status = {}
+
+    # Group the warnings by output file
+    for warning_file, warning in warnings:
+        warning_file_absolute = os.path.normpath(source_dir + '/' + warning_file)
+
+        # Make sure the warning file is within the source root, but not at the source root
+        if warning_file_absolute not in file_status:
+            file_status[warning_file_absolute] = (os.path.exists(warning_file_absolute) and
+                                                  (source_dir != os.path.dirname(warning_file_absolute)))
+        if file_status[warning_file_absolute]:
+            # Create the scrub output path
+            local_scrub_warning_file = os.path.normpath(os.path.dirname(warning_file_absolute) + '/.scrub/' +
+                                                        warning_type)
+
+            # Add the warning to the output file
+            distributed_warnings.setdefault(local_scrub_warning_file, []).append(
+                warning.replace(warning_file, os.path.basename(warning_file)))
+
+    # Write the warnings to each directory
+    if max_workers > 1 and len(distributed_warnings) > 1:
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for write_job in [executor.submit(write_local_warnings, local_scrub_warning_file, warnings)
+                              for local_scrub_warning_file, warnings in distributed_warnings.items()]:
+                write_job.result()
+    else:
+        for local_scrub_warning_file, warnings in distributed_warnings.items():
+            write_local_warnings(local_scrub_warning_file, warnings)
+
+    return sorted(set(os.path.dirname(local_scrub_warning_file) for local_scrub_warning_file in distributed_warnings))
+
+
+def move_warning_list(warning_list, warning_type, source_dir, max_workers=1):
+    """This function moves a list of filtered warnings to be co-located with the source file of interest.
+
+    Inputs:
+        - warning_list: List of filtered warnings, with paths relative to the source directory [list of dict]
+        - warning_type: Name of the distributed SCRUB output file [string]
+        - source_dir: Full path to the top-level directory of the source code [string]
+        - max_workers: Number of threads to use while writing the distributed files [int] [optional]
+
+    Outputs:
+        - A series of .scrub directories and output files will be created as necessary
+        - scrub_dirs: List of absolute paths to the .scrub directories that were written to [list of strings]
+    """
+
+    # Print a status message
+    logging.info('')
+    logging.info('\tMoving results...')
+    logging.info('\t>> Executing command: move_warnings.move_warning_list(<warning_list>, %s, %s)', warning_type,
+                 source_dir)
+    logging.info('\t>> From directory: %s', os.getcwd())
+
+    # Format the warnings that have not been suppressed
+    warnings = [(warning['file'].strip(), translate_results.format_scrub_warning(warning)[:-1])
+                for warning in warning_list if not warning['suppress']]
+
+    # Distribute the warnings
+    return distribute_warnings(warnings, warning_type, os.path.abspath(source_dir), max_workers)
+
+
+def move_warnings(warning_file, source_dir, max_workers=1):
     """This function moves warnings to be co-located with the source file of interest.
 
     Inputs:
         - warning_file: Full path to the file containing SCRUB-formatted warnings [string]
         - source_dir: Full path to the top-level directory of the source code [string]
+        - max_workers: Number of threads to use while writing the distributed files [int] [optional]
 
     Outputs:
         - A series of .scrub directories and output files will be created as necessary
+        - scrub_dirs: List of absolute paths to the .scrub directories that were written to [list of strings]
     """
 
     # Initialize the variables
     warning_type = warning_file.split(os.sep)[-1].strip()
+    warnings = []
 
     # Print a status message
     logging.info('')
@@ -27,9 +137,6 @@ def move_warnings(warning_file, source_dir):
     with open(warning_file, 'r') as input_fh:
         input_data = input_fh.readlines()
 
-    # Update the source root to make it absolute
-    source_dir = os.path.abspath(source_dir)
-
     # Iterate through every line of the file
     for i in range(0, len(input_data)):
         # Set the line
@@ -40,35 +147,100 @@ def move_warnings(warning_file, source_dir):
             # Add the line to the warning text
             warning = line
 
-            # Get the warning file
-            warning_file = line.split(":")[1].strip()
-            warning_file_absolute = os.path.normpath(source_dir + '/' + warning_file)
+            # Get the rest of the warning text
+            j = i + 1
+            while j < len(input_data) and input_data[j].strip() != '':
+                warning = warning + input_data[j]
+
+                # Increment the line
+                j = j + 1
+
+            # Add the warning to the list
+            warnings.append((line.split(":")[1].strip(), warning))
+
+    # Distribute the warnings
+    return distribute_warnings(warnings, warning_type, os.path.abspath(source_dir), max_workers)
+
+
+def index_warning_file(warning_file, source_dir):
+    """This function finds the location of every warning in a SCRUB output file.
+
+    Inputs:
+        - warning_file: Absolute path to the SCRUB-formatted file of interest [string]
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+
+    Outputs:
+        - warning_locations: Dictionary mapping each source directory to the byte offset and length of each of its
+                             warnings [dict]
+    """
+
+    # Initialize the variables
+    warning_locations = {}
+    warning_dir = None
+    warning_start = 0
+    offset = 0
+
+    # Iterate through every line of the file
+    with open(warning_file, 'rb') as input_fh:
+        for raw_line in input_fh:
+            line = raw_line.decode('utf-8', 'replace')
 
-            # Make sure the warning file is within the source root, but not at the source root
-            if os.path.exists(warning_file_absolute) and (source_dir != os.path.dirname(warning_file_absolute)):
-                # Get the rest of the warning text
-                j = i + 1
-                while input_data[j].strip() != '':
-                    warning = warning + input_data[j]
+            # Close out the current warning at the end of its text
+            if warning_dir is not None and line.strip() == '':
+                warning_locations.setdefault(warning_dir, []).append([warning_start, offset - warning_start])
+                warning_dir = None
 
-                    # Increment the line
-                    j = j + 1
+            # Start a new warning
+            elif warning_dir is None and re.search(translate_results.WARNING_LINE_REGEX, line):
+                warning_file_path = line.split(':')[1].strip()
+                warning_dir = os.path.dirname(os.path.normpath(os.path.join(source_dir, warning_file_path)))
+                if warning_dir.startswith(source_dir + '/') or warning_dir == source_dir:
+                    warning_dir = os.path.relpath(warning_dir, source_dir)
+                warning_start = offset
 
-                # Get the warning directory
-                warning_directory = os.path.dirname(warning_file_absolute)
+            # Update the byte offset
+            offset = offset + len(raw_line)
 
-                # Create the scrub output paths
-                local_scrub_directory = os.path.normpath(warning_directory + '/.scrub')
-                local_scrub_warning_file = os.path.normpath(local_scrub_directory + '/' + warning_type)
+    # Close out the last warning
+    if warning_dir is not None:
+        warning_locations.setdefault(warning_dir, []).append([warning_start, offset - warning_start])
+
+    return warning_locations
+
+
+def create_distribution_index(warning_files, source_dir, index_file):
+    """This function creates a single index of the warnings for each source directory instead of distributing them.
+
+    Inputs:
+        - warning_files: List of absolute paths to the filtered SCRUB output files [list of strings]
+        - source_dir: Full path to the top-level directory of the source code [string]
+        - index_file: Absolute path to the distribution index file to be created [string]
+
+    Outputs:
+        - index_file: JSON file mapping each source directory to the location of its warnings in each output file
+    """
+
+    # Print a status message
+    logging.info('')
+    logging.info('\tIndexing results...')
+    logging.info('\t>> Executing command: move_warnings.create_distribution_index(<warning_files>, %s, %s)',
+                 source_dir, index_file)
+    logging.info('\t>> From directory: %s', os.getcwd())
+
+    # Initialize the variables
+    source_dir = os.path.abspath(source_dir)
+    index_data = {'version': DISTRIBUTION_INDEX_VERSION, 'source_dir': source_dir, 'files': {}, 'dirs': {}}
 
-                # Create a .scrub directory if it doesn't already exists
-                if not os.path.exists(local_scrub_directory):
-                    os.mkdir(local_scrub_directory)
-                    os.chmod(local_scrub_directory, 511)
+    # Index each of the output files
+    for warning_file in sorted(warning_files):
+        warning_type = os.path.basename(warning_file)
+        index_data['files'][warning_type] = os.path.abspath(warning_file)
+        for warning_dir, warning_locations in index_warning_file(warning_file, source_dir).items():
+            index_data['dirs'].setdefault(warning_dir, {})[warning_type] = warning_locations
 
-                # Write the warning to the output file
-                with open(local_scrub_warning_file, 'a') as output_fh:
-                    output_fh.write('%s\n' % (warning.replace(warning_file, os.path.basename(warning_file))))
+    # Write out the index
+    with open(index_file, 'w') as output_fh:
+        json.dump(index_data, output_fh)
 
-                # Change the permissions of the output file
-                os.chmod(local_scrub_warning_file, 438)
+    # Change the permissions of the output file
+    os.chmod(index_file, 438)
@@ -0,0 +1,149 @@
+import os
+import json
+import logging
+from concurrent import futures
+
+SUPPRESSION_MARKERS = ('scrub_ignore_warning', '@suppress')
+
+
+def get_tag_list(raw_valid_warning_types):
+    """This function combines the valid tags for every tool into a single sorted list.
+
+    Inputs:
+        - raw_valid_warning_types: List of lists containing valid types for each tool [list of list of strings]
+
+    Outputs:
+        - tag_list: Sorted list of unique valid tags [list of strings]
+    """
+
+    # Combine the tags and remove duplicates
+    tag_list = sorted(set(tag for valid_type_set in raw_valid_warning_types for tag in valid_type_set))
+
+    return tag_list
+
+
+def scan_source_file(source_file, tag_list):
+    """This function finds every suppression comment in a source code file.
+
+    Inputs:
+        - source_file: Absolute path to the source code file of interest [string]
+        - tag_list: List of valid tags [list of strings]
+
+    Outputs:
+        - suppressions: Dictionary mapping line numbers to the valid tags found on each suppression line [dict]
+    """
+
+    # Initialize variables
+    suppressions = {}
+
+    # Read in the file
+    with open(source_file, 'r') as input_fh:
+        source_data = input_fh.read().lower()
+
+    # Only examine individual lines if the file contains a suppression
+    if any(marker in source_data for marker in SUPPRESSION_MARKERS):
+        for line_number, line in enumerate(source_data.split('\n'), 1):
+            if any(marker in line for marker in SUPPRESSION_MARKERS):
+                suppressions[line_number] = [tag for tag in tag_list if tag in line]
+
+    return suppressions
+
+
+def load_index_file(index_file, tag_list):
+    """This function imports a previously generated suppression index.
+
+    Inputs:
+        - index_file: Absolute path to the suppression index file [string]
+        - tag_list: List of valid tags [list of strings]
+
+    Outputs:
+        - index_data: Dictionary of indexed files, or an empty dictionary if the index is missing or stale [dict]
+    """
+
+    # Initialize variables
+    index_data = {}
+
+    # Import the data
+    if os.path.isfile(index_file):
+        try:
+            with open(index_file, 'r') as input_fh:
+                raw_index = json.load(input_fh)
+
+            # The whole index is stale if the valid tags have changed
+            if raw_index.get('tags') == tag_list:
+                index_data = raw_index.get('files', {})
+
+        except ValueError:
+            logging.warning('\tSuppression index %s could not be read. Rebuilding the index.', index_file)
+
+    return index_data
+
+
+def build_suppression_index(source_files, raw_valid_warning_types, index_file, max_workers=None):
+    """This function scans every source file for suppression comments and stores the results in an index.
+
+    Inputs:
+        - source_files: List of absolute paths to the source code files of interest [list of strings]
+        - raw_valid_warning_types: List of lists containing valid types for each tool [list of list of strings]
+        - index_file: Absolute path to the suppression index file [string]
+        - max_workers: Number of threads to use while scanning files [int] [optional]
+
+    Outputs:
+        - suppression_index: Dictionary mapping each file to a dictionary of line numbers and tags [dict]
+        - index_file: The updated index is written to index_file
+    """
+
+    # Print a status message
+    logging.info('')
+    logging.info('\tIndexing suppression comments...')
+    logging.info('\t>> Executing command: suppression_index.build_suppression_index(<source_files>, %s)', index_file)
+    logging.info('\t>> From directory: %s', os.getcwd())
+
+    # Initialize variables
+    tag_list = get_tag_list(raw_valid_warning_types)
+    previous_index = load_index_file(index_file, tag_list)
+    index_data = {}
+    scan_list = []
+
+    # Determine which files need to be scanned
+    for source_file in source_files:
+        try:
+            file_stat = os.stat(source_file)
+        except OSError:
+            continue
+
+        # Reuse the previous entry if the file has not changed
+        previous_entry = previous_index.get(source_file)
+        if (previous_entry and previous_entry['mtime'] == file_stat.st_mtime_ns and
+                previous_entry['size'] == file_stat.st_size):
+            index_data[source_file] = previous_entry
+        else:
+            index_data[source_file] = {'mtime': file_stat.st_mtime_ns, 'size': file_stat.st_size, 'lines': {}}
+            scan_list.append(source_file)
+
+    # Scan the new and modified files
+    reused_count = len(index_data) - len(scan_list)
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        scan_jobs = {executor.submit(scan_source_file, source_file, tag_list): source_file
+                     for source_file in scan_list}
+        for scan_job in futures.as_completed(scan_jobs):
+            source_file = scan_jobs[scan_job]
+            try:
+                index_data[source_file]['lines'] = {str(line): tags for line, tags in scan_job.result().items()}
+            except (IOError, UnicodeDecodeError):
+                # Leave the file out of the index so the line is read directly during filtering
+                del index_data[source_file]
+
+    # Write out the index
+    with open(index_file, 'w') as output_fh:
+        json.dump({'tags': tag_list, 'files': index_data}, output_fh)
+
+    # Convert the index into a lookup table
+    suppression_index = {}
+    for source_file, file_entry in index_data.items():
+        suppression_index[source_file] = {int(line): set(tags) for line, tags in file_entry['lines'].items()}
+
+    # Print a status message
+    logging.info('\tIndexed %d files (%d scanned, %d reused)', len(index_data), len(scan_list), reused_count)
+
+    return suppression_index
@@ -0,0 +1,314 @@
+import os
+import re
+import glob
+import shutil
+import logging
+from scrub.utils import result_cache
+from scrub.utils import workspaces
+from scrub.utils import translate_results
+from scrub.utils.filtering import create_file_list
+from scrub.utils.filtering import filter_results
+
+HEADER_EXTENSIONS = ('.h', '.hh', '.hp', '.hpp', '.hxx', '.h++', '.H', '.HPP', '.inc', '.inl', '.tcc')
+INCLUDE_PATTERN = re.compile(r'^[ \t]*#[ \t]*(?:include|import)[ \t]*[<"]([^>"\n]+)[>"]', re.MULTILINE)
+
+
+def get_git_changed_files(source_dir, base_revision):
+    """This function lists the files that differ from a git revision, including untracked files.
+
+    Inputs:
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - base_revision: Git revision to compare against [string]
+
+    Outputs:
+        - changed_files: List of changed file paths relative to source_dir, or None if git fails [list of strings]
+    """
+
+    # Find the modified, added, and removed files
+    diff_output = workspaces.run_git_command(source_dir, ['diff', '--name-only', '-z', '--relative', base_revision,
+                                                          '--'])
+    if diff_output is None:
+        return None
+
+    # Find the untracked files
+    untracked_files = create_file_list.run_git_ls_files(source_dir, ['--others', '--exclude-standard'])
+    if untracked_files is None:
+        return None
+
+    return sorted(set(filter(None, diff_output.split('\0'))) | set(untracked_files))
+
+
+def get_previous_changed_files(source_dir, previous_dir, source_files, source_hashes_file=None, max_workers=None):
+    """This function lists the files that have changed since a previous SCRUB run.
+
+    Inputs:
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - previous_dir: Absolute path to the .scrub directory of the previous run [string]
+        - source_files: List of paths to the files that will be analyzed, relative to source_dir [list of strings]
+        - source_hashes_file: Absolute path to the file used to store file hashes for the next run [string] [optional]
+        - max_workers: Number of threads to use while hashing files [int] [optional]
+
+    Outputs:
+        - changed_files: List of changed file paths relative to source_dir, or None if they cannot be determined
+                         [list of strings]
+    """
+
+    # Compare the file hashes, if the previous run recorded them
+    previous_hashes = result_cache.read_file_hashes(os.path.join(previous_dir, 'cache', 'SCRUBSourceHashes'))
+    if previous_hashes:
+        current_hashes = result_cache.get_file_hashes(source_dir, source_files, source_hashes_file, max_workers)
+        return sorted(source_file for source_file in set(current_hashes) | set(previous_hashes)
+                      if current_hashes.get(source_file, [None] * 3)[2] !=
+                      previous_hashes.get(source_file, [None] * 3)[2])
+
+    # Otherwise, compare the modification times to the start of the previous run
+    previous_conf_file = os.path.join(previous_dir, 'scrub.cfg')
+    previous_list_file = os.path.join(previous_dir, 'SCRUBAnalysisFilteringList')
+    if not (os.path.isfile(previous_conf_file) and os.path.isfile(previous_list_file)):
+        return None
+    previous_start_time = os.path.getmtime(previous_conf_file)
+    with open(previous_list_file, 'r') as input_fh:
+        previous_files = set(line.strip() for line in input_fh if line.strip())
+
+    # Find the files that have been added, removed, or modified
+    changed_files = set(source_files) ^ previous_files
+    for source_file in set(source_files) & previous_files:
+        try:
+            if os.path.getmtime(os.path.join(source_dir, source_file)) >= previous_start_time:
+                changed_files.add(source_file)
+        except OSError:
+            changed_files.add(source_file)
+
+    return sorted(changed_files)
+
+
+def get_including_files(source_dir, source_files, changed_files):
+    """This function finds the files that include a changed header, either directly or through other headers.
+    Includes are matched by file name, so a header with the same name as a changed header is treated as changed.
+
+    Inputs:
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - source_files: List of paths to the files that will be analyzed, relative to source_dir [list of strings]
+        - changed_files: List of changed file paths relative to source_dir [list of strings]
+
+    Outputs:
+        - including_files: List of unchanged file paths that include a changed header [list of strings]
+    """
+
+    # Initialize variables
+    changed_headers = set(os.path.basename(changed_file) for changed_file in changed_files
+                          if changed_file.endswith(HEADER_EXTENSIONS))
+    included_by = {}
+    including_files = set()
+
+    # Only headers can change the results of other files
+    if not changed_headers:
+        return []
+
+    # Find the includes of every file
+    for source_file in source_files:
+        try:
+            with open(os.path.join(source_dir, source_file), 'r', errors='replace') as input_fh:
+                source_data = input_fh.read()
+        except OSError:
+            continue
+        for include in INCLUDE_PATTERN.findall(source_data):
+            included_by.setdefault(os.path.basename(include.strip()), set()).add(source_file)
+
+    # Follow the includes from each changed header
+    pending_headers = list(changed_headers)
+    while pending_headers:
+        for source_file in included_by.get(pending_headers.pop(), []):
+            if source_file in including_files:
+                continue
+            including_files.add(source_file)
+
+            # Files that include a header that includes a changed header are also affected
+            if source_file.endswith(HEADER_EXTENSIONS) and os.path.basename(source_file) not in changed_headers:
+                changed_headers.add(os.path.basename(source_file))
+                pending_headers.append(os.path.basename(source_file))
+
+    return sorted(including_files - set(changed_files))
+
+
+def list_source_files(scrub_conf_data, source_list_file):
+    """This function lists the files that will be analyzed, using the file list settings of the filtering stage.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - source_list_file: Absolute path to the file list to be created [string]
+
+    Outputs:
+        - source_files: List of paths to the files that will be analyzed, relative to source_dir [list of strings]
+    """
+
+    # Create the file list
+    create_file_list.create_file_list(scrub_conf_data.get('source_dir'), source_list_file,
+                                      scrub_conf_data.get('analysis_filters'), '',
+                                      int(scrub_conf_data.get('filter_threads')),
+                                      scrub_conf_data.get('filter_file_backend'),
+                                      scrub_conf_data.get('filter_git_untracked'),
+                                      scrub_conf_data.get('walk_cache_file'))
+
+    # Import the file list
+    with open(source_list_file, 'r') as input_fh:
+        source_files = [line.strip() for line in input_fh if line.strip()]
+
+    return source_files
+
+
+def initialize_incremental(scrub_conf_data, incremental_base):
+    """This function finds the files that have changed and preserves the previous results, before they are removed.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of values read from configuration file, to be updated [dict]
+        - incremental_base: Git revision or previous .scrub directory to compare against [string]
+    """
+
+    # Initialize variables
+    source_dir = scrub_conf_data.get('source_dir')
+    scrub_cache_dir = scrub_conf_data.get('scrub_cache_dir')
+    incremental_results_dir = os.path.normpath(scrub_cache_dir + '/incremental_results')
+    changed_files_file = os.path.normpath(scrub_cache_dir + '/SCRUBChangedFiles')
+    source_list_file = os.path.normpath(scrub_cache_dir + '/SCRUBIncrementalFiles')
+
+    # Find the results of the previous run
+    compare_previous_run = os.path.isdir(incremental_base)
+    if os.path.isdir(os.path.join(incremental_base, '.scrub')):
+        previous_dir = os.path.abspath(os.path.join(incremental_base, '.scrub'))
+    elif compare_previous_run:
+        previous_dir = os.path.abspath(incremental_base)
+    else:
+        previous_dir = scrub_conf_data.get('scrub_analysis_dir')
+
+    # Create the cache directory if it doesn't exist
+    if not os.path.exists(scrub_cache_dir):
+        os.makedirs(scrub_cache_dir)
+
+    # Find the changed files
+    source_files = None
+    if compare_previous_run:
+        source_files = list_source_files(scrub_conf_data, source_list_file)
+        changed_files = get_previous_changed_files(source_dir, previous_dir, source_files,
+                                                   os.path.normpath(scrub_cache_dir + '/SCRUBSourceHashes'),
+                                                   int(scrub_conf_data.get('filter_threads')))
+    else:
+        changed_files = get_git_changed_files(source_dir, incremental_base)
+
+    # The results of files that include a changed header must also be updated
+    if changed_files and any(changed_file.endswith(HEADER_EXTENSIONS) for changed_file in changed_files):
+        if source_files is None:
+            source_files = list_source_files(scrub_conf_data, source_list_file)
+        changed_files = sorted(set(changed_files) | set(get_including_files(source_dir, source_files,
+                                                                            changed_files)))
+
+    # Preserve the filtered results of the previous run
+    if os.path.exists(incremental_results_dir):
+        shutil.rmtree(incremental_results_dir)
+    os.mkdir(incremental_results_dir)
+    previous_results_files = glob.glob(previous_dir + '/*.scrub')
+    for previous_results_file in previous_results_files:
+        shutil.copy(previous_results_file, incremental_results_dir)
+
+    # Perform a complete analysis if the changes can not be determined
+    if changed_files is None or not previous_results_files:
+        print('\nWARNING: Unable to find the changes since %s or the results of the previous run. '
+              'Performing a complete analysis.\n' % incremental_base)
+        return
+
+    # Record the changed files
+    with open(changed_files_file, 'w') as output_fh:
+        for changed_file in changed_files:
+            output_fh.write('%s\n' % changed_file)
+
+    # Add the values to the dictionary
+    scrub_conf_data.update({'incremental_changed_files': changed_files})
+    scrub_conf_data.update({'incremental_changed_files_file': changed_files_file})
+    scrub_conf_data.update({'incremental_results_dir': incremental_results_dir})
+
+    # Print a status message
+    print('\nIncremental analysis: %d files have changed since %s\n' % (len(changed_files), incremental_base))
+
+
+def get_changed_paths(scrub_conf_data):
+    """This function gets the absolute paths of the files that have changed.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of SCRUB configuration variables [dict]
+
+    Outputs:
+        - changed_paths: Set of absolute paths to each changed file [set of strings]
+    """
+
+    return set(os.path.normpath(os.path.join(scrub_conf_data.get('source_dir'), changed_file))
+               for changed_file in scrub_conf_data.get('incremental_changed_files'))
+
+
+def get_changed_warnings(warning_list, scrub_conf_data):
+    """This function selects the warnings that reference a changed file.
+
+    Inputs:
+        - warning_list: List of warnings with absolute file paths [list of dict]
+        - scrub_conf_data: Dictionary of SCRUB configuration variables [dict]
+
+    Outputs:
+        - changed_warnings: List of warnings that reference a changed file [list of dict]
+    """
+
+    # Initialize variables
+    changed_paths = get_changed_paths(scrub_conf_data)
+
+    return [warning for warning in warning_list if os.path.normpath(warning['file']) in changed_paths]
+
+
+def merge_previous_warnings(filtered_warnings, output_file, scrub_conf_data, query_filters=None,
+                            filtering_index=None):
+    """This function combines new warnings for the changed files with the previous warnings for every other file.
+
+    Inputs:
+        - filtered_warnings: List of filtered warnings that reference a changed file [list of dict]
+        - output_file: Absolute path to the filtered SCRUB output file, which is updated [string]
+        - scrub_conf_data: Dictionary of SCRUB configuration variables [dict]
+        - query_filters: Query filters from filter_results.parse_query_filters [tuple] [optional]
+        - filtering_index: Path index from filter_results.create_path_index [dict] [optional]
+
+    Outputs:
+        - merged_warnings: List of previous and new warnings, with updated identifiers [list of dict]
+    """
+
+    # Initialize variables
+    source_dir = scrub_conf_data.get('source_dir')
+    source_prefix = os.path.normpath(source_dir) + '/'
+    previous_file = os.path.join(scrub_conf_data.get('incremental_results_dir'), os.path.basename(output_file))
+    changed_paths = get_changed_paths(scrub_conf_data)
+    merged_warnings = []
+    warning_counts = {}
+
+    # Keep the previous warnings for unchanged files, unless the filtering rules now exclude them
+    if os.path.isfile(previous_file):
+        for warning in translate_results.parse_scrub(previous_file, source_dir):
+            if os.path.normpath(warning['file']) in changed_paths:
+                continue
+            if filter_results.baseline_filtering_check(warning['file'], scrub_conf_data.get('filtering_output_file'),
+                                                       filtering_index, source_dir):
+                continue
+            if filter_results.ignore_query_check(warning['tool'], warning['query'],
+                                                 scrub_conf_data.get('query_filters'), query_filters):
+                continue
+            warning['file'] = warning['file'].replace(source_prefix, '')
+            merged_warnings.append(warning)
+
+    # Add the new warnings and update the identifiers so they are unique
+    for warning in merged_warnings + filtered_warnings:
+        warning_counts[warning['tool']] = warning_counts.get(warning['tool'], 0) + 1
+        warning['id'] = warning['tool'] + str(warning_counts[warning['tool']]).zfill(3)
+    merged_warnings = merged_warnings + filtered_warnings
+
+    # Print a status message
+    logging.info('\tMerged %d new warnings with %d previous warnings', len(filtered_warnings),
+                 len(merged_warnings) - len(filtered_warnings))
+
+    # Write out the results
+    translate_results.create_scrub_output_file(merged_warnings, output_file)
+
+    return merged_warnings
@@ -0,0 +1,465 @@
+import os
+import re
+import glob
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import logging
+import tempfile
+from concurrent import futures
+import scrub
+from scrub.utils.filtering import create_file_list
+
+RESULT_CACHE_VERSION = 1
+SOURCE_HASHES_VERSION = 1
+SOURCE_DIR_TOKEN = '<SCRUB_SOURCE_DIR>'
+ENTRY_FILE = 'SCRUBCacheEntry'
+
+
+def initialize_result_cache(scrub_conf_data):
+    """This function prepares the result cache and hashes the source files that will be analyzed.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of values read from configuration file, to be updated [dict]
+    """
+
+    # Check to see if the cache is enabled
+    if not scrub_conf_data.get('result_cache'):
+        return
+
+    # Set the cache directory
+    result_cache_dir = scrub_conf_data.get('result_cache_dir')
+    if not result_cache_dir:
+        result_cache_dir = os.path.normpath(scrub_conf_data.get('scrub_cache_dir') + '/results')
+    elif not os.path.isabs(result_cache_dir):
+        result_cache_dir = os.path.normpath(scrub_conf_data.get('source_dir') + '/' + result_cache_dir)
+    scrub_conf_data.update({'result_cache_dir': result_cache_dir})
+
+    # Create the cache directory if it doesn't exist
+    if not os.path.exists(result_cache_dir):
+        os.makedirs(result_cache_dir)
+
+    # Find the source files that will be analyzed
+    source_list_file = os.path.normpath(scrub_conf_data.get('scrub_cache_dir') + '/SCRUBResultCacheFiles')
+    create_file_list.create_file_list(scrub_conf_data.get('source_dir'), source_list_file,
+                                      scrub_conf_data.get('analysis_filters'), '',
+                                      int(scrub_conf_data.get('filter_threads')),
+                                      scrub_conf_data.get('filter_file_backend'),
+                                      scrub_conf_data.get('filter_git_untracked'),
+                                      scrub_conf_data.get('walk_cache_file'))
+    with open(source_list_file, 'r') as input_fh:
+        source_files = [line.strip() for line in input_fh if line.strip()]
+
+    # Hash the source files
+    source_hash = hash_source_files(scrub_conf_data.get('source_dir'), source_files,
+                                    os.path.normpath(scrub_conf_data.get('scrub_cache_dir') + '/SCRUBSourceHashes'),
+                                    int(scrub_conf_data.get('filter_threads')))
+    scrub_conf_data.update({'result_cache_source_hash': source_hash})
+
+
+def hash_file(file_path):
+    """This function calculates the hash of the contents of a file.
+
+    Inputs:
+        - file_path: Absolute path to the file of interest [string]
+
+    Outputs:
+        - file_hash: SHA-256 hash of the file contents [string]
+    """
+
+    # Initialize variables
+    file_hash = hashlib.sha256()
+
+    # Read the file in blocks
+    with open(file_path, 'rb') as input_fh:
+        for block in iter(lambda: input_fh.read(1048576), b''):
+            file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+def get_file_hashes(source_dir, source_files, source_hashes_file=None, max_workers=None):
+    """This function calculates the hash of every source file, reusing the hashes of files that have not been modified.
+
+    Inputs:
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - source_files: List of paths to each file, relative to source_dir [list of strings]
+        - source_hashes_file: Absolute path to the file used to store file hashes between runs [string] [optional]
+        - max_workers: Number of threads to use while hashing files [int] [optional]
+
+    Outputs:
+        - file_hashes: Dictionary of [size, modification time, hash] for each file that exists [dict]
+    """
+
+    # Initialize variables
+    previous_hashes = read_file_hashes(source_hashes_file, source_dir)
+    file_hashes = {}
+    pending_files = []
+
+    # Reuse the hashes of files that have not been modified
+    for source_file in sorted(set(source_files)):
+        try:
+            file_stat = os.stat(os.path.join(source_dir, source_file))
+        except OSError:
+            continue
+        file_key = [file_stat.st_size, file_stat.st_mtime_ns]
+        previous_hash = previous_hashes.get(source_file)
+
+        # Files modified too recently may change again without a new modification time, so they are hashed again
+        if (previous_hash and previous_hash[:2] == file_key and
+                time.time() - file_stat.st_mtime_ns / 1e9 >= create_file_list.RACY_MTIME_WINDOW):
+            file_hashes[source_file] = previous_hash
+        else:
+            file_hashes[source_file] = file_key + [None]
+            pending_files.append(source_file)
+
+    # Hash the remaining files
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for source_file, file_hash in zip(pending_files,
+                                          executor.map(hash_file, [os.path.join(source_dir, source_file)
+                                                                   for source_file in pending_files])):
+            file_hashes[source_file][2] = file_hash
+
+    # Store the file hashes
+    if source_hashes_file and os.path.isdir(os.path.dirname(source_hashes_file)):
+        with open(source_hashes_file, 'w') as output_fh:
+            json.dump({'version': SOURCE_HASHES_VERSION, 'source_dir': source_dir, 'files': file_hashes}, output_fh)
+
+    return file_hashes
+
+
+def read_file_hashes(source_hashes_file, source_dir=None):
+    """This function imports the file hashes stored by a previous run.
+
+    Inputs:
+        - source_hashes_file: Absolute path to the file used to store file hashes between runs [string]
+        - source_dir: Only use the hashes if they describe this source directory [string] [optional]
+
+    Outputs:
+        - file_hashes: Dictionary of [size, modification time, hash] for each file, or an empty dictionary [dict]
+    """
+
+    # Initialize variables
+    file_hashes = {}
+
+    # Import the data
+    if source_hashes_file and os.path.isfile(source_hashes_file):
+        try:
+            with open(source_hashes_file, 'r') as input_fh:
+                hash_data = json.load(input_fh)
+            if (hash_data.get('version') == SOURCE_HASHES_VERSION and
+                    (source_dir is None or hash_data.get('source_dir') == source_dir)):
+                file_hashes = hash_data.get('files', {})
+        except ValueError:
+            logging.warning('\tSource hash file %s could not be read. Hashing every file.', source_hashes_file)
+
+    return file_hashes
+
+
+def hash_source_files(source_dir, source_files, source_hashes_file=None, max_workers=None):
+    """This function calculates a single hash of the names and contents of every source file.
+
+    Inputs:
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - source_files: List of paths to each file, relative to source_dir [list of strings]
+        - source_hashes_file: Absolute path to the file used to store file hashes between runs [string] [optional]
+        - max_workers: Number of threads to use while hashing files [int] [optional]
+
+    Outputs:
+        - source_hash: SHA-256 hash of the source files [string]
+    """
+
+    # Initialize variables
+    source_hash = hashlib.sha256()
+    file_hashes = get_file_hashes(source_dir, source_files, source_hashes_file, max_workers)
+
+    # Combine the hashes
+    for source_file in sorted(file_hashes):
+        source_hash.update(('%s\0%s\n' % (source_file, file_hashes[source_file][2])).encode('utf-8',
+                                                                                             'surrogateescape'))
+
+    return source_hash.hexdigest()
+
+
+def hash_path(path):
+    """This function calculates the hash of a file, or of every file inside of a directory.
+
+    Inputs:
+        - path: Absolute path to the file or directory of interest [string]
+
+    Outputs:
+        - path_hash: SHA-256 hash of the contents [string]
+    """
+
+    # Hash a single file
+    if os.path.isfile(path):
+        return hash_file(path)
+
+    # Hash every file in the directory
+    path_hash = hashlib.sha256()
+    for directory, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            file_path = os.path.join(directory, file_name)
+            if os.path.isfile(file_path):
+                path_hash.update(('%s\0%s\n' % (os.path.relpath(file_path, path),
+                                                hash_file(file_path))).encode('utf-8', 'surrogateescape'))
+
+    return path_hash.hexdigest()
+
+
+def get_tool_version(module_object, tool_name, scrub_conf_data):
+    """This function determines the version of the tool used by an analysis module.
+
+    Inputs:
+        - module_object: Tool analysis module [module]
+        - tool_name: Name of the tool, used to find its configuration values [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+
+    Outputs:
+        - version_number: Version number reported by the module, or None if it is not available [string]
+    """
+
+    # Use the version number found at startup, if it exists
+    if scrub_conf_data.get(tool_name + '_version'):
+        return scrub_conf_data.get(tool_name + '_version')
+
+    # Some modules do not report a version
+    if not hasattr(module_object, 'get_version_number'):
+        return None
+
+    # Each argument is either the configuration data or a configuration value with the same name
+    arguments = []
+    for argument in inspect.signature(module_object.get_version_number).parameters:
+        if argument == 'tool_conf_data':
+            arguments.append(scrub_conf_data.copy())
+        else:
+            arguments.append(scrub_conf_data.get(argument, ''))
+
+    return module_object.get_version_number(*arguments)
+
+
+def get_cache_key(module_object, tool_name, scrub_conf_data):
+    """This function calculates the result cache key for a single tool.
+
+    Inputs:
+        - module_object: Tool analysis module [module]
+        - tool_name: Name of the tool, used to find its configuration values [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+
+    Outputs:
+        - cache_key: SHA-256 hash of every input to the analysis [string]
+    """
+
+    # Initialize variables
+    source_dir = scrub_conf_data.get('source_dir')
+    tool_conf = {}
+    tool_files = {}
+
+    # Find the configuration values for the tool, independent of the location of the source code
+    for key in sorted(scrub_conf_data):
+        if not key.startswith(tool_name + '_'):
+            continue
+        value = scrub_conf_data.get(key)
+        if isinstance(value, str):
+            tool_conf[key] = re.sub(re.escape(source_dir) + r'(?![\w.-])', lambda match: SOURCE_DIR_TOKEN, value)
+
+            # Add the contents of any query, suite, or template files
+            input_path = os.path.normpath(os.path.join(source_dir, value))
+            if (value and key not in [tool_name + '_path', tool_name + '_build_dir'] and
+                    not (source_dir + '/').startswith(input_path + '/') and os.path.exists(input_path)):
+                tool_files[key] = hash_path(input_path)
+        else:
+            tool_conf[key] = value
+
+    # Assemble the key data
+    key_data = {'version': RESULT_CACHE_VERSION,
+                'scrub_version': scrub.__version__,
+                'tool': tool_name,
+                'source_lang': scrub_conf_data.get('source_lang'),
+                'source_hash': scrub_conf_data.get('result_cache_source_hash'),
+                'tool_conf': tool_conf,
+                'tool_files': tool_files,
+                'tool_version': get_tool_version(module_object, tool_name, scrub_conf_data)}
+
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_entry_dir(result_cache_dir, cache_key):
+    """This function finds the cache directory used to store the results for a cache key.
+
+    Inputs:
+        - result_cache_dir: Absolute path to the result cache directory [string]
+        - cache_key: Result cache key from get_cache_key [string]
+
+    Outputs:
+        - entry_dir: Absolute path to the cache entry directory [string]
+    """
+
+    return os.path.join(result_cache_dir, cache_key[:2], cache_key)
+
+
+def restore_results(result_cache_dir, cache_key, raw_results_dir, source_dir):
+    """This function copies cached results into the raw results directory.
+
+    Inputs:
+        - result_cache_dir: Absolute path to the result cache directory [string]
+        - cache_key: Result cache key from get_cache_key [string]
+        - raw_results_dir: Absolute path to the raw results directory [string]
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+
+    Outputs:
+        - restored: Indicator if the results were found in the cache [bool]
+    """
+
+    # Initialize variables
+    entry_dir = get_entry_dir(result_cache_dir, cache_key)
+    entry_file = os.path.join(entry_dir, ENTRY_FILE)
+
+    try:
+        # Import the entry
+        with open(entry_file, 'r') as input_fh:
+            entry_data = json.load(input_fh)
+        if entry_data.get('version') != RESULT_CACHE_VERSION:
+            return False
+
+        # Copy the results, updating the source directory
+        for results_file in entry_data.get('files', []):
+            with open(os.path.join(entry_dir, results_file), 'r') as input_fh:
+                results_data = input_fh.read()
+            with open(os.path.join(raw_results_dir, results_file), 'w') as output_fh:
+                output_fh.write(results_data.replace(SOURCE_DIR_TOKEN, source_dir))
+
+    except (OSError, ValueError):
+        return False
+
+    # Mark the entry as recently used
+    os.utime(entry_file, None)
+
+    return True
+
+
+def store_results(result_cache_dir, cache_key, tool_name, raw_results_dir, source_dir):
+    """This function copies the raw results of a tool into the result cache.
+
+    Inputs:
+        - result_cache_dir: Absolute path to the result cache directory [string]
+        - cache_key: Result cache key from get_cache_key [string]
+        - tool_name: Name of the tool, used to find its results files [string]
+        - raw_results_dir: Absolute path to the raw results directory [string]
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+    """
+
+    # Initialize variables
+    entry_dir = get_entry_dir(result_cache_dir, cache_key)
+    results_files = sorted(os.path.basename(results_file)
+                           for results_file in glob.glob(raw_results_dir + '/' + tool_name + '_*')
+                           if os.path.isfile(results_file))
+
+    # Create the entry in a temporary directory, so incomplete entries are never used
+    if not os.path.exists(os.path.dirname(entry_dir)):
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix='.' + cache_key, dir=os.path.dirname(entry_dir))
+
+    try:
+        # Copy the results, removing the source directory
+        for results_file in results_files:
+            with open(os.path.join(raw_results_dir, results_file), 'r') as input_fh:
+                results_data = input_fh.read()
+            with open(os.path.join(temp_dir, results_file), 'w') as output_fh:
+                output_fh.write(re.sub(re.escape(source_dir) + r'(?![\w.-])', lambda match: SOURCE_DIR_TOKEN,
+                                       results_data))
+
+        # Write out the entry
+        with open(os.path.join(temp_dir, ENTRY_FILE), 'w') as output_fh:
+            json.dump({'version': RESULT_CACHE_VERSION, 'tool': tool_name, 'files': results_files}, output_fh)
+
+        # Move the entry into place, unless another run has already stored it
+        os.rename(temp_dir, entry_dir)
+
+    except OSError:
+        pass
+
+    finally:
+        if os.path.exists(temp_dir):
+            shutil.rmtree(temp_dir)
+
+
+def evict_entries(result_cache_dir, max_size):
+    """This function removes the least recently used cache entries until the cache fits within its size limit.
+
+    Inputs:
+        - result_cache_dir: Absolute path to the result cache directory [string]
+        - max_size: Maximum size of the cache, in megabytes [int]
+    """
+
+    # Initialize variables
+    cache_entries = []
+    cache_size = 0
+
+    # Find the size and last use of every entry
+    for entry_file in glob.glob(result_cache_dir + '/*/*/' + ENTRY_FILE):
+        entry_dir = os.path.dirname(entry_file)
+        try:
+            entry_size = sum(os.path.getsize(os.path.join(entry_dir, file_name)) for file_name in os.listdir(entry_dir))
+            cache_entries.append((os.path.getmtime(entry_file), entry_size, entry_dir))
+        except OSError:
+            continue
+        cache_size = cache_size + entry_size
+
+    # Remove the oldest entries
+    for _, entry_size, entry_dir in sorted(cache_entries):
+        if cache_size <= max_size * 1048576:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        cache_size = cache_size - entry_size
+
+
+def run_cached_analysis(module_object, tool_name, scrub_conf_data, run_function):
+    """This function restores the results of a tool from the result cache, running the tool if they are not found.
+
+    Inputs:
+        - module_object: Tool analysis module that contains run_analysis [module]
+        - tool_name: Name of the tool, used to find its configuration values and results files [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - run_function: Function that runs the analysis and returns the exit code [function]
+
+    Outputs:
+        - tool_status: Exit code returned by the module, or 0 if the results were restored [int]
+    """
+
+    # Run the tool directly if the cache is not used, including incremental runs that only analyze some files
+    if (not (scrub_conf_data.get('result_cache') and scrub_conf_data.get(tool_name + '_warnings')) or
+            scrub_conf_data.get('incremental_changed_files') is not None):
+        return run_function()
+
+    # Initialize variables
+    result_cache_dir = scrub_conf_data.get('result_cache_dir')
+    raw_results_dir = scrub_conf_data.get('raw_results_dir')
+    source_dir = scrub_conf_data.get('source_dir')
+
+    # Calculate the cache key
+    try:
+        cache_key = get_cache_key(module_object, tool_name, scrub_conf_data)
+    except (OSError, ValueError):
+        print('\nWARNING: Unable to calculate the result cache key for %s. The result cache will not be used.\n' %
+              tool_name)
+        return run_function()
+
+    # Restore the results, if possible
+    if restore_results(result_cache_dir, cache_key, raw_results_dir, source_dir):
+        print('\n%s results were restored from the result cache: %s\n' %
+              (tool_name, get_entry_dir(result_cache_dir, cache_key)))
+        return 0
+
+    # Perform the analysis
+    tool_status = run_function()
+
+    # Store the results
+    if tool_status == 0:
+        store_results(result_cache_dir, cache_key, tool_name, raw_results_dir, source_dir)
+        evict_entries(result_cache_dir, int(scrub_conf_data.get('result_cache_max_size')))
+
+    return tool_status
@@ -2,13 +2,19 @@ import re
 import os
 import sys
 import shutil
+import signal
 import logging
+import threading
 import subprocess
+import collections
 import configparser
 import argparse
 from scrub.utils import translate_results
 
 
+OUTPUT_TAIL_LINES = 100
+
+
 class CommandExecutionError(Exception):
     pass
 
@@ -135,7 +141,29 @@ def get_warning(warning_data, index):
     return warning_content
 
 
-def execute_command(call_string, my_env, output_file=None, interactive=False):
+def stop_process(proc, timed_out=None):
+    """This function stops a running command, along with any processes it has started.
+
+    Inputs:
+        - proc: Process started by execute_command or the command executor [subprocess.Popen]
+        - timed_out: Event that is set to record that the command has timed out [threading.Event] [optional]
+    """
+
+    # Record the timeout
+    if timed_out is not None:
+        timed_out.set()
+
+    # Stop the process group, if the command has its own group
+    try:
+        if hasattr(os, 'killpg') and os.getpgid(proc.pid) == proc.pid:
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+
+
+def execute_command(call_string, my_env, output_file=None, interactive=False, timeout=None, line_callback=None):
     """This function executes a command string and captures the results.
 
     Inputs:
@@ -143,10 +171,14 @@ def execute_command(call_string, my_env, output_file=None, interactive=False):
         - my_env: Environment to use during execution [dict]
         - output_file: Absolute path to output file for storing results [string] [optional]
         - interactive: Open command for user input? [bool] [optional]
+        - timeout: Number of seconds to wait before the command is stopped [float] [optional]
+        - line_callback: Function called with each line of output as it is received [function] [optional]
     """
 
     # Initialize variables
-    output_data = ''
+    output_tail = collections.deque(maxlen=OUTPUT_TAIL_LINES)
+    timed_out = threading.Event()
+    timer = None
 
     # Write out a logging message
     logging.info('')
@@ -154,29 +186,56 @@ def execute_command(call_string, my_env, output_file=None, interactive=False):
     logging.info('\t>> From directory: %s', os.getcwd())
     logging.debug('\tConsole output:')
 
-    # Execute the call string and capture the output
+    # Execute the call string and capture the output, in its own session so every process it starts can be stopped.
+    # Interactive commands stay in the current session, so they can read from the terminal.
     if interactive:
         proc = subprocess.Popen(call_string, shell=True, env=my_env, encoding='utf-8')
     else:
         proc = subprocess.Popen(call_string, shell=True, env=my_env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                encoding='utf-8')
+                                encoding='utf-8', start_new_session=True)
 
-        # Write the output to the logging file
-        for stdout_line in iter(proc.stdout.readline, ''):
-            logging.debug('\t\t%s', stdout_line.replace('\n', ''))
-            output_data = output_data + stdout_line
+    # Stop the command if it does not complete in time
+    if timeout is not None:
+        timer = threading.Timer(timeout, stop_process, [proc, timed_out])
+        timer.start()
 
-        # Write results to the output file
-        if output_file is not None:
-            with open(output_file, 'w') as output_fh:
-                output_fh.write(output_data)
+    try:
+        if not interactive:
+            # Write each line to the logging file and the output file as it is received, keeping the last few lines
+            output_fh = open(output_file, 'w') if output_file is not None else None
+            try:
+                for stdout_line in proc.stdout:
+                    logging.debug('\t\t%s', stdout_line.replace('\n', ''))
+                    if output_fh is not None:
+                        output_fh.write(stdout_line)
+                    output_tail.append(stdout_line)
+                    if line_callback is not None:
+                        line_callback(stdout_line)
+            finally:
+                if output_fh is not None:
+                    output_fh.close()
+
+        # Wait for the process to finish
+        proc.wait(timeout=None)
+
+    except BaseException:
+        # Stop the command if the output can not be processed
+        stop_process(proc)
+        proc.wait()
+        raise
 
-    # Wait for the process to finish
-    proc.wait(timeout=None)
+    finally:
+        # Stop the timer
+        if timer is not None:
+            timer.cancel()
 
     # Throw an exception if necessary
-    if proc.poll() > 0:
-        raise CommandExecutionError
+    if timed_out.is_set():
+        raise CommandExecutionError('Command did not complete within %s seconds: %s\n%s' %
+                                    (timeout, call_string, ''.join(output_tail)))
+    elif proc.returncode > 0:
+        raise CommandExecutionError('Command exited with code %d: %s\n%s' %
+                                    (proc.returncode, call_string, ''.join(output_tail)))
 
 
 def create_logger(log_file):
@@ -338,6 +397,26 @@ def parse_common_configs(user_conf_file, scrub_keys=[]):
     filtering_output_file = os.path.normpath(scrub_conf_data.get('scrub_analysis_dir') + '/SCRUBAnalysisFilteringList')
     scrub_conf_data.update({'filtering_output_file': filtering_output_file})
 
+    # Add the distribution index file
+    distribution_index_file = os.path.normpath(scrub_conf_data.get('scrub_analysis_dir') + '/SCRUBDistributionIndex')
+    scrub_conf_data.update({'distribution_index_file': distribution_index_file})
+
+    # Add the checkpoint directory
+    checkpoint_dir = os.path.normpath(scrub_conf_data.get('scrub_analysis_dir') + '/checkpoints')
+    scrub_conf_data.update({'checkpoint_dir': checkpoint_dir})
+
+    # Add the cache directory, which is preserved between runs
+    scrub_cache_dir = os.path.normpath(scrub_conf_data.get('scrub_analysis_dir') + '/cache')
+    scrub_conf_data.update({'scrub_cache_dir': scrub_cache_dir})
+
+    # Add the suppression index file
+    suppression_index_file = os.path.normpath(scrub_cache_dir + '/SCRUBSuppressionIndex')
+    scrub_conf_data.update({'suppression_index_file': suppression_index_file})
+
+    # Add the walk cache file
+    walk_cache_file = os.path.normpath(scrub_cache_dir + '/SCRUBWalkCache')
+    scrub_conf_data.update({'walk_cache_file': walk_cache_file})
+
     return scrub_conf_data
 
 
@@ -368,6 +447,11 @@ def initialize_storage_dir(scrub_conf_data):
         os.mkdir(scrub_conf_data.get('sarif_results_dir'))
         os.chmod(scrub_conf_data.get('sarif_results_dir'), 511)
 
+    # Create the cache directory
+    if not os.path.exists(scrub_conf_data.get('scrub_cache_dir')):
+        os.mkdir(scrub_conf_data.get('scrub_cache_dir'))
+        os.chmod(scrub_conf_data.get('scrub_cache_dir'), 511)
+
     # Create the analysis directory if it doesn't exist
     if scrub_conf_data.get('scrub_working_dir') != scrub_conf_data.get('scrub_analysis_dir'):
         if os.path.exists(scrub_conf_data.get('scrub_working_dir')):
@@ -0,0 +1,94 @@
+import os
+import sys
+import json
+import argparse
+
+
+def parse_arguments():
+    """This function handles argument parsing in preparation for the show utility."""
+
+    # Create the parser
+    parser = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter, description=show.__doc__)
+
+    # Add parser arguments
+    parser.add_argument('directory', nargs='?', default=os.getcwd())
+    parser.add_argument('--index-file', default=None)
+
+    # Parse the arguments
+    args = vars(parser.parse_args(sys.argv[2:]))
+
+    # Print the results
+    for warning in show(args['directory'], args['index_file']):
+        sys.stdout.write(warning + '\n')
+
+
+def find_index_file(directory):
+    """This function searches the directory and its parents for a SCRUB distribution index.
+
+    Inputs:
+        - directory: Absolute path to the directory of interest [string]
+
+    Outputs:
+        - index_file: Absolute path to the distribution index file, or None if it cannot be found [string]
+    """
+
+    # Check every parent directory, starting with the directory of interest
+    search_dir = directory
+    while True:
+        index_file = os.path.join(search_dir, '.scrub', 'SCRUBDistributionIndex')
+        if os.path.isfile(index_file):
+            return index_file
+
+        # Stop at the file system root
+        parent_dir = os.path.dirname(search_dir)
+        if parent_dir == search_dir:
+            return None
+        search_dir = parent_dir
+
+
+def show(directory, index_file=None):
+    """This function retrieves the SCRUB results for a single directory from the distribution index.
+
+    The index is created when DISTRIBUTION_MODE is set to index. It is found automatically by searching the directory
+    and its parents for .scrub/SCRUBDistributionIndex, unless --index-file is provided.
+
+    Usage:
+        scrub show [directory] [--index-file <index file>]
+
+    Inputs:
+        - directory: Path to the source directory of interest [string]
+        - index_file: Absolute path to the distribution index file [string] [optional]
+
+    Outputs:
+        - warnings: List of SCRUB-formatted warnings found in the directory [list of strings]
+    """
+
+    # Initialize variables
+    warnings = []
+    directory = os.path.abspath(directory)
+
+    # Find the index file
+    if index_file is None:
+        index_file = find_index_file(directory)
+    if index_file is None or not os.path.isfile(index_file):
+        raise FileNotFoundError('Could not find a SCRUB distribution index for %s' % directory)
+
+    # Import the index
+    with open(index_file, 'r') as input_fh:
+        index_data = json.load(input_fh)
+
+    # Find the directory entry
+    if directory == index_data['source_dir'] or directory.startswith(index_data['source_dir'] + os.sep):
+        directory_key = os.path.relpath(directory, index_data['source_dir'])
+    else:
+        directory_key = directory
+    directory_entry = index_data['dirs'].get(directory_key, {})
+
+    # Read each warning from the output files
+    for warning_type in sorted(directory_entry):
+        with open(index_data['files'][warning_type], 'rb') as input_fh:
+            for offset, length in directory_entry[warning_type]:
+                input_fh.seek(offset)
+                warnings.append(input_fh.read(length).decode('utf-8', 'replace'))
+
+    return warnings
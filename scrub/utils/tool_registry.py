@@ -0,0 +1,162 @@
+import functools
+
+ENTRY_POINT_GROUP = 'scrub.tools'
+REQUIRED_FIELDS = ('name', 'module', 'valid_tags')
+# The valid tags are copied from the VALID_TAGS of each module, so the modules do not need to be imported. The tests
+# make sure that they match.
+BUILTIN_TOOLS = [{'name': 'gcc', 'module': 'scrub.tools.compiler.do_gcc', 'valid_tags': ['compiler', 'cmp', 'gcc'],
+                  'config_section': 'GCC Variables', 'order': 0},
+                 {'name': 'javac', 'module': 'scrub.tools.compiler.do_javac',
+                  'valid_tags': ['compiler', 'cmp', 'javac'], 'config_section': 'JAVAC Variables', 'order': 0},
+                 {'name': 'gbuild', 'module': 'scrub.tools.compiler.do_gbuild',
+                  'valid_tags': ['gbuild', 'dblchk', 'doublecheck'], 'config_section': 'GBUILD Variables', 'order': 0},
+                 {'name': 'semmle', 'module': 'scrub.tools.semmle.do_semmle', 'valid_tags': ['semmle', 'sem', 'sml'],
+                  'config_section': 'Semmle Variables', 'order': 0},
+                 {'name': 'codeql', 'module': 'scrub.tools.codeql.do_codeql', 'valid_tags': ['codeql'],
+                  'config_section': 'CodeQL Variables', 'order': 0},
+                 {'name': 'coverity', 'module': 'scrub.tools.coverity.do_coverity', 'valid_tags': ['coverity', 'cov'],
+                  'config_section': 'Coverity Variables', 'order': 0},
+                 {'name': 'codesonar', 'module': 'scrub.tools.codesonar.do_codesonar',
+                  'valid_tags': ['codesonar', 'cdsnr'], 'config_section': 'CodeSonar Variables', 'order': 0},
+                 {'name': 'klocwork', 'module': 'scrub.tools.klocwork.do_klocwork',
+                  'valid_tags': ['klocwork', 'klcwrk'], 'config_section': 'Klocwork Variables', 'order': 0},
+                 {'name': 'custom', 'module': 'scrub.tools.custom.do_custom', 'valid_tags': ['custom', 'cust'],
+                  'config_section': 'Custom Variables', 'order': 1}]
+
+
+def get_entry_points(group):
+    """This function finds the package entry points that have been installed for a group.
+
+    Inputs:
+        - group: Name of the entry point group [string]
+
+    Outputs:
+        - entry_points: List of entry point objects, each of which has a name and a load method [list]
+    """
+
+    # Use importlib.metadata, if it is available
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Fall back to pkg_resources
+        try:
+            import pkg_resources
+        except ImportError:
+            return []
+
+        return list(pkg_resources.iter_entry_points(group))
+
+    # Find the entry points
+    installed_entry_points = metadata.entry_points()
+    if hasattr(installed_entry_points, 'select'):
+        return list(installed_entry_points.select(group=group))
+    else:
+        return list(installed_entry_points.get(group, []))
+
+
+def load_entry_point_tool(entry_point):
+    """This function loads the registration data of a third-party tool from a package entry point.
+
+    Inputs:
+        - entry_point: Entry point that refers to a dictionary of tool registration data [entry point]
+
+    Outputs:
+        - tool_data: Validated tool registration data, or None if the entry point is not valid [dict]
+    """
+
+    # Load the registration data
+    try:
+        tool_data = dict(entry_point.load())
+    except Exception:     # lgtm [py/catch-base-exception]
+        print('\nWARNING: Unable to load SCRUB tool entry point %s. The tool will not be run.\n' % entry_point.name)
+        return None
+
+    # Fill in the optional fields
+    tool_data.setdefault('name', entry_point.name)
+    tool_data.setdefault('config_section', tool_data.get('name') + ' Variables')
+    tool_data.setdefault('order', 0)
+
+    # Make sure the required fields are present
+    if any(not tool_data.get(field) for field in REQUIRED_FIELDS):
+        print('\nWARNING: SCRUB tool entry point %s must define %s. The tool will not be run.\n' %
+              (entry_point.name, ', '.join(REQUIRED_FIELDS)))
+        return None
+
+    return tool_data
+
+
+@functools.lru_cache(maxsize=None)
+def get_tools():
+    """This function gets the registration data of every built-in and installed analysis tool, without importing
+    the tool modules.
+
+    Outputs:
+        - tools: Tuple of tool registration data, sorted by the order in which the tools must run. Each entry contains
+                 the tool name, module, valid tags, config section, and order [tuple of dict]
+    """
+
+    # Initialize variables
+    tools = [tool_data.copy() for tool_data in BUILTIN_TOOLS]
+
+    # Add the tools registered by other packages
+    for entry_point in get_entry_points(ENTRY_POINT_GROUP):
+        tool_data = load_entry_point_tool(entry_point)
+        if tool_data is None:
+            continue
+
+        # Built-in tools can not be replaced
+        if tool_data.get('name') in [tool.get('name') for tool in tools]:
+            print('\nWARNING: SCRUB tool %s is already registered. Entry point %s will be ignored.\n' %
+                  (tool_data.get('name'), entry_point.name))
+            continue
+
+        tools.append(tool_data)
+
+    return tuple(sorted(tools, key=lambda tool: int(tool.get('order'))))
+
+
+def find_tool(module_name):
+    """This function finds the registration data of the tool that a module implements.
+
+    Inputs:
+        - module_name: Importable name of the module [string]
+
+    Outputs:
+        - tool_data: Tool registration data, or None if the module is not an analysis tool [dict]
+    """
+
+    for tool_data in get_tools():
+        if tool_data.get('module') == module_name:
+            return tool_data
+
+    return None
+
+
+def get_tool_groups(scrub_conf_data):
+    """This function groups the analysis tools by the order in which they must run.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+
+    Outputs:
+        - tool_groups: List of (enabled tools, disabled tools) pairs, one for each order value. Every tool in a group
+                       must complete before the next group starts [list of tuples]
+    """
+
+    # Initialize variables
+    tool_groups = []
+    group_order = None
+
+    # Sort the tools into groups
+    for tool_data in get_tools():
+        if int(tool_data.get('order')) != group_order:
+            group_order = int(tool_data.get('order'))
+            tool_groups.append(([], []))
+
+        # Tools are enabled by the <tool>_WARNINGS configuration value
+        if scrub_conf_data.get(tool_data.get('name') + '_warnings'):
+            tool_groups[-1][0].append(tool_data)
+        else:
+            tool_groups[-1][1].append(tool_data)
+
+    return tool_groups
@@ -466,13 +466,15 @@ def create_sarif_output_file(results_list, sarif_version, output_file):
     os.chmod(output_file, 438)
 
 
-def perform_translation(input_file, output_file, source_root, output_format):
+def perform_translation(input_file, output_file, source_root, output_format, parsed_results=None):
     """This function takes in an analysis results file in legacy format (.scrub), then parses and converts the contents
        of each analysis result into the SARIF format.
 
     Inputs:
         - scrub_filename: The name of the .sarif file to parse and convert. [string]
         - output_filename: The filename to output parsed results to. [string]
+        - parsed_results: Previously parsed results to translate instead of parsing the input file [list of dict]
+                          [optional]
 
     Outputs:
         - custom_exit_code: Exit code that represents whether the module completed with errors.
@@ -481,19 +483,20 @@ def perform_translation(input_file, output_file, source_root, output_format):
 
     # Initialize the variables
     exit_code = 1
-    parsed_results = []
 
     try:
-        # Parse the input file
-        if input_file.endswith('.scrub'):
-            parsed_results = parse_scrub(input_file, source_root)
-
-        elif input_file.endswith('.sarif'):
-            parsed_results = parse_sarif(input_file, source_root)
-
-        else:
-            # TODO: This should generate an exception
-            logging.error('Unknown input file type.')
+        # Parse the input file, if necessary
+        if parsed_results is None:
+            if input_file.endswith('.scrub'):
+                parsed_results = parse_scrub(input_file, source_root)
+
+            elif input_file.endswith('.sarif'):
+                parsed_results = parse_sarif(input_file, source_root)
+
+            else:
+                # TODO: This should generate an exception
+                logging.error('Unknown input file type.')
+                parsed_results = []
 
         # Generate the desired output file
         if output_format == 'scrub':
@@ -0,0 +1,323 @@
+import os
+import re
+import glob
+import errno
+import fcntl
+import shutil
+import logging
+import subprocess
+from scrub.utils import tool_registry
+
+# Linux ioctl request that makes a copy-on-write clone of a file, as used by cp --reflink
+FICLONE = 0x40049409
+
+
+def get_ignore_function(ignored_dirs):
+    """This function creates the copytree ignore function that prevents SCRUB output directories from being copied
+    into a workspace.
+
+    Inputs:
+        - ignored_dirs: Absolute paths to other directories that should not be copied [list of strings]
+
+    Outputs:
+        - ignore_scrub_dirs: Function that returns the items of a directory that should not be copied [function]
+    """
+
+    # Initialize variables
+    ignored_dirs = set(os.path.realpath(ignored_dir) for ignored_dir in ignored_dirs)
+
+    def ignore_scrub_dirs(directory, names):
+        return [name for name in names
+                if name == '.scrub' or os.path.realpath(os.path.join(directory, name)) in ignored_dirs]
+
+    return ignore_scrub_dirs
+
+
+def link_or_copy(source_file, destination_file):
+    """This function hard links a file, falling back to a copy if a link cannot be created.
+
+    Inputs:
+        - source_file: Absolute path to the file to be linked [string]
+        - destination_file: Absolute path to the link to be created [string]
+    """
+
+    try:
+        os.link(source_file, destination_file)
+    except OSError:
+        shutil.copy2(source_file, destination_file)
+
+
+def get_clone_function():
+    """This function creates the copytree copy function that makes copy-on-write clones of files, falling back to a
+    copy once the file system has shown that it does not support clones.
+
+    Outputs:
+        - clone_or_copy: Function that clones or copies a single file [function]
+    """
+
+    # Initialize variables
+    clone_state = {'supported': True}
+
+    def clone_or_copy(source_file, destination_file):
+        if clone_state['supported']:
+            try:
+                with open(source_file, 'rb') as source_fh, open(destination_file, 'wb') as destination_fh:
+                    fcntl.ioctl(destination_fh.fileno(), FICLONE, source_fh.fileno())
+                shutil.copystat(source_file, destination_file)
+                return destination_file
+            except OSError as error:
+                if error.errno in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EXDEV, errno.ENOSYS):
+                    clone_state['supported'] = False
+
+        return shutil.copy2(source_file, destination_file)
+
+    return clone_or_copy
+
+
+def run_git_command(git_dir, git_flags):
+    """This function runs a git command in a directory and returns the output.
+
+    Inputs:
+        - git_dir: Absolute path to the directory of interest [string]
+        - git_flags: List of arguments to pass to git [list of strings]
+
+    Outputs:
+        - git_output: Stripped output of the command, or None if the command fails [string]
+    """
+
+    # Execute the command
+    try:
+        proc = subprocess.run(['git'] + git_flags, cwd=git_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError:
+        return None
+
+    # Check the result
+    if proc.returncode != 0:
+        return None
+
+    return os.fsdecode(proc.stdout).strip()
+
+
+def apply_local_changes(git_root, worktree_dir, ignore_function):
+    """This function adds the uncommitted changes and the untracked files of a git repository to one of its worktrees.
+
+    Inputs:
+        - git_root: Absolute path to the top-level directory of the git repository [string]
+        - worktree_dir: Absolute path to the worktree of HEAD [string]
+        - ignore_function: copytree ignore function for the items that should not be copied [function]
+
+    Outputs:
+        - applied: Indicator if every change was applied [bool]
+    """
+
+    try:
+        # Apply the changes to the tracked files
+        proc = subprocess.run(['git', 'diff', '--binary', 'HEAD'], cwd=git_root, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            return False
+        if proc.stdout:
+            proc = subprocess.run(['git', 'apply', '--whitespace=nowarn', '-'], cwd=worktree_dir, input=proc.stdout,
+                                  stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if proc.returncode != 0:
+                return False
+
+        # Find the untracked files that are not ignored by git
+        proc = subprocess.run(['git', 'ls-files', '--others', '--exclude-standard', '-z'], cwd=git_root,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            return False
+
+        # Copy every untracked file, unless it is inside a directory that should not be copied
+        for untracked_file in filter(None, os.fsdecode(proc.stdout).split('\0')):
+            directory = git_root
+            for name in untracked_file.split('/'):
+                if ignore_function(directory, [name]):
+                    break
+                directory = os.path.join(directory, name)
+            else:
+                destination_file = os.path.join(worktree_dir, untracked_file)
+                os.makedirs(os.path.dirname(destination_file), exist_ok=True)
+                shutil.copy2(os.path.join(git_root, untracked_file), destination_file, follow_symlinks=False)
+
+    except OSError:
+        return False
+
+    return True
+
+
+def create_workspace(source_dir, workspace_dir, workspace_mode, ignored_dirs=None):
+    """This function creates a private copy of the source tree for a single tool.
+
+    Inputs:
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - workspace_dir: Absolute path to the workspace directory to be created [string]
+        - workspace_mode: Method used to create the workspace: hardlink, copy, or worktree [string]
+        - ignored_dirs: Absolute paths to directories that should not be copied, such as SCRUB_WORKING_DIR
+                        [list of strings] [optional]
+
+    Outputs:
+        - workspace_source_dir: Absolute path to the copy of source_dir inside the workspace [string]
+        - workspace_mode: Method that was used to create the workspace [string]
+    """
+
+    # Remove any stale workspace
+    remove_workspace(source_dir, workspace_dir)
+
+    # Initialize variables
+    ignore_scrub_dirs = get_ignore_function((ignored_dirs or []) + [workspace_dir])
+
+    # Create a git worktree, including any local changes, if possible
+    if workspace_mode == 'worktree':
+        git_root = run_git_command(source_dir, ['rev-parse', '--show-toplevel'])
+        if (git_root is not None and
+                run_git_command(git_root, ['worktree', 'add', '--detach', workspace_dir, 'HEAD']) is not None):
+            if apply_local_changes(git_root, workspace_dir, ignore_scrub_dirs):
+                workspace_source_dir = os.path.join(workspace_dir, os.path.relpath(os.path.realpath(source_dir),
+                                                                                   os.path.realpath(git_root)))
+                return os.path.normpath(workspace_source_dir), workspace_mode
+            remove_workspace(source_dir, workspace_dir)
+
+        # Fall back to a copy of the source tree
+        logging.warning('Unable to create a git worktree that includes the local changes to %s. Copying the source '
+                        'tree instead.', source_dir)
+        workspace_mode = 'copy'
+
+    # Copy the source tree, without copying the workspace into itself
+    if workspace_mode == 'hardlink':
+        shutil.copytree(source_dir, workspace_dir, symlinks=True, ignore=ignore_scrub_dirs, copy_function=link_or_copy)
+    else:
+        shutil.copytree(source_dir, workspace_dir, symlinks=True, ignore=ignore_scrub_dirs,
+                        copy_function=get_clone_function())
+
+    return workspace_dir, workspace_mode
+
+
+def remove_workspace(source_dir, workspace_dir):
+    """This function removes a workspace created by create_workspace.
+
+    Inputs:
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - workspace_dir: Absolute path to the workspace directory [string]
+    """
+
+    # Initialize variables
+    git_worktree = os.path.isfile(workspace_dir + '/.git')
+
+    # Remove the directory
+    if os.path.exists(workspace_dir):
+        shutil.rmtree(workspace_dir)
+
+    # Remove any reference to a git worktree
+    if git_worktree:
+        run_git_command(source_dir, ['worktree', 'prune'])
+
+
+def get_workspace_conf_data(scrub_conf_data, workspace_source_dir):
+    """This function points the source and build directories of a tool at its workspace.
+
+    Inputs:
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - workspace_source_dir: Absolute path to the copy of the source directory inside the workspace [string]
+
+    Outputs:
+        - workspace_conf_data: Copy of scrub_conf_data that uses the workspace [dict]
+    """
+
+    # Initialize variables
+    workspace_conf_data = scrub_conf_data.copy()
+    source_dir = scrub_conf_data.get('source_dir')
+
+    # Update the source directory and every build directory inside of it
+    for key, value in scrub_conf_data.items():
+        if (key == 'source_dir' or re.search(r'.+build_dir', key)) and isinstance(value, str):
+            if value == source_dir or value.startswith(source_dir + '/'):
+                workspace_conf_data.update({key: workspace_source_dir + value[len(source_dir):]})
+
+    return workspace_conf_data
+
+
+def map_results_paths(results_dir, workspace_source_dir, source_dir, tool_name):
+    """This function updates the results of a tool that reference a workspace to reference the original source
+    directory.
+
+    Inputs:
+        - results_dir: Absolute path to the directory containing raw results files [string]
+        - workspace_source_dir: Absolute path to the copy of the source directory inside the workspace [string]
+        - source_dir: Absolute path to the top-level directory of the source code [string]
+        - tool_name: Name of the tool, which prefixes each of its results files [string]
+    """
+
+    # Find the results files of the tool that reference the workspace
+    for results_file in glob.glob(results_dir + '/' + glob.escape(tool_name) + '_*'):
+        if not os.path.isfile(results_file):
+            continue
+
+        # Import the data
+        try:
+            with open(results_file, 'r') as input_fh:
+                results_data = input_fh.read()
+        except UnicodeDecodeError:
+            continue
+
+        # Update the paths
+        if workspace_source_dir in results_data:
+            with open(results_file, 'w') as output_fh:
+                output_fh.write(re.sub(re.escape(workspace_source_dir) + r'(?![\w.-])', lambda match: source_dir,
+                                       results_data))
+
+
+def run_in_workspace(module_object, tool_name, scrub_conf_data, workspace_mode):
+    """This function runs a tool analysis module inside its own copy of the source tree.
+
+    Inputs:
+        - module_object: Tool analysis module that contains run_analysis [module]
+        - tool_name: Name of the tool, used to name the workspace [string]
+        - scrub_conf_data: Dictionary of values read from configuration file [dict]
+        - workspace_mode: Method used to create the workspace: none, hardlink, copy, or worktree [string]
+
+    Outputs:
+        - tool_status: Exit code returned by the module [int]
+    """
+
+    # Run the tool in place if no workspace is needed
+    if workspace_mode == 'none' or not scrub_conf_data.get(tool_name + '_warnings'):
+        return getattr(module_object, "run_analysis")(scrub_conf_data)
+
+    # Initialize variables
+    source_dir = scrub_conf_data.get('source_dir')
+    workspaces_dir = os.path.normpath(scrub_conf_data.get('scrub_working_dir') + '/workspaces')
+    workspace_dir = os.path.normpath(workspaces_dir + '/' + tool_name)
+
+    # Hard links share files with the source tree, so they are only used by tools that do not modify files
+    tool_data = tool_registry.find_tool(module_object.__name__)
+    if workspace_mode == 'hardlink' and not (tool_data and tool_data.get('read_only')):
+        logging.warning('%s is not registered as read_only, so it can not share hard linked files with the source '
+                        'tree. A copy of the source tree is used instead.', tool_name)
+        workspace_mode = 'copy'
+
+    # Create the workspace
+    if not os.path.exists(workspaces_dir):
+        os.makedirs(workspaces_dir)
+    workspace_source_dir, workspace_mode = create_workspace(source_dir, workspace_dir, workspace_mode,
+                                                            [scrub_conf_data.get('scrub_working_dir')])
+
+    try:
+        # Perform the analysis
+        tool_status = getattr(module_object, "run_analysis")(get_workspace_conf_data(scrub_conf_data,
+                                                                                      workspace_source_dir))
+
+        # Map the results back to the source directory
+        map_results_paths(scrub_conf_data.get('raw_results_dir'), workspace_source_dir, source_dir, tool_name)
+
+    finally:
+        # Remove the workspace
+        remove_workspace(source_dir, workspace_dir)
+
+        # Remove the parent directory once every workspace has been removed
+        try:
+            os.rmdir(workspaces_dir)
+        except OSError:
+            pass
+
+    return tool_status
@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+from scrub.utils import translate_results
+from scrub.utils.filtering import filter_results
+
+DIRECTORY_NAMES = ['src', 'lib', 'io', 'include', 'components', 'drivers', 'platform_support', 'third_party',
+                   'flight_software_framework', 'test']
+
+
+def create_sample_data(source_root, warning_count, file_count, line_count):
+    """This function creates a synthetic source tree and a list of synthetic warnings.
+
+    Inputs:
+        - source_root: Absolute path to the directory where the source tree will be created [string]
+        - warning_count: Number of warnings to create [int]
+        - file_count: Number of source files to create [int]
+        - line_count: Number of lines in each source file [int]
+
+    Outputs:
+        - warning_list: List of synthetic warnings [list of dict]
+        - filtering_file: Absolute path to the synthetic SCRUBAnalysisFilteringList file [string]
+        - query_file: Absolute path to the synthetic SCRUBExcludeQueries file [string]
+    """
+
+    # Initialize variables
+    source_files = []
+    filtering_file = os.path.join(source_root, 'SCRUBAnalysisFilteringList')
+    query_file = os.path.join(source_root, 'SCRUBExcludeQueries')
+
+    # Create the source files at varied depths, with names of varied lengths, suppressing a warning on every tenth
+    # line
+    path_generator = random.Random(0)
+    for i in range(0, file_count):
+        directories = [path_generator.choice(DIRECTORY_NAMES) + str(path_generator.randrange(10))
+                       for j in range(0, path_generator.randint(1, 6))]
+        source_file = os.path.join(source_root, *directories,
+                                   'file%05d%s.c' % (i, '_' * path_generator.randrange(0, 40)))
+        os.makedirs(os.path.dirname(source_file), exist_ok=True)
+        with open(source_file, 'w') as output_fh:
+            for j in range(1, line_count + 1):
+                if j % 10 == 0:
+                    output_fh.write('int value_%d = 0; // SCRUB_IGNORE_WARNING_GCC\n' % j)
+                else:
+                    output_fh.write('int value_%d = 0;\n' % j)
+        source_files.append(source_file)
+
+    # Create the filtering list, excluding every fifth file
+    with open(filtering_file, 'w') as output_fh:
+        for i, source_file in enumerate(source_files):
+            if i % 5:
+                output_fh.write('%s\n' % os.path.relpath(source_file, source_root))
+
+    # Create the query filters
+    with open(query_file, 'w') as output_fh:
+        for i in range(0, 2000):
+            output_fh.write('gcc:-Wexcluded-%d\n' % i)
+        output_fh.write('gcc:*-Wpedantic*\n')
+
+    # Create the warnings
+    warning_list = []
+    for i in range(0, warning_count):
+        warning_list.append(translate_results.create_warning('gcc%06d' % i, source_files[i % file_count],
+                                                             (i % line_count) + 1, ['Synthetic warning'], 'gcc',
+                                                             query='-Wexcluded-%d' % (i % 4000)))
+
+    return warning_list, filtering_file, query_file
+
+
+def main():
+    """This function times filter_results on a set of synthetic warnings.
+
+    Inputs:
+        - --warnings: Number of warnings to filter [int] [optional]
+        - --files: Number of source files to create [int] [optional]
+        - --lines: Number of lines in each source file [int] [optional]
+    """
+
+    # Parse the arguments
+    parser = argparse.ArgumentParser(description='Time SCRUB filtering on synthetic warnings.')
+    parser.add_argument('--warnings', type=int, default=100000, help='Number of warnings to filter')
+    parser.add_argument('--files', type=int, default=1000, help='Number of source files to create')
+    parser.add_argument('--lines', type=int, default=200, help='Number of lines in each source file')
+    args = parser.parse_args()
+
+    # Only log warnings and errors
+    logging.basicConfig(level=logging.WARNING)
+
+    # Create the sample data
+    source_root = tempfile.mkdtemp(prefix='scrub_benchmark_')
+    try:
+        warning_list, filtering_file, query_file = create_sample_data(source_root, args.warnings, args.files,
+                                                                      args.lines)
+
+        # Filter the warnings
+        start_time = time.time()
+        filtered_warnings = filter_results.filter_results(warning_list, os.path.join(source_root, 'gcc.scrub'),
+                                                          filtering_file, query_file, source_root, True, False,
+                                                          [['compiler', 'cmp', 'gcc']])
+        elapsed_time = time.time() - start_time
+
+    finally:
+        shutil.rmtree(source_root)
+
+    # Print the results
+    print('Filtered %d warnings down to %d in %.2f seconds' % (len(warning_list), len(filtered_warnings),
+                                                               elapsed_time))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,7 @@ import re
 import sys
 import glob
 import traceback
+import subprocess
 from scrub import scrub_cli
 from tests import helpers
 from tests import asserts
@@ -152,3 +153,24 @@ def test_conf_cli():
     # Remove the conf file if it exists
     if os.path.exists(conf_file_out):
         os.remove(conf_file_out)
+
+
+def test_cli_startup_imports(tmp_path):
+    # Run the subcommands that should start quickly, recording the SCRUB modules that were imported
+    for cli_args in [['--help'], ['get-conf', '--output', str(tmp_path / 'scrub.cfg')]]:
+        proc = subprocess.run([sys.executable, '-c',
+                               'import sys\nfrom scrub import scrub_cli\nsys.argv[0] = "scrub"\ntry:\n'
+                               '    scrub_cli.main()\nfinally:\n'
+                               '    sys.stderr.write(" ".join(name for name in sys.modules '
+                               'if name.startswith("scrub")))'] + cli_args,
+                              cwd=helpers.scrub_root, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True)
+        assert proc.returncode == 0
+
+        # Make sure the analysis modules are only imported by the subcommands that use them
+        module_names = proc.stderr.split()
+        assert 'scrub.scrub_cli' in module_names
+        assert 'scrub.scrubme' not in module_names
+        assert not [module_name for module_name in module_names if module_name.startswith(('scrub.tools',
+                                                                                            'scrub.targets',
+                                                                                            'scrub.utils.filtering'))]
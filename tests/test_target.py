@@ -62,3 +62,50 @@ def test_collaborator(operation):
         assert collaborator_exit_code == 2
     else:
         assert collaborator_exit_code == 0
+
+
+def test_collaborator_batch_upload(tmp_path):
+    # Import the modules
+    import scrub.targets.collaborator.do_collaborator as do_collaborator
+
+    # Create a ccollab client that records when each batch file starts and finishes uploading. Each comment batch
+    # waits for up to 30 seconds until the other one has started, so they can only overlap if they run concurrently.
+    with open(str(tmp_path / 'ccollab'), 'w') as output_fh:
+        output_fh.write('#!/bin/sh\n'
+                        'echo "start $6" >> {0}\n'
+                        'case "$6" in *_comments.xml)\n'
+                        '    for i in $(seq 300); do\n'
+                        '        [ "$(grep -c _comments.xml {0})" -ge 2 ] && break\n'
+                        '        sleep 0.1\n'
+                        '    done;;\n'
+                        'esac\n'
+                        'echo "end $6" >> {0}\n'.format(tmp_path / 'ccollab.log'))
+    os.chmod(str(tmp_path / 'ccollab'), 0o755)
+
+    # Create the results of two tools
+    with open(str(tmp_path / 'SCRUBCollaboratorFilteringList'), 'w') as output_fh:
+        output_fh.write('main.c\n')
+    for tool_name in ['gcc_compiler', 'codeql']:
+        with open(str(tmp_path / (tool_name + '.scrub')), 'w') as output_fh:
+            output_fh.write(tool_name + '000 <Low> :main.c:3: Unused variable\n\n')
+
+    # Perform the upload
+    conf_data = {'scrub_analysis_dir': str(tmp_path), 'source_dir': str(tmp_path),
+                 'collaborator_ccollab_location': str(tmp_path), 'collaborator_review_id': 12,
+                 'collaborator_review_xml_files': str(tmp_path / 'collaborator_review_12_files.xml'),
+                 'collaborator_filtering_output_file': str(tmp_path / 'SCRUBCollaboratorFilteringList'),
+                 'collaborator_src_files': 'gcc_compiler.scrub,codeql.scrub', 'collaborator_finding_level': 'comment',
+                 'collaborator_server': 'https://collaborator', 'collaborator_username': 'user'}
+    do_collaborator.perform_upload(conf_data)
+
+    # Make sure the files are uploaded first, followed by the comments of every tool at the same time
+    with open(str(tmp_path / 'ccollab.log'), 'r') as input_fh:
+        events = [line.split() for line in input_fh.readlines()]
+    files_xml = str(tmp_path / 'collaborator_review_12_files.xml')
+    comments_xml = [str(tmp_path / 'collaborator_review_12_codeql_comments.xml'),
+                    str(tmp_path / 'collaborator_review_12_gcc_compiler_comments.xml')]
+    assert events[0:2] == [['start', files_xml], ['end', files_xml]]
+    assert sorted(events[2:4]) == [['start', comments_xml[0]], ['start', comments_xml[1]]]
+    assert sorted(events[4:]) == [['end', comments_xml[0]], ['end', comments_xml[1]]]
+    with open(str(tmp_path / 'collaborator_review_12_codeql_comments.xml'), 'r') as input_fh:
+        assert '<comment>Unused variable</comment>' in input_fh.read()
@@ -1,5 +1,10 @@
 import os
+import re
+import json
 import glob
+import types
+import shutil
+import subprocess
 from tests import helpers
 
 
@@ -53,3 +58,1046 @@ def test_diff_results(capsys):
     # Cleanup
     for diff_file in diff_output_files:
         os.remove(diff_file)
+
+
+def test_source_line_cache(tmp_path):
+    # Import the module
+    from scrub.utils.filtering import filter_results
+
+    # Initialize variables
+    source_file = str(tmp_path / 'sample.c')
+    valid_warning_types = [['compiler', 'cmp', 'gcc'], ['coverity', 'cov']]
+
+    # Create a sample source file
+    with open(source_file, 'w') as output_fh:
+        output_fh.write('int a = 0;\n')
+        output_fh.write('int b = 0; // SCRUB_IGNORE_WARNING_GCC\n')
+
+    # Check the same lines repeatedly
+    filter_results.load_source_lines.cache_clear()
+    for _ in range(10):
+        assert filter_results.micro_filter_check(source_file, 2, 'gcc', valid_warning_types)
+        assert not filter_results.micro_filter_check(source_file, 1, 'gcc', valid_warning_types)
+        assert not filter_results.invalid_tag_check(source_file, 2, valid_warning_types)
+
+    # Make sure the file was only read once
+    cache_info = filter_results.load_source_lines.cache_info()
+    assert cache_info.misses == 1
+    assert cache_info.hits == 29
+
+    # Make sure an edited file is read again
+    with open(source_file, 'w') as output_fh:
+        output_fh.write('int a = 0;\n')
+        output_fh.write('int b = 0;\n')
+    assert not filter_results.micro_filter_check(source_file, 2, 'gcc', valid_warning_types)
+    assert filter_results.load_source_lines.cache_info().misses == 2
+    filter_results.load_source_lines.cache_clear()
+
+
+def test_suppression_index(tmp_path):
+    # Import the modules
+    from scrub.utils.filtering import filter_results
+    from scrub.utils.filtering import suppression_index
+
+    # Initialize variables
+    source_file = str(tmp_path / 'sample.c')
+    index_file = str(tmp_path / 'SCRUBSuppressionIndex')
+    valid_warning_types = [['compiler', 'cmp', 'gcc'], ['coverity', 'cov']]
+
+    # Create a sample source file
+    with open(source_file, 'w') as output_fh:
+        output_fh.write('int a = 0;\n')
+        output_fh.write('int b = 0; // SCRUB_IGNORE_WARNING_GCC\n')
+        output_fh.write('int c = 0; // @suppress unknown\n')
+
+    # Build the index and check the results against the direct file checks
+    source_index = suppression_index.build_suppression_index([source_file], valid_warning_types, index_file)
+    assert source_index == {source_file: {2: {'gcc'}, 3: set()}}
+    for line in range(1, 4):
+        for tool in ['gcc', 'coverity']:
+            assert (filter_results.micro_filter_check(source_file, line, tool, valid_warning_types, source_index) ==
+                    filter_results.micro_filter_check(source_file, line, tool, valid_warning_types))
+        assert (filter_results.invalid_tag_check(source_file, line, valid_warning_types, source_index) ==
+                filter_results.invalid_tag_check(source_file, line, valid_warning_types))
+
+    # Make sure unchanged files are reused from the stored index
+    with open(index_file, 'r') as input_fh:
+        index_data = json.load(input_fh)
+    index_data['files'][source_file]['lines'] = {}
+    with open(index_file, 'w') as output_fh:
+        json.dump(index_data, output_fh)
+    assert suppression_index.build_suppression_index([source_file], valid_warning_types,
+                                                     index_file) == {source_file: {}}
+
+
+def test_query_filters(tmp_path):
+    # Import the module
+    from scrub.utils.filtering import filter_results
+
+    # Initialize variables
+    query_file = str(tmp_path / 'SCRUBExcludeQueries')
+
+    # Create a sample query filter file
+    with open(query_file, 'w') as output_fh:
+        output_fh.write('GCC: -Wunused-variable\n')
+        output_fh.write('\n')
+        output_fh.write('coverity:*_CHECK*\n')
+        output_fh.write('*:deprecated\n')
+
+    # Check the parsed filters
+    query_filters = filter_results.parse_query_filters(query_file)
+    assert query_filters[0] == {('gcc', '-Wunused-variable')}
+    for tool, query, skip in [('gcc', '-Wunused-variable', True), ('gcc', '-Wunused', False),
+                              ('coverity', 'NULL_CHECK_RETURN', True), ('codeql', 'NULL_CHECK', False),
+                              ('codeql', 'deprecated', True), ('codeql', 'deprecated-api', False)]:
+        assert filter_results.ignore_query_check(tool, query, query_file, query_filters) == skip
+        assert filter_results.ignore_query_check(tool, query, query_file) == skip
+
+    # Check a missing filter file
+    assert not filter_results.ignore_query_check('gcc', '-Wunused-variable', str(tmp_path / 'missing'))
+
+
+def test_path_index(tmp_path):
+    # Import the module
+    from scrub.utils.filtering import filter_results
+
+    # Initialize variables
+    filtering_file = str(tmp_path / 'SCRUBAnalysisFilteringList')
+    source_root = str(tmp_path / 'project')
+    relative_files = ['src/main.c', 'lib/src/main.c', 'include/util.h', 'src/main.cpp', 'src/domain.c', 'main.c',
+                      'include/util.h.in', 'test/test_io.c']
+    warning_files = [os.path.join(source_root, relative_file) for relative_file in relative_files] + ['src/main.c']
+
+    # Create the source tree
+    for relative_file in relative_files:
+        os.makedirs(os.path.dirname(os.path.join(source_root, relative_file)), exist_ok=True)
+        open(os.path.join(source_root, relative_file), 'w').close()
+
+    for filtering_data in [['src/main.c', 'include'], ['main.c', 'oject/inc', 'io'], ['src/main.c', '']]:
+        with open(filtering_file, 'w') as output_fh:
+            output_fh.write(''.join(filter_file + '\n' for filter_file in filtering_data))
+
+        # Without a source root, every entry is matched as a substring of the file path
+        filtering_index = filter_results.create_path_index(filtering_file)
+        for warning_file in warning_files:
+            skip = not any(filter_file in warning_file for filter_file in filtering_data)
+            assert filter_results.baseline_filtering_check(warning_file, filtering_file, filtering_index) == skip
+            assert filter_results.baseline_filtering_check(warning_file, filtering_file) == skip
+
+        # Entries that exist in the source root only match that file or the files inside that directory
+        filtering_index = filter_results.create_path_index(filtering_file, source_root)
+        source_paths = [filter_file for filter_file in filtering_data
+                        if filter_file and os.path.exists(os.path.join(source_root, filter_file))]
+        for warning_file in warning_files:
+            relative_file = os.path.relpath(warning_file, source_root) if os.path.isabs(warning_file) else warning_file
+            skip = not (any(relative_file == filter_file or relative_file.startswith(filter_file + '/')
+                            for filter_file in source_paths) or
+                        any(filter_file in warning_file for filter_file in filtering_data
+                            if filter_file not in source_paths))
+            assert filter_results.baseline_filtering_check(warning_file, filtering_file, filtering_index) == skip
+            assert filter_results.baseline_filtering_check(warning_file, filtering_file,
+                                                           source_root=source_root) == skip
+
+    # Make sure a listed source file does not match a file with the same name in another directory
+    with open(filtering_file, 'w') as output_fh:
+        output_fh.write('src/main.c\n')
+    filtering_index = filter_results.create_path_index(filtering_file, source_root)
+    assert not filter_results.baseline_filtering_check(source_root + '/src/main.c', filtering_file, filtering_index)
+    assert filter_results.baseline_filtering_check(source_root + '/lib/src/main.c', filtering_file, filtering_index)
+    assert filter_results.baseline_filtering_check(source_root + '/src/main.cpp', filtering_file, filtering_index)
+
+    # Check a missing filtering list
+    assert filter_results.create_path_index(str(tmp_path / 'missing')) is None
+    assert filter_results.baseline_filtering_check('/root/project/src/main.c', str(tmp_path / 'missing'))
+
+
+def test_filter_results(tmp_path):
+    # Import the modules
+    from scrub.utils import translate_results
+    from scrub.utils.filtering import filter_results
+
+    # Initialize variables
+    source_root = str(tmp_path)
+    filtering_file = str(tmp_path / 'SCRUBAnalysisFilteringList')
+    output_file = str(tmp_path / 'gcc.scrub')
+
+    # Create a sample source file and filtering list
+    with open(str(tmp_path / 'sample.c'), 'w') as output_fh:
+        output_fh.write('int a = 0;\n')
+        output_fh.write('int b = 0; // SCRUB_IGNORE_WARNING_GCC\n')
+    with open(filtering_file, 'w') as output_fh:
+        output_fh.write('sample.c\n')
+
+    # Filter a set of warnings
+    warning_list = [translate_results.create_warning('gcc%03d' % i, source_root + '/sample.c', (i % 2) + 1,
+                                                     ['Sample warning'], 'gcc') for i in range(0, 6)]
+    filtered_warnings = filter_results.filter_results(warning_list, output_file, filtering_file,
+                                                      str(tmp_path / 'missing'), source_root, True, False,
+                                                      [['compiler', 'cmp', 'gcc']])
+
+    # Check the kept warnings and make sure the input was not modified
+    assert [warning['id'] for warning in filtered_warnings] == ['gcc000', 'gcc002', 'gcc004']
+    assert all(warning['file'] == 'sample.c' for warning in filtered_warnings)
+    assert warning_list[0]['file'] == source_root + '/sample.c'
+    assert len(translate_results.parse_scrub(output_file, source_root)) == 3
+
+
+def test_parallel_filtering(tmp_path, monkeypatch):
+    # Import the modules
+    import functools
+    import multiprocessing
+    from scrub.utils import translate_results
+    from scrub.utils.filtering import do_filtering
+
+    # Initialize variables
+    source_root = str(tmp_path)
+    raw_results_dir = str(tmp_path / '.scrub' / 'raw_results')
+    os.makedirs(raw_results_dir)
+    conf_data = {'source_dir': source_root,
+                 'scrub_path': os.path.dirname(translate_results.__file__) + '/..',
+                 'scrub_analysis_dir': source_root + '/.scrub',
+                 'raw_results_dir': raw_results_dir,
+                 'filtering_output_file': source_root + '/.scrub/SCRUBAnalysisFilteringList',
+                 'suppression_index_file': source_root + '/.scrub/SCRUBSuppressionIndex',
+                 'filtering_log_file': source_root + '/.scrub/filtering.log',
+                 'analysis_filters': '', 'query_filters': '', 'custom_filter_cmd': '',
+                 'enable_micro_filter': True, 'enable_ext_warnings': False, 'filter_threads': '2'}
+
+    # Create a sample source file
+    with open(source_root + '/sample.c', 'w') as output_fh:
+        output_fh.write('int a = 0;\n')
+        output_fh.write('int b = 0; // SCRUB_IGNORE_WARNING_CODEQL\n')
+
+    # Create raw results for several tools
+    for tool in ['compiler', 'p10', 'codeql', 'coverity']:
+        warnings = [translate_results.create_warning('%s%03d' % (tool, i), source_root + '/sample.c', (i % 2) + 1,
+                                                     ['Sample warning'], tool) for i in range(0, 4)]
+        translate_results.create_scrub_output_file(warnings, raw_results_dir + '/' + tool + '_raw.scrub')
+
+    # Filter the results sequentially and in parallel
+    filtered_results = []
+    for filter_jobs in ['1', '3']:
+        conf_data.update({'filter_jobs': filter_jobs})
+        do_filtering.filter_scrub_results(conf_data)
+        filtered_results.append({os.path.basename(output_file): open(output_file, 'r').read()
+                                 for output_file in glob.glob(source_root + '/.scrub/*.scrub')})
+
+    # Filter the results in processes that do not inherit the logging configuration
+    os.remove(conf_data.get('filtering_log_file'))
+    monkeypatch.setattr(do_filtering.futures, 'ProcessPoolExecutor',
+                        functools.partial(do_filtering.futures.ProcessPoolExecutor,
+                                          mp_context=multiprocessing.get_context('spawn')))
+    do_filtering.filter_scrub_results(conf_data)
+    filtered_results.append({os.path.basename(output_file): open(output_file, 'r').read()
+                             for output_file in glob.glob(source_root + '/.scrub/*.scrub')})
+
+    # Make sure the results match and the workers wrote to the filtering log
+    assert sorted(filtered_results[0].keys()) == ['codeql.scrub', 'compiler.scrub', 'coverity.scrub', 'p10.scrub']
+    assert filtered_results[0] == filtered_results[1] == filtered_results[2]
+    assert filtered_results[0]['codeql.scrub'].count('codeql0') == 2
+    with open(conf_data.get('filtering_log_file'), 'r') as input_fh:
+        assert 'Warning removed' in input_fh.read()
+
+
+def test_file_list_classification():
+    # Import the module
+    from scrub.utils.filtering import create_file_list
+
+    # Initialize variables
+    file_list = ['/src/main.c', '/src/main.o', '/src/test/test_main.c', '/src/test/data.o', '/src/aa/aa.c',
+                 '/src/.git/config', '/src/main.c', '/src/ab/ab.c']
+    filtering_options = [('-', r'\.o$'), ('-', r'.*/test/.*'), ('+', r'test_.*\.c'), ('-', r'(a)\1'),
+                         ('+', r'data\.o'), ('-', r'.*\.git.*')]
+
+    # Classify the files using the reference algorithm
+    expected_kept = [file_path for file_path in file_list
+                     if not any(re.search(option[1], file_path) for option in filtering_options if option[0] == '-')]
+    expected_included = [file_path for file_path in file_list
+                         if any(re.search(option[1], file_path) for option in filtering_options if option[0] == '+')]
+
+    # Make sure the results match
+    assert create_file_list.classify_files(file_list, filtering_options) == (expected_kept, expected_included)
+    assert expected_kept == ['/src/main.c', '/src/main.c', '/src/ab/ab.c']
+    assert len(create_file_list.compile_filtering_patterns([r'\.o$', r'\.obj$'])) == 1
+    assert len(create_file_list.compile_filtering_patterns([r'(a)\1', r'\.obj$'])) == 2
+    assert len(create_file_list.compile_filtering_patterns([r'(?i)readme', r'\.obj$'])) == 2
+
+
+def test_source_tree_walk(tmp_path):
+    # Import the module
+    from scrub.utils.filtering import create_file_list
+
+    # Create a sample source tree
+    source_root = str(tmp_path)
+    for file_path in ['main.c', 'src/a.c', 'src/b/b.c', 'src/b/c/c.c', '.git/objects/1', 'build/out.o', 'doc/a.txt']:
+        os.makedirs(os.path.dirname(os.path.join(source_root, file_path)), exist_ok=True)
+        open(os.path.join(source_root, file_path), 'w').close()
+    os.symlink(source_root + '/src', source_root + '/src_link')
+
+    # Make sure the walk matches os.walk
+    walk_list = [os.path.join(root, file_name) for root, _, file_names in os.walk(source_root)
+                 for file_name in file_names]
+    assert create_file_list.walk_source_tree(source_root, max_workers=2) == walk_list
+
+    # Make sure only directories that can not contain included files are skipped
+    prune_patterns = create_file_list.get_prune_patterns([r'.*\.git.*', r'/build/', r'/doc$', r'\.txt\b'])
+    assert len(prune_patterns) == 1
+    assert (create_file_list.walk_source_tree(source_root, prune_patterns, 2) ==
+            [file_path for file_path in walk_list if '/.git/' not in file_path and '/build/' not in file_path])
+
+
+def test_git_file_list(tmp_path):
+    # Import the module
+    from scrub.utils.filtering import create_file_list
+
+    # Create a sample git repository
+    source_root = str(tmp_path)
+    for file_path in ['main.c', 'src/a.c', 'src/deleted.c', 'build/out.c', 'new.c', '.gitignore']:
+        os.makedirs(os.path.dirname(os.path.join(source_root, file_path)), exist_ok=True)
+        with open(os.path.join(source_root, file_path), 'w') as output_fh:
+            output_fh.write('build/\n')
+    subprocess.run(['git', 'init', '-q'], cwd=source_root, check=True)
+    subprocess.run(['git', 'add', 'main.c', 'src', '.gitignore'], cwd=source_root, check=True)
+    os.remove(source_root + '/src/deleted.c')
+
+    # Check the tracked and untracked files
+    assert create_file_list.list_git_files(source_root) == [source_root + '/.gitignore', source_root + '/main.c',
+                                                            source_root + '/src/a.c']
+    assert create_file_list.list_git_files(source_root, True)[-1] == source_root + '/new.c'
+
+    # Make sure the regex filters are applied and the walk is used outside of a work tree
+    create_file_list.create_file_list(source_root, source_root + '/files', '', '', 2, 'git')
+    with open(source_root + '/files', 'r') as input_fh:
+        assert input_fh.read() == 'main.c\nsrc/a.c\n'
+    assert create_file_list.list_git_files('/') is None
+
+
+def test_walk_cache(tmp_path):
+    # Import the module
+    from scrub.utils.filtering import create_file_list
+
+    # Create a sample source tree
+    source_root = str(tmp_path / 'source')
+    walk_cache_file = str(tmp_path / 'SCRUBWalkCache')
+    output_file = str(tmp_path / 'SCRUBAnalysisFilteringList')
+    for file_path in ['main.c', 'src/a.c', 'src/b/b.c', 'src/b/out.o']:
+        os.makedirs(os.path.dirname(os.path.join(source_root, file_path)), exist_ok=True)
+        open(os.path.join(source_root, file_path), 'w').close()
+
+    # Age the directories so that their listings can be reused
+    for root, _, _ in os.walk(source_root):
+        os.utime(root, (0, 0))
+
+    # Create the file list twice, making sure the second run reuses the listings
+    file_lists = []
+    for _ in range(0, 2):
+        create_file_list.create_file_list(source_root, output_file, '', '', 2, 'walk', False, walk_cache_file)
+        with open(output_file, 'r') as input_fh:
+            file_lists.append(input_fh.read())
+    assert file_lists[0] == file_lists[1] == 'main.c\nsrc/a.c\nsrc/b/b.c\n'
+    walk_cache = create_file_list.load_walk_cache(walk_cache_file, source_root)
+    assert all(listing['mtime'] == 0 for listing in walk_cache.values())
+
+    # Make sure the cached listing is not used after a directory changes
+    with open(source_root + '/src/new.c', 'w') as output_fh:
+        output_fh.write('int a;\n')
+    create_file_list.create_file_list(source_root, output_file, '', '', 2, 'walk', False, walk_cache_file)
+    with open(output_file, 'r') as input_fh:
+        assert sorted(input_fh.read().split()) == ['main.c', 'src/a.c', 'src/b/b.c', 'src/new.c']
+    source_dirs = create_file_list.walk_source_dirs(source_root, walk_cache=walk_cache)
+    assert [source_dir[2] for source_dir in source_dirs] == [True, False, True]
+
+
+def test_move_warnings(tmp_path):
+    # Import the modules
+    from scrub.utils import translate_results
+    from scrub.utils.filtering import move_warnings
+
+    # Create a sample source tree and set of warnings
+    warning_list = []
+    for i in range(0, 12):
+        source_file = 'src/dir%d/file%d.c' % (i % 3, i % 2)
+        os.makedirs(str(tmp_path / os.path.dirname(source_file)), exist_ok=True)
+        open(str(tmp_path / source_file), 'w').close()
+        warning_list.append(translate_results.create_warning('gcc%03d' % i, source_file, i + 1, ['Warning %d' % i],
+                                                             'gcc'))
+    warning_list.append(translate_results.create_warning('gcc012', 'src/missing.c', 1, ['Missing'], 'gcc'))
+    translate_results.create_scrub_output_file(warning_list, str(tmp_path / 'gcc.scrub'))
+
+    # Distribute the warnings sequentially and in parallel
+    distributed_files = []
+    for max_workers in [1, 4]:
+        move_warnings.move_warnings(str(tmp_path / 'gcc.scrub'), str(tmp_path), max_workers)
+        distributed_files.append({scrub_file: open(scrub_file, 'r').read()
+                                  for scrub_file in glob.glob(str(tmp_path) + '/src/*/.scrub/gcc.scrub')})
+        for scrub_file in distributed_files[-1]:
+            os.remove(scrub_file)
+
+    # Make sure the results match and keep the original warning order
+    assert len(distributed_files[0]) == 3
+    assert distributed_files[0] == distributed_files[1]
+    assert distributed_files[0][str(tmp_path / 'src/dir0/.scrub/gcc.scrub')].count('gcc0') == 4
+    assert ':file0.c:1:' in distributed_files[0][str(tmp_path / 'src/dir0/.scrub/gcc.scrub')]
+
+
+def test_move_warning_list(tmp_path):
+    # Import the modules
+    from scrub.utils import translate_results
+    from scrub.utils.filtering import move_warnings
+
+    # Create a sample source tree and set of warnings
+    warning_list = []
+    for i in range(0, 6):
+        source_file = 'src/dir%d/file.c' % (i % 2)
+        os.makedirs(str(tmp_path / os.path.dirname(source_file)), exist_ok=True)
+        open(str(tmp_path / source_file), 'w').close()
+        warning_list.append(translate_results.create_warning('gcc%03d' % i, source_file, i + 1,
+                                                             ['Warning %d' % i, 'Details'], 'gcc', query='W%d' % i,
+                                                             suppress=(i == 5)))
+    translate_results.create_scrub_output_file(warning_list, str(tmp_path / 'gcc.scrub'))
+
+    # Distribute the warnings from the output file and from memory
+    distributed_files = []
+    for from_memory in [False, True]:
+        if from_memory:
+            move_warnings.move_warning_list(warning_list, 'gcc.scrub', str(tmp_path))
+        else:
+            move_warnings.move_warnings(str(tmp_path / 'gcc.scrub'), str(tmp_path))
+        distributed_files.append({scrub_file: open(scrub_file, 'r').read()
+                                  for scrub_file in glob.glob(str(tmp_path) + '/src/*/.scrub/gcc.scrub')})
+        for scrub_file in distributed_files[-1]:
+            os.remove(scrub_file)
+
+    # Make sure the results match
+    assert len(distributed_files[0]) == 2
+    assert distributed_files[0] == distributed_files[1]
+    assert 'gcc005' not in distributed_files[1][str(tmp_path / 'src/dir1/.scrub/gcc.scrub')]
+
+    # Make sure the SARIF output matches as well
+    parsed_results = [dict(warning, file=str(tmp_path / warning['file'])) for warning in warning_list
+                      if not warning['suppress']]
+    translate_results.perform_translation(str(tmp_path / 'gcc.scrub'), str(tmp_path / 'parsed.sarif'),
+                                          str(tmp_path), 'sarifv2.1.0')
+    translate_results.perform_translation(str(tmp_path / 'gcc.scrub'), str(tmp_path / 'memory.sarif'),
+                                          str(tmp_path), 'sarifv2.1.0', parsed_results)
+    assert open(str(tmp_path / 'parsed.sarif'), 'r').read() == open(str(tmp_path / 'memory.sarif'), 'r').read()
+
+
+def test_distribution_index(tmp_path):
+    # Import the modules
+    from scrub.utils import translate_results
+    from scrub.utils import show_results
+    from scrub.utils.filtering import move_warnings
+
+    # Create a sample source tree and set of warnings
+    warning_list = []
+    for i in range(0, 6):
+        source_file = 'src/dir%d/file.c' % (i % 2)
+        os.makedirs(str(tmp_path / os.path.dirname(source_file)), exist_ok=True)
+        open(str(tmp_path / source_file), 'w').close()
+        warning_list.append(translate_results.create_warning('gcc%03d' % i, source_file, i + 1,
+                                                             ['Warning %d' % i, 'Details'], 'gcc', query='W%d' % i))
+    os.makedirs(str(tmp_path / '.scrub'))
+    translate_results.create_scrub_output_file(warning_list, str(tmp_path / '.scrub/gcc.scrub'))
+
+    # Create the index
+    index_file = str(tmp_path / '.scrub/SCRUBDistributionIndex')
+    move_warnings.create_distribution_index([str(tmp_path / '.scrub/gcc.scrub')], str(tmp_path), index_file)
+
+    # Make sure the warnings for each directory can be retrieved
+    dir0_warnings = show_results.show(str(tmp_path / 'src/dir0'))
+    assert dir0_warnings == [translate_results.format_scrub_warning(warning)[:-1] for warning in warning_list[0::2]]
+    assert len(show_results.show(str(tmp_path / 'src/dir1'), index_file)) == 3
+    assert show_results.show(str(tmp_path / 'src')) == []
+    assert not glob.glob(str(tmp_path) + '/src/*/.scrub')
+
+
+def test_distribution_manifest(tmp_path):
+    # Import the modules
+    from scrub.utils import do_clean
+
+    # Create a sample source tree with distributed results
+    for scrub_dir in ['src/dir0/.scrub', 'src/dir1/.scrub', 'src/dir2/.scrub', '.scrub/cache']:
+        os.makedirs(str(tmp_path / scrub_dir))
+    manifest_file = do_clean.get_manifest_file(str(tmp_path))
+    do_clean.write_distribution_manifest(manifest_file, ['src/dir0/.scrub', 'src/dir1/.scrub', '.scrub', '../.scrub'])
+
+    # Only the directories in the manifest should be removed
+    do_clean.clean_subdirs(str(tmp_path))
+    assert sorted(glob.glob(str(tmp_path) + '/src/*/.scrub')) == [str(tmp_path / 'src/dir2/.scrub')]
+    assert os.path.isdir(str(tmp_path / '.scrub/cache'))
+    assert do_clean.read_distribution_manifest(manifest_file) == []
+
+    # Stale manifests should fall back to searching the tree
+    os.makedirs(str(tmp_path / 'src/dir0/.scrub'))
+    do_clean.write_distribution_manifest(manifest_file, ['src/dir0/.scrub'], False)
+    assert do_clean.read_distribution_manifest(manifest_file) is None
+    do_clean.clean_subdirs(str(tmp_path))
+    assert not glob.glob(str(tmp_path) + '/src/*/.scrub')
+
+    # Cleaning the directory should remove everything
+    os.makedirs(str(tmp_path / 'src/dir1/.scrub'))
+    do_clean.write_distribution_manifest(manifest_file, ['src/dir1/.scrub'])
+    do_clean.clean_directory(str(tmp_path))
+    assert not glob.glob(str(tmp_path) + '/**/.scrub', recursive=True)
+
+
+def test_parallel_tools(tmp_path):
+    # Import the modules
+    from scrub import scrubme
+    from scrub.utils import checkpoints
+    from scrub.utils import scrub_utilities
+
+    # Create a configuration file with every tool disabled
+    with open(helpers.c_conf_file, 'r') as input_fh:
+        conf_data = helpers.disable_all_tools(input_fh.readlines())
+    conf_data = helpers.update_tag(conf_data, 'SOURCE_DIR', str(tmp_path))
+    helpers.create_conf_file(conf_data, str(tmp_path / 'scrub.cfg'))
+    scrub_conf_data = scrub_utilities.parse_common_configs(str(tmp_path / 'scrub.cfg'))
+
+    # Run the tools sequentially and concurrently
+    execution_status = []
+    parallel_conf_data = scrub_conf_data.copy()
+    for module_name in helpers.module_list_c:
+        execution_status.append([module_name, scrubme.run_module(module_name, scrub_conf_data)])
+    parallel_execution_status = []
+    scrubme.run_parallel_modules(helpers.module_list_c, parallel_conf_data, 3, parallel_execution_status)
+
+    # Make sure the status table and the updated configuration values are the same
+    assert parallel_execution_status == execution_status
+    assert parallel_conf_data == scrub_conf_data
+
+    # Make sure the configuration values restored from a checkpoint in a worker process are kept
+    checkpoints.write_checkpoint(helpers.module_list_c[0], scrub_conf_data,
+                                 checkpoints.get_input_hash(helpers.module_list_c[0], scrub_conf_data),
+                                 {'gcc_version': '1.0'})
+    scrubme.run_parallel_modules(helpers.module_list_c, parallel_conf_data, 3, [], True)
+    assert parallel_conf_data.get('gcc_version') == '1.0'
+    assert [status[1] for status in execution_status] == [2] * len(helpers.module_list_c)
+
+
+def test_tool_workspaces(tmp_path, caplog, monkeypatch):
+    # Import the module
+    from scrub.utils import workspaces
+
+    # Create a sample git repository with a SCRUB output directory
+    source_root = str(tmp_path / 'repo')
+    for file_path in ['src/main.c', '.scrub/raw_results/gcc_raw.scrub', 'src/.scrub/gcc.scrub']:
+        os.makedirs(os.path.dirname(os.path.join(source_root, file_path)), exist_ok=True)
+        with open(os.path.join(source_root, file_path), 'w') as output_fh:
+            output_fh.write('int main(void) { return 0; }\n')
+    subprocess.run(['git', 'init', '-q'], cwd=source_root, check=True)
+    subprocess.run(['git', 'add', 'src/main.c'], cwd=source_root, check=True)
+    subprocess.run(['git', '-c', 'user.name=scrub', '-c', 'user.email=scrub@localhost', 'commit', '-q', '-m', 'init'],
+                   cwd=source_root, check=True)
+
+    # Make local changes that have not been committed
+    with open(source_root + '/src/main.c', 'a') as output_fh:
+        output_fh.write('int changed = 1;\n')
+    with open(source_root + '/src/new.c', 'w') as output_fh:
+        output_fh.write('int added = 1;\n')
+    os.chmod(source_root + '/src/new.c', 0o750)
+
+    # Create each type of workspace, making sure the local changes are included
+    for workspace_mode in ['hardlink', 'copy', 'worktree']:
+        workspace_dir = str(tmp_path / workspace_mode)
+        workspace_source_dir, used_mode = workspaces.create_workspace(source_root, workspace_dir, workspace_mode)
+        assert used_mode == workspace_mode
+        with open(workspace_source_dir + '/src/main.c', 'r') as input_fh:
+            assert input_fh.read().endswith('int changed = 1;\n')
+        with open(workspace_source_dir + '/src/new.c', 'r') as input_fh:
+            assert input_fh.read() == 'int added = 1;\n'
+        assert os.stat(workspace_source_dir + '/src/new.c').st_mode & 0o777 == 0o750
+        assert not glob.glob(workspace_dir + '/**/.scrub', recursive=True)
+        workspaces.remove_workspace(source_root, workspace_dir)
+        assert not os.path.exists(workspace_dir)
+
+    # Make sure a working directory inside the source tree is not copied into itself
+    working_dir = source_root + '/scrub_work'
+    workspace_source_dir, _ = workspaces.create_workspace(source_root, working_dir + '/workspaces/gcc', 'copy',
+                                                          [working_dir])
+    assert os.path.isfile(workspace_source_dir + '/src/main.c')
+    assert sorted(os.listdir(workspace_source_dir)) == ['.git', 'src']
+    shutil.rmtree(working_dir)
+
+    # Make sure a worktree that can not include the local changes falls back to a copy
+    caplog.clear()
+    with monkeypatch.context() as patch:
+        patch.setattr(workspaces, 'apply_local_changes', lambda git_root, worktree_dir, ignore_function: False)
+        workspace_source_dir, used_mode = workspaces.create_workspace(source_root, str(tmp_path / 'fallback'),
+                                                                      'worktree')
+    assert used_mode == 'copy'
+    assert subprocess.run(['git', 'worktree', 'list', '--porcelain'], cwd=source_root, stdout=subprocess.PIPE,
+                          universal_newlines=True).stdout.count('worktree ') == 1
+    assert 'Copying the source tree instead' in caplog.text
+    assert os.path.isfile(workspace_source_dir + '/src/new.c')
+    workspaces.remove_workspace(source_root, str(tmp_path / 'fallback'))
+
+    # Make sure tools that are not read only do not share files with the source tree
+    module_object = types.ModuleType('scrub.tools.compiler.do_gcc')
+    module_object.run_analysis = lambda conf_data: int(os.path.samefile(conf_data.get('source_dir') + '/src/main.c',
+                                                                        source_root + '/src/main.c'))
+    assert workspaces.run_in_workspace(module_object, 'gcc', {'source_dir': source_root, 'gcc_warnings': True,
+                                                              'scrub_working_dir': working_dir,
+                                                              'raw_results_dir': source_root + '/.scrub/raw_results'},
+                                       'hardlink') == 0
+    assert 'gcc is not registered as read_only' in caplog.text
+
+    # Make sure the build directories are moved into the workspace
+    conf_data = workspaces.get_workspace_conf_data({'source_dir': source_root, 'gcc_build_dir': source_root + '/src',
+                                                    'codeql_build_dir': '/external', 'source_lang': 'c'},
+                                                   str(tmp_path / 'gcc'))
+    assert conf_data == {'source_dir': str(tmp_path / 'gcc'), 'gcc_build_dir': str(tmp_path / 'gcc/src'),
+                         'codeql_build_dir': '/external', 'source_lang': 'c'}
+
+    # Make sure the results are mapped back to the source directory
+    results_dir = source_root + '/.scrub/raw_results'
+    with open(results_dir + '/gcc_raw.scrub', 'w') as output_fh:
+        output_fh.write('gcc001 <Low> :%s/src/main.c:1: \n    Warning\n\n' % str(tmp_path / 'gcc'))
+        output_fh.write('gcc002 <Low> :%s/main.c:1: \n    Warning\n\n' % str(tmp_path / 'gcc_other'))
+    with open(results_dir + '/codeql_raw.scrub', 'w') as output_fh:
+        output_fh.write('codeql001 <Low> :%s/src/main.c:1: \n    Warning\n\n' % str(tmp_path / 'gcc'))
+    workspaces.map_results_paths(results_dir, str(tmp_path / 'gcc'), source_root, 'gcc')
+    with open(results_dir + '/gcc_raw.scrub', 'r') as input_fh:
+        results_data = input_fh.read()
+    assert ':%s/src/main.c:1:' % source_root in results_data
+    assert ':%s/main.c:1:' % str(tmp_path / 'gcc_other') in results_data
+
+    # Make sure the results of other tools are not modified
+    with open(results_dir + '/codeql_raw.scrub', 'r') as input_fh:
+        assert ':%s/src/main.c:1:' % str(tmp_path / 'gcc') in input_fh.read()
+
+
+def test_build_capture(tmp_path):
+    # Import the module
+    from scrub.utils import build_capture
+
+    # Make sure only compiled source files are found
+    assert build_capture.get_source_files(['gcc', '-c', 'main.c', '-o', 'main.o'], '/src') == ['/src/main.c']
+    assert build_capture.get_source_files(['gcc', '-include', 'config.c', 'util.cpp'], '/src') == ['/src/util.cpp']
+    assert build_capture.get_source_files(['gcc', '-E', 'main.c'], '/src') == []
+    assert build_capture.get_source_files(['gcc', 'main.o', '-o', 'main'], '/src') == []
+
+    # Create a sample set of compiler invocations
+    build_dir = str(tmp_path / 'src')
+    invocations_file = str(tmp_path / 'compiler_invocations.log')
+    with open(invocations_file, 'w') as output_fh:
+        for directory, arguments in [(build_dir, ['/usr/bin/gcc', '-c', 'main.c']),
+                                     (build_dir + '/lib', ['/usr/bin/gcc', '-c', 'a.c', 'b.c']),
+                                     (build_dir, ['/usr/bin/gcc', '-c', 'main.c']),
+                                     (build_dir, ['/usr/bin/gcc', 'main.o', 'lib/a.o', '-o', 'main'])]:
+            output_fh.write(json.dumps({'directory': directory, 'arguments': arguments}) + '\n')
+        output_fh.write(json.dumps({'directory': build_dir, 'arguments': ['/usr/bin/gcc', '-c', 'x.c']})[:20] + '\n')
+
+    # Create the compilation database, skipping the incomplete invocation
+    database_file = str(tmp_path / 'compile_commands.json')
+    compilations = build_capture.create_compilation_database(invocations_file, database_file)
+    assert len(compilations) == 2
+    with open(database_file, 'r') as input_fh:
+        assert [entry['file'] for entry in json.load(input_fh)] == [build_dir + '/main.c', build_dir + '/lib/a.c',
+                                                                     build_dir + '/lib/b.c']
+
+    # Make sure the replay script runs relative to the build directory
+    replay_file = str(tmp_path / 'replay.sh')
+    build_capture.create_replay_script(compilations, build_dir, replay_file)
+    with open(replay_file, 'r') as input_fh:
+        replay_data = input_fh.read()
+    assert 'cd "$SCRUB_REPLAY_ROOT"/lib && /usr/bin/gcc -c a.c b.c\n' in replay_data
+    assert build_dir not in replay_data
+
+    # Make sure the tools are pointed at the captured build
+    conf_data = {}
+    build_capture.apply_build_capture(conf_data, {'build_capture_tools': 'gcc, coverity',
+                                                  'build_capture_build_dir': build_dir,
+                                                  'build_capture_output_file': str(tmp_path / 'build.log'),
+                                                  'build_capture_database_file': database_file,
+                                                  'build_capture_replay_file': replay_file})
+    assert conf_data['gcc_capture_file'] == str(tmp_path / 'build.log')
+    assert conf_data['coverity_build_cmd'] == 'sh ' + replay_file
+    assert conf_data['coverity_clean_cmd'] == 'true'
+    assert 'klocwork_build_cmd' not in conf_data
+
+    # Record long invocations concurrently through a wrapper in a directory with a space in its name
+    shim_dir = str(tmp_path / 'shim bin')
+    build_capture.create_compiler_shims(shim_dir, ['echo'], invocations_file)
+    os.remove(invocations_file)
+    arguments = ['-DVALUE_%d=%s' % (i, 'x' * 1000) for i in range(0, 200)]
+    procs = [subprocess.Popen([shim_dir + '/echo', str(i)] + arguments, stdout=subprocess.DEVNULL)
+             for i in range(0, 8)]
+    assert [proc.wait() for proc in procs] == [0] * 8
+    with open(invocations_file, 'r') as input_fh:
+        invocations = [json.loads(line) for line in input_fh]
+    assert sorted(invocation['arguments'][1] for invocation in invocations) == [str(i) for i in range(0, 8)]
+    assert all(invocation['arguments'][2:] == arguments for invocation in invocations)
+
+
+def test_result_cache(tmp_path):
+    # Import the module
+    import types
+    from scrub.utils import result_cache
+
+    # Create a sample source tree
+    source_root = str(tmp_path / 'src')
+    os.makedirs(source_root + '/.scrub/raw_results')
+    with open(source_root + '/main.c', 'w') as output_fh:
+        output_fh.write('int main(void) { return 0; }\n')
+    source_hash = result_cache.hash_source_files(source_root, ['main.c'], str(tmp_path / 'SCRUBSourceHashes'))
+    assert result_cache.hash_source_files(source_root, ['main.c'], str(tmp_path / 'SCRUBSourceHashes')) == source_hash
+
+    # Create a sample tool that writes a single results file
+    tool_runs = []
+    raw_results_file = source_root + '/.scrub/raw_results/sample_raw.scrub'
+
+    def run_sample_tool():
+        tool_runs.append(1)
+        with open(raw_results_file, 'w') as output_fh:
+            output_fh.write('sample001 <Low> :%s/main.c:1: \n    Warning\n\n' % source_root)
+        return 0
+
+    sample_module = types.ModuleType('do_sample')
+    sample_module.get_version_number = lambda sample_path: '1.0'
+    conf_data = {'source_dir': source_root, 'source_lang': 'c', 'raw_results_dir': source_root + '/.scrub/raw_results',
+                 'result_cache': True, 'result_cache_dir': str(tmp_path / 'cache'), 'result_cache_max_size': 1,
+                 'result_cache_source_hash': source_hash, 'sample_warnings': True, 'sample_path': '',
+                 'sample_build_dir': source_root}
+
+    # Make sure the results are restored on the second run
+    assert result_cache.run_cached_analysis(sample_module, 'sample', conf_data, run_sample_tool) == 0
+    os.remove(raw_results_file)
+    assert result_cache.run_cached_analysis(sample_module, 'sample', conf_data, run_sample_tool) == 0
+    assert len(tool_runs) == 1
+    with open(raw_results_file, 'r') as input_fh:
+        assert ':%s/main.c:1:' % source_root in input_fh.read()
+
+    # Make sure the cache is independent of the location of the source code
+    moved_conf_data = conf_data.copy()
+    moved_conf_data.update({'source_dir': str(tmp_path / 'moved'), 'sample_build_dir': str(tmp_path / 'moved')})
+    assert (result_cache.get_cache_key(sample_module, 'sample', moved_conf_data) ==
+            result_cache.get_cache_key(sample_module, 'sample', conf_data))
+
+    # Make sure the tool is run again when the configuration or tool version changes
+    conf_data.update({'sample_build_cmd': 'make all'})
+    assert result_cache.run_cached_analysis(sample_module, 'sample', conf_data, run_sample_tool) == 0
+    sample_module.get_version_number = lambda sample_path: '2.0'
+    assert result_cache.run_cached_analysis(sample_module, 'sample', conf_data, run_sample_tool) == 0
+    assert len(tool_runs) == 3
+    assert len(glob.glob(str(tmp_path / 'cache/*/*/SCRUBCacheEntry'))) == 3
+
+    # Make sure the least recently used entries are removed
+    result_cache.evict_entries(str(tmp_path / 'cache'), 0)
+    assert not glob.glob(str(tmp_path / 'cache/*/*/SCRUBCacheEntry'))
+
+
+def test_incremental(tmp_path):
+    # Import the modules
+    from scrub.utils import incremental
+    from scrub.utils import result_cache
+
+    # Create a sample git repository
+    source_root = str(tmp_path / 'repo')
+    os.makedirs(source_root + '/src')
+    for file_name in ['main.c', 'util.c']:
+        with open(source_root + '/src/' + file_name, 'w') as output_fh:
+            output_fh.write('int main(void) { return 0; }\n')
+    subprocess.run(['git', 'init', '-q'], cwd=source_root, check=True)
+    subprocess.run(['git', 'add', '.'], cwd=source_root, check=True)
+    subprocess.run(['git', '-c', 'user.name=scrub', '-c', 'user.email=scrub@localhost', 'commit', '-q', '-m', 'init'],
+                   cwd=source_root, check=True)
+
+    # Record the file hashes of a previous run
+    previous_dir = str(tmp_path / 'previous/.scrub')
+    os.makedirs(previous_dir + '/cache')
+    result_cache.get_file_hashes(source_root, ['src/main.c', 'src/util.c'], previous_dir + '/cache/SCRUBSourceHashes')
+
+    # Change one file and add another
+    with open(source_root + '/src/util.c', 'a') as output_fh:
+        output_fh.write('int unused;\n')
+    with open(source_root + '/src/new.c', 'w') as output_fh:
+        output_fh.write('int added;\n')
+
+    # Make sure the changes are found using git and the previous run
+    assert incremental.get_git_changed_files(source_root, 'HEAD') == ['src/new.c', 'src/util.c']
+    assert incremental.get_git_changed_files(source_root, 'missing-revision') is None
+    assert incremental.get_previous_changed_files(source_root, previous_dir,
+                                                  ['src/main.c', 'src/new.c', 'src/util.c']) == ['src/new.c',
+                                                                                                  'src/util.c']
+
+    # Make sure the files that include a changed header are found
+    for file_name, file_data in [('config.h', '#define SIZE 1\n'), ('util.h', '#include "config.h"\n'),
+                                 ('io.c', '  #  include <src/util.h>\n'), ('other.c', '#include "other.h"\n')]:
+        with open(source_root + '/src/' + file_name, 'w') as output_fh:
+            output_fh.write(file_data)
+    source_files = ['src/config.h', 'src/io.c', 'src/main.c', 'src/other.c', 'src/util.h']
+    assert incremental.get_including_files(source_root, source_files, ['src/config.h']) == ['src/io.c', 'src/util.h']
+    assert incremental.get_including_files(source_root, source_files, ['src/util.h', 'src/io.c']) == []
+    assert incremental.get_including_files(source_root, source_files, ['src/main.c']) == []
+
+    # Create the filtered results of the previous run
+    with open(previous_dir + '/compiler.scrub', 'w') as output_fh:
+        output_fh.write('gcc001 <Low> :src/main.c:1: \n    Unchanged warning\n\n')
+        output_fh.write('gcc002 <Low> :src/util.c:1: \n    Outdated warning\n\n')
+    with open(source_root + '/SCRUBAnalysisFilteringList', 'w') as output_fh:
+        output_fh.write('src/main.c\nsrc/new.c\nsrc/util.c\n')
+
+    # Merge the new warnings for the changed files with the previous warnings
+    conf_data = {'source_dir': source_root, 'incremental_changed_files': ['src/new.c', 'src/util.c'],
+                 'incremental_results_dir': previous_dir, 'query_filters': '',
+                 'filtering_output_file': source_root + '/SCRUBAnalysisFilteringList'}
+    new_warnings = incremental.get_changed_warnings(
+        [{'id': 'gcc001', 'file': source_root + '/src/main.c', 'line': 1, 'description': ['Duplicate warning'],
+          'tool': 'gcc', 'priority': 'Low', 'query': '', 'suppress': False},
+         {'id': 'gcc002', 'file': source_root + '/src/util.c', 'line': 2, 'description': ['New warning'],
+          'tool': 'gcc', 'priority': 'Low', 'query': '', 'suppress': False}], conf_data)
+    assert [warning['description'] for warning in new_warnings] == [['New warning']]
+    new_warnings[0]['file'] = 'src/util.c'
+    merged_warnings = incremental.merge_previous_warnings(new_warnings, str(tmp_path / 'compiler.scrub'), conf_data)
+    assert [(warning['id'], warning['file'], warning['description']) for warning in merged_warnings] == [
+        ('gcc001', 'src/main.c', ['Unchanged warning']), ('gcc002', 'src/util.c', ['New warning'])]
+    with open(str(tmp_path / 'compiler.scrub'), 'r') as input_fh:
+        assert 'Outdated warning' not in input_fh.read()
+
+
+def test_checkpoints(tmp_path):
+    # Import the module
+    from scrub.utils import checkpoints
+
+    # Create a sample SCRUB directory
+    source_root = str(tmp_path / 'src')
+    analysis_dir = source_root + '/.scrub'
+    os.makedirs(analysis_dir + '/raw_results')
+    os.makedirs(analysis_dir + '/sarif_results')
+    conf_data = {'source_dir': source_root, 'source_lang': 'c', 'scrub_analysis_dir': analysis_dir,
+                 'raw_results_dir': analysis_dir + '/raw_results', 'sarif_results_dir': analysis_dir + '/sarif_results',
+                 'checkpoint_dir': analysis_dir + '/checkpoints', 'gcc_warnings': True, 'query_filters': '',
+                 'suppression_index_file': analysis_dir + '/SCRUBSuppressionIndex'}
+
+    # Create a sample tool and filtering stage
+    stage_runs = []
+    raw_results_file = analysis_dir + '/raw_results/gcc_compiler_raw.scrub'
+
+    def run_sample_tool():
+        stage_runs.append('sample')
+        with open(raw_results_file, 'w') as output_fh:
+            output_fh.write('gcc001 <Low> :%s/main.c:%d: \n    Warning\n\n' % (source_root, len(stage_runs)))
+        conf_data.update({'gcc_version': '1.0'})
+        return 0
+
+    def run_sample_filtering():
+        stage_runs.append('filtering')
+        shutil.copyfile(raw_results_file, analysis_dir + '/compiler.scrub')
+        return 0
+
+    def run_stages(resume):
+        checkpoints.run_stage('scrub.tools.compiler.do_gcc', conf_data, run_sample_tool, resume)
+        checkpoints.run_stage('scrub.utils.do_filtering', conf_data, run_sample_filtering, resume)
+
+    # Make sure completed stages are skipped, and the configuration values they updated are restored
+    run_stages(False)
+    conf_data.pop('gcc_version')
+    run_stages(True)
+    assert stage_runs == ['sample', 'filtering']
+    assert conf_data.get('gcc_version') == '1.0'
+
+    # Make sure the stages are run again when the configuration changes
+    conf_data.pop('gcc_version')
+    conf_data.update({'gcc_build_cmd': 'make all'})
+    run_stages(True)
+    assert stage_runs == ['sample', 'filtering'] * 2
+
+    # Make sure a modified output causes the stage, and any stage that uses its outputs, to be run again
+    with open(raw_results_file, 'a') as output_fh:
+        output_fh.write('gcc002 <Low> :%s/main.c:2: \n    Warning\n\n' % source_root)
+    run_stages(True)
+    assert stage_runs == ['sample', 'filtering'] * 3
+
+    # Make sure filtering is run again when an indexed source file is edited
+    with open(source_root + '/main.c', 'w') as output_fh:
+        output_fh.write('int main(void) { return 0; }\n')
+    with open(conf_data.get('suppression_index_file'), 'w') as output_fh:
+        json.dump({'tags': [], 'files': {source_root + '/main.c': {}}}, output_fh)
+    run_stages(False)
+    run_stages(True)
+    assert stage_runs == ['sample', 'filtering'] * 4
+    with open(source_root + '/main.c', 'a') as output_fh:
+        output_fh.write('// scrub_ignore_warning gcc\n')
+    run_stages(True)
+    assert stage_runs == ['sample', 'filtering'] * 4 + ['filtering']
+
+    # Make sure a failed stage is not skipped
+    assert checkpoints.run_stage('scrub.tools.failed.do_failed', conf_data, lambda: 1) == 1
+    assert not os.path.exists(checkpoints.get_checkpoint_file('scrub.tools.failed.do_failed', conf_data))
+
+
+def test_tool_registry():
+    # Import the modules
+    import importlib
+    import configparser
+    from scrub.utils import tool_registry
+
+    # Read the default configuration sections
+    default_conf = configparser.ConfigParser()
+    default_conf.read(helpers.scrub_root + '/scrub/utils/scrub_defaults.cfg')
+
+    # Make sure every tool module is registered with the tags, configuration section, and order it uses
+    tool_modules = [os.path.relpath(tool_module, helpers.scrub_root)[:-3].replace('/', '.')
+                    for tool_module in glob.glob(helpers.scrub_root + '/scrub/tools/*/do_*.py')]
+    assert sorted(tool_data.get('module') for tool_data in tool_registry.BUILTIN_TOOLS) == sorted(tool_modules)
+    for tool_data in tool_registry.BUILTIN_TOOLS:
+        module_object = importlib.import_module(tool_data.get('module'))
+        assert tool_data.get('valid_tags') == getattr(module_object, 'VALID_TAGS')
+        assert default_conf.has_option(tool_data.get('config_section'), tool_data.get('name') + '_warnings')
+        assert tool_data.get('order') == (1 if tool_data.get('name') == 'custom' else 0)
+
+    # Make sure only the enabled tools are selected, and the custom checks run after every other tool
+    tool_groups = tool_registry.get_tool_groups({'gcc_warnings': True, 'custom_warnings': True})
+    assert [[tool_data.get('name') for tool_data in enabled_tools] for enabled_tools, _ in tool_groups] == [
+        ['gcc'], ['custom']]
+    assert tool_registry.find_tool('scrub.utils.filtering.do_filtering') is None
+
+
+def test_execute_command(tmp_path):
+    # Import the module
+    import time
+    import pytest
+    from scrub.utils import scrub_utilities
+
+    # Make sure the output is written to the output file
+    output_file = str(tmp_path / 'output.log')
+    scrub_utilities.execute_command('seq 1 5000', os.environ.copy(), output_file)
+    with open(output_file, 'r') as input_fh:
+        assert input_fh.read() == ''.join('%d\n' % line for line in range(1, 5001))
+
+    # Make sure only the end of the output is reported when the command fails
+    with pytest.raises(scrub_utilities.CommandExecutionError) as error:
+        scrub_utilities.execute_command('seq 1 5000; exit 3', os.environ.copy())
+    assert 'exited with code 3' in str(error.value)
+    assert '\n5000\n' in str(error.value) and '\n10\n' not in str(error.value)
+
+    # Make sure the command, and the processes it started, are stopped when the timeout expires
+    start_time = time.time()
+    with pytest.raises(scrub_utilities.CommandExecutionError) as error:
+        scrub_utilities.execute_command('echo started; sleep 30 | cat', os.environ.copy(), output_file, timeout=1)
+    assert time.time() - start_time < 10
+    assert 'did not complete within 1 seconds' in str(error.value)
+    with open(output_file, 'r') as input_fh:
+        assert input_fh.read() == 'started\n'
+
+    # Make sure the processes started by the command are stopped when the output can not be processed
+    def stop_on_child_pid(stdout_line):
+        child_pids.append(int(stdout_line))
+        raise ValueError('Sample error')
+    child_pids = []
+    with pytest.raises(ValueError):
+        scrub_utilities.execute_command('sleep 30 & echo $!; wait', os.environ.copy(), line_callback=stop_on_child_pid)
+    for _ in range(0, 50):
+        try:
+            os.kill(child_pids[0], 0)
+            time.sleep(0.1)
+        except ProcessLookupError:
+            break
+    else:
+        assert False, 'The sleep process is still running'
+
+
+def test_command_executor(tmp_path):
+    # Import the modules
+    import time
+    import pytest
+    from scrub.utils import command_executor
+    from scrub import scrubme
+    from scrub.utils import scrub_utilities
+    from scrub.tools.codeql import do_codeql
+
+    # Make sure independent commands run concurrently and the output of each command is returned in order. Each of the
+    # first two commands waits for the other one to start, so they time out unless they run at the same time.
+    wait_command = 'touch {0}/{1}; while [ ! -e {0}/{2} ]; do sleep 0.1; done; echo {1}'
+    assert command_executor.run_commands([wait_command.format(tmp_path, 'first', 'second'),
+                                          wait_command.format(tmp_path, 'second', 'first'),
+                                          'echo error 1>&2; echo third'], os.environ.copy(), 3, timeout=30,
+                                         capture_output=True) == ['first\n', 'second\n', 'third\n']
+
+    # Make sure a failed command stops the commands that are still running
+    start_time = time.time()
+    with pytest.raises(scrub_utilities.CommandExecutionError) as error:
+        command_executor.run_commands(['sleep 30 | cat', 'echo failed; exit 4'], os.environ.copy(), 2)
+    assert time.time() - start_time < 10
+    assert 'exited with code 4' in str(error.value)
+
+    # Make sure the command is stopped when the timeout expires
+    with pytest.raises(scrub_utilities.CommandExecutionError) as error:
+        command_executor.run_command('sleep 30 | cat', os.environ.copy(), timeout=0.5)
+    assert 'did not complete within 0.5 seconds' in str(error.value)
+
+    # Make sure the tool modules use the executor to probe the tool version
+    with open(str(tmp_path / 'codeql'), 'w') as output_fh:
+        output_fh.write('#!/bin/sh\necho "CodeQL command-line toolchain release 2.9.0"\n')
+    os.chmod(str(tmp_path / 'codeql'), 0o755)
+    assert do_codeql.get_version_number(str(tmp_path)) == '2.9.0'
+
+    # Make sure the version commands of the enabled tools are run at the same time at startup. Each command only
+    # reports a version once the other command has started.
+    wait_script = ('#!/bin/sh\ntouch {0}/{1}.started\nfor i in $(seq 300); do\n    [ -e {0}/{2}.started ] && break\n'
+                   '    sleep 0.1\ndone\n[ -e {0}/{2}.started ] || exit 1\n')
+    with open(str(tmp_path / 'kwinject'), 'w') as output_fh:
+        output_fh.write(wait_script.format(tmp_path, 'kwinject', 'codeql') +
+                        'echo "Klocwork Build Tool"\necho "Version 2023.1.4.123"\n')
+    os.chmod(str(tmp_path / 'kwinject'), 0o755)
+    with open(str(tmp_path / 'codeql'), 'w') as output_fh:
+        output_fh.write(wait_script.format(tmp_path, 'codeql', 'kwinject') +
+                        'echo "CodeQL command-line toolchain release 2.9.0"\n')
+    conf_data = {'codeql_warnings': True, 'codeql_path': str(tmp_path), 'klocwork_warnings': True,
+                 'klocwork_path': str(tmp_path)}
+    scrubme.probe_tool_versions(conf_data)
+    assert conf_data.get('codeql_version') == '2.9.0'
+    assert conf_data.get('klocwork_version') == '2023.1.4'
+
+
+def test_live_warning_parsing(tmp_path):
+    # Import the modules
+    from scrub.utils import scrub_utilities
+    from scrub.utils import command_executor
+    from scrub.tools.compiler import get_gcc_warnings
+    from scrub.tools.compiler import get_javac_warnings
+
+    # Create sample build logs
+    gcc_log_file = str(tmp_path / 'gcc_build.log')
+    with open(gcc_log_file, 'w') as output_fh:
+        output_fh.write('gcc -c main.c\n')
+        for line in range(1, 251):
+            output_fh.write('main.c:%d:5: warning: unused variable [-Wunused-variable]\n' % line)
+    javac_log_file = str(tmp_path / 'javac_build.log')
+    with open(javac_log_file, 'w') as output_fh:
+        output_fh.write('Main.java:3: warning: [deprecation] Date in java.util has been deprecated\n')
+        output_fh.write('Main.java:7: error: cannot find symbol\n')
+
+    # Make sure the warnings found while the build runs match the warnings found in the log file afterwards
+    for parser, log_file in [(get_gcc_warnings, gcc_log_file), (get_javac_warnings, javac_log_file)]:
+        live_warnings = []
+        scrub_utilities.execute_command('cat ' + log_file, os.environ.copy(), str(tmp_path / 'build.log'),
+                                        line_callback=lambda line: parser.parse_line(line, live_warnings))
+        parser.write_warnings(live_warnings, str(tmp_path / 'live.scrub'))
+        parser.parse_warnings(log_file, str(tmp_path / 'log.scrub'))
+        with open(str(tmp_path / 'live.scrub'), 'r') as live_fh, open(str(tmp_path / 'log.scrub'), 'r') as log_fh:
+            assert live_fh.read() == log_fh.read()
+
+    # Make sure warnings that do not refer to a source line are skipped instead of stopping the build
+    with open(gcc_log_file, 'a') as output_fh:
+        output_fh.write("cc1: warning: command-line option '-Wno-foo' is valid for C++ but not for C\n")
+        output_fh.write('ld: warning: main.o: missing .note.GNU-stack section implies executable stack\n')
+        output_fh.write('main.c:3:5: note: in expansion of macro; warning: see above\n')
+        output_fh.write('warning:\n')
+    with open(javac_log_file, 'a') as output_fh:
+        output_fh.write('javac: warning: [options] bootstrap class path not set in conjunction with -source 8\n')
+        output_fh.write('Note: Some input files use unchecked or unsafe operations. warning: \n')
+        output_fh.write(' warning: \n')
+    for parser, log_file, warning_count in [(get_gcc_warnings, gcc_log_file, 251),
+                                            (get_javac_warnings, javac_log_file, 2)]:
+        live_warnings = []
+        scrub_utilities.execute_command('cat ' + log_file, os.environ.copy(),
+                                        line_callback=lambda line: parser.parse_line(line, live_warnings))
+        assert len(live_warnings) == warning_count
+
+    # Make sure the executor passes each line to the callback as well
+    executor_lines = []
+    command_executor.run_command('cat ' + javac_log_file, os.environ.copy(), line_callback=executor_lines.append)
+    assert len(executor_lines) == 5